@@ -5,13 +5,14 @@ import re
 import sqlite3
 import threading
 import typing
+from concurrent.futures import Executor
 from enum import Enum
 from pathlib import Path
 
 from gruut.const import KNOWN_LANGS, TextProcessorSettings
 from gruut.resources import _DIR, _PACKAGE
 from gruut.text_processor import Sentence, TextProcessor
-from gruut.utils import resolve_lang
+from gruut.utils import LRUCache, resolve_lang
 
 # -----------------------------------------------------------------------------
 
@@ -21,6 +22,8 @@ __version__ = (_DIR / "VERSION").read_text(encoding="utf-8").strip()
 __author__ = "Michael Hansen (synesthesiam)"
 __all__ = [
     "sentences",
+    "sentences_async",
+    "get_text_processor",
     "is_language_supported",
     "get_supported_languages",
     "TextProcessor",
@@ -29,9 +32,15 @@ __all__ = [
 
 # -----------------------------------------------------------------------------
 
-_LOCAL = threading.local()
+# (resolved lang, model prefix) -> processor shared by all threads.
+# Models are loaded once per process (see registry.py).
+_PROCESSORS: typing.Dict[typing.Tuple[str, str], TextProcessor] = {}
 _PROCESSORS_LOCK = threading.RLock()
 
+# Processors for other language names (e.g., ca_ES), least recently used first
+OTHER_PROCESSORS_SIZE = 16
+_OTHER_PROCESSORS = LRUCache(max_size=OTHER_PROCESSORS_SIZE)
+
 
 def sentences(
     text: str,
@@ -66,16 +75,7 @@ def sentences(
     """
     model_prefix = "" if (not espeak) else "espeak"
 
-    with _PROCESSORS_LOCK:
-        if not hasattr(_LOCAL, "processors"):
-            _LOCAL.processors = {}
-
-        text_processor = _LOCAL.processors.get(model_prefix)
-        if text_processor is None:
-            text_processor = TextProcessor(default_lang=lang, model_prefix=model_prefix)
-            _LOCAL.processors[model_prefix] = text_processor
-
-    assert text_processor is not None
+    text_processor = get_text_processor(lang, model_prefix=model_prefix)
     graph, root = text_processor(text, lang=lang, ssml=ssml, **process_args)
 
     yield from text_processor.sentences(
@@ -91,6 +91,70 @@ def sentences(
     )
 
 
+async def sentences_async(
+    text: str,
+    lang: str = "en_US",
+    ssml: bool = False,
+    espeak: bool = False,
+    executor: typing.Optional[Executor] = None,
+    timeout: typing.Optional[float] = None,
+    **sentence_args,
+) -> typing.AsyncIterator[Sentence]:
+    """
+    Process text in an executor and yield sentences without blocking the event loop
+
+    Args:
+        text: input text or SSML (ssml=True)
+        lang: default language of input text
+        ssml: True if input text is SSML
+        espeak: True if eSpeak phonemes should be used
+        executor: executor for processing (default: the event loop's)
+        timeout: seconds to wait before raising asyncio.TimeoutError
+        **sentence_args: keyword arguments of sentences()
+
+    Returns:
+        sentences: async iterable of Sentence objects
+
+    Concurrent calls with the same arguments share one job, and each gets its
+    own copy of the result. Cancelled calls stop waiting for it (see
+    TextProcessor.sentences_async).
+    """
+    model_prefix = "" if (not espeak) else "espeak"
+
+    text_processor = get_text_processor(lang, model_prefix=model_prefix)
+    async for sentence in text_processor.sentences_async(
+        text, lang=lang, ssml=ssml, executor=executor, timeout=timeout, **sentence_args
+    ):
+        yield sentence
+
+
+def get_text_processor(lang: str = "en_US", model_prefix: str = "") -> TextProcessor:
+    """Get the text processor used by sentences() for a language/model prefix.
+
+    Processors are shared between threads, and their models are loaded once
+    per process. Processors of known languages are kept (by resolved name), and
+    only the most recently used OTHER_PROCESSORS_SIZE of other names, so
+    arbitrary language names can't grow the set of processors.
+    """
+    lang = resolve_lang(lang)
+    processors: typing.MutableMapping[typing.Tuple[str, str], TextProcessor] = (
+        _PROCESSORS if lang in KNOWN_LANGS else _OTHER_PROCESSORS
+    )
+
+    key = (lang, model_prefix)
+    text_processor = processors.get(key)
+    if text_processor is None:
+        with _PROCESSORS_LOCK:
+            text_processor = processors.get(key)
+            if text_processor is None:
+                text_processor = TextProcessor(
+                    default_lang=lang, model_prefix=model_prefix
+                )
+                processors[key] = text_processor
+
+    return text_processor
+
+
 # -----------------------------------------------------------------------------
 
 
@@ -2,18 +2,28 @@
 """Command-line interface to gruut"""
 import argparse
 import csv
-import dataclasses
+import itertools
 import logging
 import os
 import sys
+import typing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from enum import Enum
 from pathlib import Path
 
-import jsonlines
+from gruut.const import KNOWN_LANGS, Sentence
+from gruut.serialize import (
+    SENTENCE_FIELDS,
+    WORD_FIELDS,
+    JsonLinesWriter,
+    SentenceEncoder,
+)
+from gruut.text_processor import DEFAULT_MAX_WINDOW_CHARS, TextProcessor
+from gruut.utils import find_lang_dir, print_graph, resolve_lang
 
-from gruut.const import KNOWN_LANGS
-from gruut.text_processor import TextProcessor
-from gruut.utils import print_graph
+if typing.TYPE_CHECKING:
+    from gruut.phoneme_ids import PhonemeInventory
 
 # -----------------------------------------------------------------------------
 
@@ -50,6 +60,12 @@ def main():
 
         print(__version__)
         sys.exit(0)
+    elif sys.argv[1] == "serve":
+        # Long-running server (see serve.py)
+        from gruut.serve import main as serve_main
+
+        serve_main(sys.argv[2:])
+        return
 
     args = get_args()
 
@@ -65,12 +81,15 @@ def main():
 
     # -------------------------------------------------------------------------
 
-    text_processor = TextProcessor(
-        default_lang=args.language, model_prefix=args.model_prefix,
-    )
+    text_processor: typing.Optional[TextProcessor] = None
 
-    if args.debug:
-        _LOGGER.debug(text_processor.settings)
+    if args.workers <= 1:
+        text_processor = TextProcessor(
+            default_lang=args.language, model_prefix=args.model_prefix,
+        )
+
+        if args.debug:
+            _LOGGER.debug(text_processor.settings)
 
     if args.text:
         # Use arguments
@@ -83,7 +102,7 @@ def main():
             # Assume SSML input is entire document
             stdin_format = StdinFormat.DOCUMENT
 
-        if stdin_format == StdinFormat.DOCUMENT:
+        if (stdin_format == StdinFormat.DOCUMENT) and (not args.stream):
             # One big line
             lines = [sys.stdin.read()]
         else:
@@ -93,7 +112,35 @@ def main():
         if os.isatty(sys.stdin.fileno()):
             print("Reading input from stdin...", file=sys.stderr)
 
-    if args.csv:
+    # Phoneme ids for TTS training (numpy is only needed here)
+    phoneme_inventory = None
+    corpus_writer = None
+
+    if args.phoneme_ids or args.phoneme_ids_corpus:
+        from gruut.phoneme_ids import PhonemeIdCorpusWriter
+
+        phoneme_inventory = get_phoneme_inventory(args)
+
+        if args.save_phoneme_table:
+            with open(args.save_phoneme_table, "w", encoding="utf-8") as table_file:
+                phoneme_inventory.to_text(table_file)
+
+            _LOGGER.info("Wrote phoneme table to %s", args.save_phoneme_table)
+
+        if args.phoneme_ids_corpus:
+            corpus_writer = PhonemeIdCorpusWriter(phoneme_inventory)
+
+    if corpus_writer is not None:
+        writer = corpus_writer
+
+        def input_text(lines):
+            for line in lines:
+                yield (line, None)
+
+        def output_sentences(sentences, writer, text_data=None):
+            writer.add_many(sentences)
+
+    elif args.csv:
         writer = csv.writer(sys.stdout, delimiter=args.csv_delimiter)
 
         def input_text(lines):
@@ -122,7 +169,8 @@ def main():
             writer.writerow(row)
 
     else:
-        writer = jsonlines.Writer(sys.stdout, flush=True)
+        writer = JsonLinesWriter(sys.stdout, flush_every=args.flush_every)
+        encoder = SentenceEncoder(args.fields)
 
         def input_text(lines):
             for line in lines:
@@ -130,43 +178,80 @@ def main():
 
         def output_sentences(sentences, writer, text_data=None):
             for sentence in sentences:
-                sentence_dict = dataclasses.asdict(sentence)
-                writer.write(sentence_dict)
-
-    for text, text_data in input_text(lines):
-        try:
-            graph, root = text_processor(
-                text,
-                ssml=args.ssml,
-                pos=(not args.no_pos),
-                phonemize=(not (args.no_lexicon and args.no_g2p)),
-                post_process=(not args.no_post_process),
-                verbalize_numbers=(not args.no_numbers),
-                verbalize_currency=(not args.no_currency),
-                verbalize_dates=(not args.no_dates),
-                verbalize_times=(not args.no_times),
-            )
+                extra = None
+                if phoneme_inventory is not None:
+                    extra = {
+                        "phoneme_ids": phoneme_inventory.sentence_ids(sentence).tolist()
+                    }
+
+                writer.write_line(encoder.encode(sentence, extra))
+
+    try:
+        process_lines(lines, args, text_processor, input_text, output_sentences, writer)
+    finally:
+        if isinstance(writer, JsonLinesWriter):
+            # Write buffered lines
+            writer.close()
+
+    if corpus_writer is not None:
+        corpus_writer.save(args.phoneme_ids_corpus)
+        _LOGGER.info(
+            "Wrote phoneme ids for %s sentence(s) to %s",
+            len(corpus_writer),
+            args.phoneme_ids_corpus,
+        )
+
+    if (phoneme_inventory is not None) and phoneme_inventory.unknown_counts:
+        _LOGGER.warning(
+            "Phonemes missing from inventory (dropped): %s",
+            phoneme_inventory.unknown_counts.most_common(),
+        )
+
+
+def process_lines(
+    lines: typing.Iterable[str],
+    args: argparse.Namespace,
+    text_processor: typing.Optional[TextProcessor],
+    input_text: typing.Callable[..., typing.Iterable[typing.Tuple[str, typing.Any]]],
+    output_sentences: typing.Callable[..., None],
+    writer: typing.Any,
+):
+    """Process input lines and output their sentences with writer"""
+    if args.stream:
+        # Entire input is one document, processed in windows
+        assert text_processor is not None
+        document = "\n".join(lines) if args.text else lines
+
+        for sentence in text_processor.stream_sentences(
+            document,
+            ssml=args.ssml,
+            max_window_chars=args.max_window_chars,
+            **get_sentence_args(args),
+            **get_process_args(args),
+        ):
+            output_sentences([sentence], writer)
+
+        return
+
+    if text_processor is None:
+        # Process chunks of input in parallel, output in order
+        for (text, text_data), sentences in process_parallel(
+            input_text(lines), args
+        ):
+            if sentences is None:
+                # Exception was logged by the worker
+                if not args.no_fail:
+                    raise TextProcessingError(text)
+
+                continue
 
-            if args.debug:
-                print_graph(
-                    graph,
-                    root,
-                    print_func=lambda *print_args: _LOGGER.debug(
-                        " ".join(str(a) for a in print_args)
-                    ),
-                )
+            output_sentences(sentences, writer, text_data)
 
-            # Output sentences
-            sentences = list(
-                text_processor.sentences(
-                    graph,
-                    root,
-                    major_breaks=(not args.no_major_breaks),
-                    minor_breaks=(not args.no_minor_breaks),
-                    punctuations=(not args.no_punctuation),
-                )
-            )
+        return
 
+    for text, text_data in input_text(lines):
+        try:
+            sentences = process_text(text_processor, text, args)
             output_sentences(sentences, writer, text_data)
         except Exception as e:
             _LOGGER.exception(text)
@@ -175,6 +260,166 @@ def main():
                 raise TextProcessingError(text) from e
 
 
+def get_phoneme_inventory(args: argparse.Namespace) -> "PhonemeInventory":
+    """Phoneme inventory from --phoneme-table or the default language.
+
+    Phonemes missing from the inventory are dropped and reported at the end.
+    """
+    from gruut.phoneme_ids import PhonemeInventory
+
+    if args.phoneme_table:
+        with open(args.phoneme_table, "r", encoding="utf-8") as table_file:
+            return PhonemeInventory.from_text(table_file)
+
+    # en-us/espeak
+    lang, _, model_prefix = args.language.partition("/")
+    model_prefix = args.model_prefix or model_prefix
+    lang = resolve_lang(lang)
+
+    # Add phonemes from the lexicon/g2p model, so ids don't depend on input
+    lang_dir = find_lang_dir(lang)
+    if lang_dir is not None:
+        lang_dir = Path(lang_dir) / (model_prefix or "")
+    else:
+        _LOGGER.warning("No language data found for %s", lang)
+
+    try:
+        return PhonemeInventory.from_language(lang, lang_dir=lang_dir)
+    except FileNotFoundError:
+        _LOGGER.critical("No phonemes found for %s", lang)
+        _LOGGER.critical("Use --phoneme-table with a phoneme [id] per line")
+        sys.exit(1)
+
+
+def process_text(
+    text_processor: TextProcessor, text: str, args: argparse.Namespace
+) -> typing.List[Sentence]:
+    """Process a line/document of input text into sentences"""
+    graph, root = text_processor(text, ssml=args.ssml, **get_process_args(args))
+
+    if args.debug:
+        print_graph(
+            graph,
+            root,
+            print_func=lambda *print_args: _LOGGER.debug(
+                " ".join(str(a) for a in print_args)
+            ),
+        )
+
+    # Output sentences
+    return list(text_processor.sentences(graph, root, **get_sentence_args(args)))
+
+
+def get_process_args(args: argparse.Namespace) -> typing.Dict[str, typing.Any]:
+    """Keyword arguments for TextProcessor.process from command-line arguments"""
+    return {
+        "pos": (not args.no_pos),
+        "phonemize": (not (args.no_lexicon and args.no_g2p)),
+        "post_process": (not args.no_post_process),
+        "verbalize_numbers": (not args.no_numbers),
+        "verbalize_currency": (not args.no_currency),
+        "verbalize_dates": (not args.no_dates),
+        "verbalize_times": (not args.no_times),
+    }
+
+
+def get_sentence_args(args: argparse.Namespace) -> typing.Dict[str, typing.Any]:
+    """Keyword arguments for TextProcessor.sentences from command-line arguments"""
+    return {
+        "major_breaks": (not args.no_major_breaks),
+        "minor_breaks": (not args.no_minor_breaks),
+        "punctuations": (not args.no_punctuation),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Parallel processing
+# -----------------------------------------------------------------------------
+
+# (text, text_data)
+INPUT_TYPE = typing.Tuple[str, typing.Any]
+
+# Text processor created in a worker process (see _init_worker)
+_WORKER_TEXT_PROCESSOR: typing.Optional[TextProcessor] = None
+_WORKER_ARGS: typing.Optional[argparse.Namespace] = None
+
+
+def process_parallel(
+    inputs: typing.Iterable[INPUT_TYPE], args: argparse.Namespace
+) -> typing.Iterable[
+    typing.Tuple[INPUT_TYPE, typing.Optional[typing.List[Sentence]]]
+]:
+    """Process inputs in chunks with a pool of worker processes.
+
+    Yields (input, sentences) in input order. Sentences are None if processing
+    failed.
+    """
+    num_workers = args.workers
+
+    # (inputs, sentences for each text)
+    pending_chunks: typing.Deque[
+        typing.Tuple[
+            typing.List[INPUT_TYPE],
+            "Future[typing.List[typing.Optional[typing.List[Sentence]]]]",
+        ]
+    ] = deque()
+
+    with ProcessPoolExecutor(
+        max_workers=num_workers, initializer=_init_worker, initargs=(args,)
+    ) as executor:
+        inputs_iter = iter(inputs)
+        while True:
+            chunk = list(itertools.islice(inputs_iter, args.chunk_size))
+            if not chunk:
+                break
+
+            texts = [text for text, _text_data in chunk]
+            pending_chunks.append((chunk, executor.submit(_process_worker, texts)))
+
+            # Keep workers busy while results are yielded in order
+            while len(pending_chunks) > (2 * num_workers):
+                chunk, future = pending_chunks.popleft()
+                yield from zip(chunk, future.result())
+
+        while pending_chunks:
+            chunk, future = pending_chunks.popleft()
+            yield from zip(chunk, future.result())
+
+
+def _init_worker(args: argparse.Namespace):
+    """Create text processor once per worker process"""
+    global _WORKER_TEXT_PROCESSOR, _WORKER_ARGS
+
+    _WORKER_ARGS = args
+    _WORKER_TEXT_PROCESSOR = TextProcessor(
+        default_lang=args.language, model_prefix=args.model_prefix,
+    )
+
+    # Load lexicon, part of speech tagger, and guesser before the first chunk
+    try:
+        _WORKER_TEXT_PROCESSOR("gruut")
+    except Exception:
+        _LOGGER.exception("Failed to initialize worker")
+
+
+def _process_worker(
+    texts: typing.Sequence[str],
+) -> typing.List[typing.Optional[typing.List[Sentence]]]:
+    """Process texts in a worker process (None for texts that fail)"""
+    assert _WORKER_TEXT_PROCESSOR is not None, "Worker not initialized"
+    assert _WORKER_ARGS is not None
+
+    results: typing.List[typing.Optional[typing.List[Sentence]]] = []
+    for text in texts:
+        try:
+            results.append(process_text(_WORKER_TEXT_PROCESSOR, text, _WORKER_ARGS))
+        except Exception:
+            _LOGGER.exception(text)
+            results.append(None)
+
+    return results
+
+
 # -----------------------------------------------------------------------------
 
 
@@ -262,6 +507,65 @@ def get_args() -> argparse.Namespace:
         "--no-fail", action="store_true", help="Skip lines that result in errors",
     )
 
+    # Parallel processing
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to use (default: 1, output stays in input order)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="Number of lines/rows sent to a worker at a time (with --workers)",
+    )
+
+    # Streaming
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process all input as one document in windows of paragraphs, outputting sentences as they're ready",
+    )
+    parser.add_argument(
+        "--max-window-chars",
+        type=int,
+        default=DEFAULT_MAX_WINDOW_CHARS,
+        help=f"Approximate size of plain text windows with --stream (default: {DEFAULT_MAX_WINDOW_CHARS})",
+    )
+
+    # JSON output
+    parser.add_argument(
+        "--fields",
+        type=lambda fields_str: [f for f in fields_str.split(",") if f],
+        help="Comma-separated sentence/word fields to output in JSON (e.g., text,phonemes)",
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=1,
+        help="Write and flush JSON output every N sentences (0 = at end, default: 1)",
+    )
+
+    # Phoneme ids
+    parser.add_argument(
+        "--phoneme-ids",
+        action="store_true",
+        help="Add integer phoneme ids to each sentence in JSON output",
+    )
+    parser.add_argument(
+        "--phoneme-ids-corpus",
+        help="Write phoneme ids of all sentences to a .npz file or a directory of .npy files instead of JSON",
+    )
+    parser.add_argument(
+        "--phoneme-table",
+        help="Text file with phoneme [id] lines (default: phonemes of --language and its lexicon)",
+    )
+    parser.add_argument(
+        "--save-phoneme-table",
+        help="Write phoneme id lines used for --phoneme-ids/--phoneme-ids-corpus to a text file",
+    )
+
     # Miscellaneous
     parser.add_argument(
         "--espeak",
@@ -302,7 +606,30 @@ def get_args() -> argparse.Namespace:
         "--debug", action="store_true", help="Print DEBUG messages to console"
     )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+
+    if args.stream and (args.csv or (args.workers > 1)):
+        parser.error("--stream can't be used with --csv or --workers")
+
+    if (args.phoneme_ids or args.phoneme_ids_corpus) and args.csv:
+        parser.error("--phoneme-ids and --phoneme-ids-corpus can't be used with --csv")
+
+    if args.save_phoneme_table and not (args.phoneme_ids or args.phoneme_ids_corpus):
+        parser.error(
+            "--save-phoneme-table requires --phoneme-ids or --phoneme-ids-corpus"
+        )
+
+    if args.fields is not None:
+        unknown_fields = set(args.fields) - set(SENTENCE_FIELDS) - set(WORD_FIELDS)
+        if unknown_fields:
+            parser.error(
+                "Unknown field(s) {}, expected some of: {}".format(
+                    ", ".join(sorted(unknown_fields)),
+                    ", ".join(sorted(set(SENTENCE_FIELDS) | set(WORD_FIELDS))),
+                )
+            )
+
+    return args
 
 
 # -----------------------------------------------------------------------------
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Convert a Phonetisaurus FST (printed with fstprint) to numpy arrays"""
 import argparse
+import itertools
 import logging
 import typing
 from pathlib import Path
@@ -18,7 +19,11 @@ def main():
     parser.add_argument(
         "fst_text", help="Path to Phonetisaurus text FST (use fstprint)"
     )
-    parser.add_argument("npz", help="Path to write numpy npz file")
+    parser.add_argument(
+        "npz",
+        help="Path to write numpy npz file "
+        + "(or directory of .npy files that can be memory-mapped)",
+    )
     args = parser.parse_args()
     args.fst_text = Path(args.fst_text)
     args.npz = Path(args.npz)
@@ -31,8 +36,18 @@ def main():
     _LOGGER.info("Converting %s to graph", args.fst_text)
     graph = fst2graph(args.fst_text)
     _LOGGER.info("Writing graph to %s", args.npz)
-    with open(args.npz, "wb") as npz_file:
-        np.savez(npz_file, **graph)
+    if args.npz.suffix == ".npz":
+        with open(args.npz, "wb") as npz_file:
+            np.savez(npz_file, **graph)
+    else:
+        # One .npy file per array, loaded with mmap_mode
+        args.npz.mkdir(parents=True, exist_ok=True)
+        for array_name, array in graph.items():
+            if array.dtype == object:
+                # Object arrays can't be memory-mapped
+                array = array.astype(str)
+
+            np.save(args.npz / f"{array_name}.npy", array)
 
 
 def fst2graph(fst_path: typing.Union[str, Path]) -> typing.Dict[str, np.ndarray]:
@@ -93,12 +108,24 @@ def fst2graph(fst_path: typing.Union[str, Path]) -> typing.Dict[str, np.ndarray]
 
     assert start_node is not None, "No start node"
 
-    edges = sorted(edges, key=lambda e: e[0])
+    # Sort edges by from node, keeping probabilities in the same order
+    edge_order = sorted(range(len(edges)), key=lambda i: edges[i][0])
+    edges = [edges[i] for i in edge_order]
+    edge_probs = [edge_probs[i] for i in edge_order]
+
+    # Out edges of node n are edge_offsets[n] to edge_offsets[n + 1] (CSR)
+    num_nodes = max(itertools.chain(to_nodes, final_nodes, [start_node])) + 1
+    num_nodes = max(num_nodes, edges[-1][0] + 1)
+    edge_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(
+        np.bincount([e[0] for e in edges], minlength=num_nodes), out=edge_offsets[1:]
+    )
 
     return {
         "start_node": np.array([start_node], dtype=np.int32),
         "edges": np.array(edges, dtype=np.int32),
         "edge_probs": np.array(edge_probs, dtype=np.float32),
+        "edge_offsets": edge_offsets,
         "final_nodes": np.array(final_nodes, dtype=np.int32),
         "final_probs": np.array(final_probs, dtype=np.float32),
         "symbols": np.array(
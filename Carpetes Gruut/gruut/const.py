@@ -9,10 +9,6 @@ from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 
-import babel
-import babel.core
-import babel.numbers
-
 # alias -> full language name
 LANG_ALIASES = {
     "ar": "ar",
@@ -67,11 +63,14 @@ DATA_PROP = "data"
 
 
 class GraphType:
-    """Type wrapper for networkx graph"""
+    """Type wrapper for text graph (DocumentTree or networkx DiGraph)"""
 
     nodes: typing.Dict[NODE_TYPE, typing.Dict[typing.Any, typing.Any]]
     """Get node data for the graph"""
 
+    graph: typing.Dict[str, typing.Any]
+    """Attributes of the whole graph (document)"""
+
     def add_node(self, node: NODE_TYPE, **kwargs):
         """Add a new node to the graph"""
         pass
@@ -320,6 +319,9 @@ class WordNode(Node):
     in_lexicon: typing.Optional[bool] = None
     lexicon_ids: typing.Optional[typing.Sequence[str]] = None
 
+    # role -> phonemes from the language lexicon (None if not looked up or missing)
+    lexicon_prons: typing.Optional[typing.Mapping[str, PHONEMES_TYPE]] = None
+
     # Assume yes until proven otherwise
     is_maybe_number: bool = True
     is_maybe_date: bool = True
@@ -690,6 +692,9 @@ class TextProcessorSettings:
     is_maybe_date: typing.Optional[typing.Callable[[str], bool]] = has_digit
     """True if a word may be a date (parsing will be attempted)"""
 
+    parse_date: typing.Optional[typing.Callable[[str], typing.Optional[datetime]]] = None
+    """Parse common date formats quickly into a datetime or None (dateparser is used for None)"""
+
     default_date_format: typing.Union[
         str, InterpretAsFormat
     ] = InterpretAsFormat.DATE_MDY_ORDINAL
@@ -833,6 +838,9 @@ class TextProcessorSettings:
         # Currency
         if not self.currencies:
             try:
+                import babel
+                import babel.numbers
+
                 # Look up currencies for locale
                 locale_obj = babel.Locale(self.babel_locale)
 
@@ -2,6 +2,16 @@
 """Converts a Phonetisaurus G2P corpus to an sqlite database"""
 import argparse
 import sqlite3
+import sys
+import time
+import typing
+
+from gruut.lexicon2db import (
+    DEFAULT_CHUNK_SIZE,
+    insert_rows,
+    report_progress,
+    set_bulk_pragmas,
+)
 
 # -----------------------------------------------------------------------------
 
@@ -18,37 +28,29 @@ def main():
         action="store_true",
         help="Don't drop existing g2p_alignments table",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Disable journaling/syncing and create the index after loading (faster)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of rows inserted at a time",
+    )
     args = parser.parse_args()
 
     # -------------------------------------------------------------------------
 
     conn = sqlite3.connect(args.database)
+    if args.bulk:
+        set_bulk_pragmas(conn)
 
-    g2p_alignments = {}
-    with open(args.corpus, "r", encoding="utf-8") as corpus_file:
-        for line in corpus_file:
-            line = line.strip()
-            if not line:
-                continue
-
-            word = ""
-
-            # Parse line
-            parts = line.split()
-            for part in parts:
-                # Assume default delimiters:
-                # } separates input/output
-                # | separates input/output tokens
-                # _ indicates empty output
-                part_in, _part_out = part.split("}")
-                part_ins = part_in.split("|")
-                word += "".join(part_ins)
-
-            if word and (word not in g2p_alignments):
-                g2p_alignments[word] = line
+    start_time = time.perf_counter()
 
     # Add to database
-    with conn:
+    with conn, open(args.corpus, "r", encoding="utf-8") as corpus_file:
         if not args.no_drop:
             conn.execute("DROP TABLE IF EXISTS g2p_alignments")
 
@@ -57,13 +59,61 @@ def main():
             + "(id INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT, alignment TEXT);"
         )
 
-        for word, alignment in g2p_alignments.items():
-            conn.execute(
-                "INSERT INTO g2p_alignments (word, alignment) VALUES (?, ?)",
-                (word, alignment),
-            )
+        if args.bulk:
+            conn.execute("DROP INDEX IF EXISTS g2p_alignments_word")
+
+        # Only the first alignment for each word is kept
+        seen_words: typing.Set[str] = set()
+
+        def first_alignments():
+            for word, alignment in read_corpus(corpus_file):
+                if word not in seen_words:
+                    seen_words.add(word)
+                    yield word, alignment
+
+        num_alignments = insert_rows(
+            conn,
+            "INSERT INTO g2p_alignments (word, alignment) VALUES (?, ?)",
+            first_alignments(),
+            chunk_size=args.chunk_size,
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS g2p_alignments_word ON g2p_alignments (word);"
+        )
+
+    conn.execute("ANALYZE")
+    conn.close()
+
+    report_progress(
+        "Added", num_alignments, start_time, sys.stderr, to=args.database,
+    )
+
 
-    print("Added", len(g2p_alignments), "alignments to", args.database)
+def read_corpus(
+    corpus_file: typing.Iterable[str],
+) -> typing.Iterable[typing.Tuple[str, str]]:
+    """Parse Phonetisaurus corpus lines into (word, alignment) tuples"""
+    for line in corpus_file:
+        line = line.strip()
+        if not line:
+            continue
+
+        word = ""
+
+        # Parse line
+        parts = line.split()
+        for part in parts:
+            # Assume default delimiters:
+            # } separates input/output
+            # | separates input/output tokens
+            # _ indicates empty output
+            part_in, _part_out = part.split("}")
+            part_ins = part_in.split("|")
+            word += "".join(part_ins)
+
+        if word:
+            yield word, line
 
 
 # -----------------------------------------------------------------------------
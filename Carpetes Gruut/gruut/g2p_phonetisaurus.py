@@ -9,7 +9,8 @@ import os
 import sys
 import time
 import typing
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
@@ -17,6 +18,10 @@ import numpy as np
 _LOGGER = logging.getLogger("g2p_phonetisaurus")
 
 NUMPY_GRAPH = typing.Dict[str, np.ndarray]
+WORD_TYPE = typing.Union[str, typing.Sequence[str]]
+
+# (graphemes, phonemes)
+GUESSES_TYPE = typing.List[typing.Tuple[typing.Sequence[str], typing.Sequence[str]]]
 
 # -----------------------------------------------------------------------------
 
@@ -81,6 +86,11 @@ def main():
         action="store_true",
         help="Preload graph into memory before starting",
     )
+    predict_parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Search with numpy arrays (faster for long words and wide beams)",
+    )
     predict_parser.set_defaults(func=do_predict)
 
     # ----
@@ -116,6 +126,11 @@ def main():
         action="store_true",
         help="Preload graph into memory before starting",
     )
+    test_parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Search with numpy arrays (faster for long words and wide beams)",
+    )
     test_parser.set_defaults(func=do_test)
 
     # ----------------
@@ -125,6 +140,11 @@ def main():
         sub_parser.add_argument(
             "--debug", action="store_true", help="Print DEBUG messages to console"
         )
+        sub_parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of worker processes (default: guess in main process)",
+        )
 
     args = parser.parse_args()
 
@@ -146,7 +166,9 @@ def do_predict(args):
     args.graph = Path(args.graph)
 
     _LOGGER.debug("Loading graph from %s", args.graph)
-    phon_graph = PhonetisaurusGraph.load(args.graph, preload=args.preload_graph)
+    phon_graph = PhonetisaurusGraph.load(
+        args.graph, preload=args.preload_graph, vectorized=args.vectorized
+    )
 
     if args.words:
         # Arguments
@@ -161,7 +183,8 @@ def do_predict(args):
 
     # Guess pronunciations
     for word, graphemes, phonemes in phon_graph.g2p(
-        words,
+        (word.strip() for word in words),
+        num_workers=args.workers,
         grapheme_separator=args.grapheme_separator,
         max_guesses=args.max_guesses,
         beam=args.beam,
@@ -190,7 +213,9 @@ def do_test(args):
     args.graph = Path(args.graph)
 
     _LOGGER.debug("Loading graph from %s", args.graph)
-    phon_graph = PhonetisaurusGraph.load(args.graph, preload=args.preload_graph)
+    phon_graph = PhonetisaurusGraph.load(
+        args.graph, preload=args.preload_graph, vectorized=args.vectorized
+    )
 
     if args.texts:
         lines = args.texts
@@ -214,18 +239,16 @@ def do_test(args):
     predicted_phonemes = {}
     start_time = time.perf_counter()
 
-    for word in lexicon:
-        for _, _, guessed_phonemes in phon_graph.g2p(
-            [word],
-            beam=args.beam,
-            min_beam=args.min_beam,
-            beam_scale=args.beam_scale,
-            max_guesses=1,
-        ):
-            predicted_phonemes[word] = " ".join(guessed_phonemes)
-
-            # Only one guess
-            break
+    for word, _, guessed_phonemes in phon_graph.g2p(
+        lexicon,
+        num_workers=args.workers,
+        beam=args.beam,
+        min_beam=args.min_beam,
+        beam_scale=args.beam_scale,
+        max_guesses=1,
+    ):
+        # Only one guess
+        predicted_phonemes[word] = " ".join(guessed_phonemes)
 
     end_time = time.perf_counter()
 
@@ -269,7 +292,9 @@ class PhonetisaurusGraph:
     to load.
     """
 
-    def __init__(self, graph: NUMPY_GRAPH, preload: bool = False):
+    def __init__(
+        self, graph: NUMPY_GRAPH, preload: bool = False, vectorized: bool = False
+    ):
         self.graph = graph
 
         self.start_node = int(self.graph["start_node"].item())
@@ -284,6 +309,19 @@ class PhonetisaurusGraph:
             symbol_list = symbol_str.replace("_", "").split("|")
             self.symbols.append((len(symbol_list), symbol_list))
 
+        # Input labels are matched as integers instead of strings.
+        # grapheme -> id
+        self.grapheme_ids: typing.Dict[str, int] = {}
+
+        # int -> (grapheme id, ...)
+        self.ilabel_ids: typing.List[typing.Tuple[int, ...]] = [
+            tuple(
+                self.grapheme_ids.setdefault(g, len(self.grapheme_ids))
+                for g in symbol_list
+            )
+            for _, symbol_list in self.symbols
+        ]
+
         # nodes that are accepting states
         self.final_nodes = self.graph["final_nodes"]
 
@@ -291,37 +329,121 @@ class PhonetisaurusGraph:
         self.final_probs = self.graph["final_probs"]
 
         # Cache
-        self.preloaded = preload
-        self.out_edges: typing.Dict[int, typing.List[int]] = defaultdict(list)
+        # node -> [(to_node, ilabel, olabel, prob)]
+        self.out_edges: typing.Dict[
+            int, typing.List[typing.Tuple[int, int, int, float]]
+        ] = {}
         self.final_node_probs: typing.Dict[int, typing.Any] = {}
 
-        if preload:
-            # Load out edges
-            for edge_idx, (from_node, *_) in enumerate(self.edges):
-                self.out_edges[from_node].append(edge_idx)
+        # Search with numpy arrays instead of Python lists (see g2p_one_vectorized)
+        self.vectorized = vectorized
 
-            # Load final probabilities
-            self.final_node_probs.update(zip(self.final_nodes, self.final_probs))
+        # Set by load, used to re-load the graph in worker processes
+        self.graph_path: typing.Optional[Path] = None
+        self.csr: typing.Optional[CSRGraph] = None
+
+        # Out edges in CSR form (built with numpy, or stored by fst2npy.py)
+        self.preloaded = preload
+        if preload:
+            self.get_csr()
 
     @staticmethod
     def load(graph_path: typing.Union[str, Path], **kwargs) -> "PhonetisaurusGraph":
-        """Load .npz file with numpy graph"""
-        np_graph = np.load(graph_path, allow_pickle=True)
-        return PhonetisaurusGraph(np_graph, **kwargs)
+        """Load .npz file or directory of .npy files with numpy graph.
+
+        Arrays in a directory are memory-mapped, so they're shared between
+        processes.
+        """
+        graph_path = Path(graph_path)
+
+        if graph_path.is_dir():
+            np_graph = {
+                npy_path.stem: np.load(npy_path, mmap_mode="r")
+                for npy_path in graph_path.glob("*.npy")
+            }
+        else:
+            np_graph = np.load(graph_path, allow_pickle=True)
+
+        phon_graph = PhonetisaurusGraph(np_graph, **kwargs)
+        phon_graph.graph_path = graph_path
+
+        return phon_graph
 
     def g2p(
-        self, words: typing.Iterable[typing.Union[str, typing.Sequence[str]]], **kwargs
+        self,
+        words: typing.Iterable[WORD_TYPE],
+        num_workers: typing.Optional[int] = None,
+        batch_size: int = 256,
+        **kwargs,
     ) -> typing.Iterable[
-        typing.Tuple[
-            typing.Union[str, typing.Sequence[str]],
-            typing.Sequence[str],
-            typing.Sequence[str],
-        ],
+        typing.Tuple[WORD_TYPE, typing.Sequence[str], typing.Sequence[str]],
     ]:
-        """Guess phonemes for words"""
-        for word in words:
-            for graphemes, phonemes in self.g2p_one(word, **kwargs):
-                yield word, graphemes, phonemes
+        """Guess phonemes for words (in input order).
+
+        Duplicate words are only guessed once, and the edge/final probability
+        caches are shared by all words.
+
+        With num_workers > 1, batches of words are guessed in a process pool.
+        Graphs loaded from a directory of .npy files are memory-mapped by each
+        worker, so only one copy is in memory.
+        """
+        # word -> guesses
+        word_guesses: typing.Dict[typing.Hashable, GUESSES_TYPE] = {}
+
+        if (num_workers is None) or (num_workers < 2):
+            for word in words:
+                word_key = _word_key(word)
+                guesses = word_guesses.get(word_key)
+                if guesses is None:
+                    guesses = list(self.g2p_one(word, **kwargs))
+                    word_guesses[word_key] = guesses
+
+                for graphemes, phonemes in guesses:
+                    yield word, graphemes, list(phonemes)
+
+            return
+
+        if self.graph_path is not None:
+            graph_source: typing.Union[Path, NUMPY_GRAPH] = self.graph_path
+        else:
+            graph_source = {key: self.graph[key] for key in self.graph}
+
+        graph_args = {"preload": self.preloaded, "vectorized": self.vectorized}
+
+        # (words, guesses for new words in batch)
+        pending_batches: typing.Deque[
+            typing.Tuple[
+                typing.List[WORD_TYPE],
+                "Future[typing.Dict[typing.Hashable, GUESSES_TYPE]]",
+            ]
+        ] = deque()
+
+        # Words that have been sent to a worker
+        submitted_keys: typing.Set[typing.Hashable] = set()
+
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(graph_source, graph_args),
+        ) as executor:
+            for batch in _batches(words, batch_size):
+                new_words = []
+                for word in batch:
+                    word_key = _word_key(word)
+                    if word_key not in submitted_keys:
+                        submitted_keys.add(word_key)
+                        new_words.append(word)
+
+                pending_batches.append(
+                    (batch, executor.submit(_g2p_worker, new_words, kwargs))
+                )
+
+                # Keep workers busy while results are yielded in order
+                while len(pending_batches) > (2 * num_workers):
+                    yield from _batch_guesses(pending_batches.popleft(), word_guesses)
+
+            while pending_batches:
+                yield from _batch_guesses(pending_batches.popleft(), word_guesses)
 
     def g2p_one(
         self,
@@ -334,6 +456,18 @@ class PhonetisaurusGraph:
         max_guesses: int = 1,
     ) -> typing.Iterable[typing.Tuple[typing.Sequence[str], typing.Sequence[str]]]:
         """Guess phonemes for word"""
+        if self.vectorized:
+            yield from self.g2p_one_vectorized(
+                word,
+                eps=eps,
+                beam=beam,
+                min_beam=min_beam,
+                beam_scale=beam_scale,
+                grapheme_separator=grapheme_separator,
+                max_guesses=max_guesses,
+            )
+            return
+
         current_beam = beam
         graphemes: typing.Sequence[str] = []
 
@@ -350,25 +484,18 @@ class PhonetisaurusGraph:
         if not graphemes:
             return graphemes, []
 
-        # (prob, node, graphemes, phonemes, final, beam)
+        # Graphemes that aren't in any input label never match
+        word_ids = tuple(self.grapheme_ids.get(g, -1) for g in graphemes)
+        num_graphemes = len(word_ids)
+        eps_ids = (self.grapheme_ids.get(eps, -2),)
+
+        # (prob, node, grapheme position, phonemes, final)
         q: typing.List[
-            typing.Tuple[
-                float,
-                typing.Optional[int],
-                typing.Sequence[str],
-                typing.List[str],
-                bool,
-            ]
-        ] = [(0.0, self.start_node, graphemes, [], False)]
+            typing.Tuple[float, typing.Optional[int], int, typing.List[str], bool]
+        ] = [(0.0, self.start_node, 0, [], False)]
 
         q_next: typing.List[
-            typing.Tuple[
-                float,
-                typing.Optional[int],
-                typing.Sequence[str],
-                typing.List[str],
-                bool,
-            ]
+            typing.Tuple[float, typing.Optional[int], int, typing.List[str], bool]
         ] = []
 
         # (prob, phonemes)
@@ -381,7 +508,7 @@ class PhonetisaurusGraph:
             done_with_word = False
             q_next = []
 
-            for prob, node, next_graphemes, output, is_final in q:
+            for prob, node, position, output, is_final in q:
                 if is_final:
                     # Complete guess
                     phonemes = tuple(output)
@@ -397,69 +524,38 @@ class PhonetisaurusGraph:
 
                 assert node is not None
 
-                if not next_graphemes:
-                    if self.preloaded:
-                        final_prob = self.final_node_probs.get(node, _NOT_FINAL)
-                    else:
-                        final_prob = self.final_node_probs.get(node)
-                        if final_prob is None:
-                            final_idx = int(np.searchsorted(self.final_nodes, node))
-                            if self.final_nodes[final_idx] == node:
-                                # Cache
-                                final_prob = float(self.final_probs[final_idx])
-                                self.final_node_probs[node] = final_prob
-                            else:
-                                # Not a final state
-                                final_prob = _NOT_FINAL
-                                self.final_node_probs[node] = final_prob
-
-                    if final_prob != _NOT_FINAL:
+                len_next_graphemes = num_graphemes - position
+                if len_next_graphemes == 0:
+                    final_prob = self.get_final_prob(node)
+                    if final_prob is not _NOT_FINAL:
                         final_prob = typing.cast(float, final_prob)
-                        q_next.append((prob + final_prob, None, [], output, True))
-
-                len_next_graphemes = len(next_graphemes)
-                if self.preloaded:
-                    # Was pre-loaded in __init__
-                    edge_idxs = self.out_edges[node]
-                else:
-                    # Build cache during search
-                    maybe_edge_idxs = self.out_edges.get(node)
-                    if maybe_edge_idxs is None:
-                        edge_idx = int(np.searchsorted(self.edges[:, 0], node))
-                        edge_idxs = []
-                        while self.edges[edge_idx][0] == node:
-                            edge_idxs.append(edge_idx)
-                            edge_idx += 1
-
-                        # Cache
-                        self.out_edges[node] = edge_idxs
-                    else:
-                        edge_idxs = maybe_edge_idxs
-
-                for edge_idx in edge_idxs:
-                    _, to_node, ilabel_idx, olabel_idx = self.edges[edge_idx]
-                    out_prob = self.edge_probs[edge_idx]
-
-                    len_igraphemes, igraphemes = self.symbols[ilabel_idx]
+                        q_next.append((prob + final_prob, None, position, output, True))
+
+                for to_node, ilabel_idx, olabel_idx, out_prob in self.get_out_edges(
+                    node
+                ):
+                    igrapheme_ids = self.ilabel_ids[ilabel_idx]
+                    len_igraphemes = len(igrapheme_ids)
 
                     if len_igraphemes > len_next_graphemes:
                         continue
 
-                    if igraphemes == [eps]:
-                        item = (prob + out_prob, to_node, next_graphemes, output, False)
+                    if igrapheme_ids == eps_ids:
+                        item = (prob + out_prob, to_node, position, output, False)
+                        q_next.append(item)
+                    elif (
+                        igrapheme_ids
+                        == word_ids[position : position + len_igraphemes]
+                    ):
+                        _, olabel = self.symbols[olabel_idx]
+                        item = (
+                            prob + out_prob,
+                            to_node,
+                            position + len_igraphemes,
+                            output + olabel,
+                            False,
+                        )
                         q_next.append(item)
-                    else:
-                        sub_graphemes = next_graphemes[:len_igraphemes]
-                        if igraphemes == sub_graphemes:
-                            _, olabel = self.symbols[olabel_idx]
-                            item = (
-                                prob + out_prob,
-                                to_node,
-                                next_graphemes[len(sub_graphemes) :],
-                                output + olabel,
-                                False,
-                            )
-                            q_next.append(item)
 
             if done_with_word:
                 break
@@ -479,6 +575,487 @@ class PhonetisaurusGraph:
             # No guesses
             yield graphemes, []
 
+    def g2p_one_vectorized(
+        self,
+        word: typing.Union[str, typing.Sequence[str]],
+        eps: str = "<eps>",
+        beam: int = 5000,
+        min_beam: int = 100,
+        beam_scale: float = 0.6,
+        grapheme_separator: str = "",
+        max_guesses: int = 1,
+    ) -> typing.Iterable[typing.Tuple[typing.Sequence[str], typing.Sequence[str]]]:
+        """Guess phonemes for word with the same search as g2p_one.
+
+        Hypotheses are kept in parallel numpy arrays and expanded all at once
+        using the graph in CSR form. Phonemes are only reconstructed for
+        complete guesses from back-pointers (history).
+        """
+        graphemes: typing.Sequence[str] = []
+
+        if isinstance(word, str):
+            word = word.strip()
+
+            if grapheme_separator:
+                graphemes = word.split(grapheme_separator)
+            else:
+                graphemes = list(word)
+        else:
+            graphemes = word
+
+        if not graphemes:
+            return
+
+        csr = self.get_csr()
+        num_graphemes = len(graphemes)
+        word_keys = csr.word_keys(
+            tuple(self.grapheme_ids.get(g, -1) for g in graphemes)
+        )
+        eps_key = csr.symbol_keys.get((self.grapheme_ids.get(eps, -2),), -2)
+        is_eps_symbol = csr.ilabel_keys == eps_key
+
+        current_beam = beam
+
+        # Hypotheses in queue order
+        probs = np.zeros(1, dtype=np.float64)
+        nodes = np.array([self.start_node], dtype=np.int64)
+        positions = np.zeros(1, dtype=np.int64)
+        histories = np.full(1, -1, dtype=np.int64)
+        is_final = np.zeros(1, dtype=bool)
+
+        history = _SearchHistory()
+
+        # (prob, phonemes)
+        best_heap: typing.List[typing.Tuple[float, typing.Sequence[str]]] = []
+
+        # Avoid duplicate guesses
+        guessed_phonemes: typing.Set[typing.Tuple[str, ...]] = set()
+
+        while len(probs) > 0:
+            done_with_word = False
+
+            # Complete guesses
+            for hyp_idx in np.flatnonzero(is_final):
+                phonemes = csr.history_phonemes(history, int(histories[hyp_idx]))
+                if phonemes not in guessed_phonemes:
+                    best_heap.append((float(probs[hyp_idx]), phonemes))
+                    guessed_phonemes.add(phonemes)
+
+                if len(best_heap) >= max_guesses:
+                    done_with_word = True
+                    break
+
+            if done_with_word:
+                break
+
+            # Expand incomplete hypotheses
+            active = np.flatnonzero(~is_final)
+            probs, nodes = probs[active], nodes[active]
+            positions, histories = positions[active], histories[active]
+            num_active = len(active)
+
+            edge_starts = csr.offsets[nodes]
+            edge_counts = csr.offsets[nodes + 1] - edge_starts
+            counts_before = np.cumsum(edge_counts) - edge_counts
+
+            # edge -> hypothesis
+            edge_hyps = np.repeat(np.arange(num_active), edge_counts)
+            edge_idxs = np.repeat(edge_starts - counts_before, edge_counts) + np.arange(
+                len(edge_hyps)
+            )
+
+            # Queue order matches g2p_one: final state, then out edges
+            final_order = counts_before + np.arange(num_active)
+            edge_order = np.arange(len(edge_hyps)) + edge_hyps + 1
+
+            edge_ilabels = csr.ilabels[edge_idxs]
+            edge_positions = positions[edge_hyps]
+            edge_lens = csr.ilabel_lens[edge_ilabels]
+            edge_keys = csr.ilabel_keys[edge_ilabels]
+            edge_is_eps = is_eps_symbol[edge_ilabels]
+            edge_matches = (edge_lens <= (num_graphemes - edge_positions)) & (
+                edge_is_eps | (word_keys[edge_positions, edge_lens] == edge_keys)
+            )
+
+            edge_hyps = edge_hyps[edge_matches]
+            edge_idxs = edge_idxs[edge_matches]
+            edge_order = edge_order[edge_matches]
+            edge_is_eps = edge_is_eps[edge_matches]
+            edge_advance = np.where(edge_is_eps, 0, edge_lens[edge_matches])
+
+            # Epsilon edges don't output phonemes
+            edge_histories = histories[edge_hyps]
+            output_edges = np.flatnonzero(~edge_is_eps)
+            edge_histories[output_edges] = history.add(
+                edge_histories[output_edges], csr.olabels[edge_idxs[output_edges]]
+            )
+
+            # All graphemes consumed in a final state
+            at_end = np.flatnonzero(
+                (positions == num_graphemes) & csr.node_is_final[nodes]
+            )
+
+            probs = np.concatenate(
+                (
+                    probs[at_end] + csr.node_final_probs[nodes[at_end]],
+                    probs[edge_hyps] + csr.edge_probs[edge_idxs],
+                )
+            )
+            nodes = np.concatenate((nodes[at_end], csr.to_nodes[edge_idxs]))
+            positions = np.concatenate(
+                (positions[at_end], edge_positions[edge_matches] + edge_advance)
+            )
+            histories = np.concatenate((histories[at_end], edge_histories))
+            is_final = np.concatenate(
+                (np.ones(len(at_end), dtype=bool), np.zeros(len(edge_idxs), dtype=bool))
+            )
+
+            queue_order = np.argsort(
+                np.concatenate((final_order[at_end], edge_order)), kind="stable"
+            )
+
+            # Prune to beam, keeping the earliest hypotheses on ties
+            if len(queue_order) > current_beam:
+                queue_probs = probs[queue_order]
+                kth_idx = np.argpartition(queue_probs, current_beam - 1)[
+                    current_beam - 1
+                ]
+                max_prob = queue_probs[kth_idx]
+                keep = queue_probs < max_prob
+                ties = np.flatnonzero(queue_probs == max_prob)
+                keep[ties[: current_beam - int(keep.sum())]] = True
+                queue_order = queue_order[keep]
+
+            queue_order = queue_order[np.argsort(probs[queue_order], kind="stable")]
+
+            probs, nodes = probs[queue_order], nodes[queue_order]
+            positions, histories = positions[queue_order], histories[queue_order]
+            is_final = is_final[queue_order]
+
+            current_beam = max(min_beam, (int(current_beam * beam_scale)))
+
+        # Yield guesses
+        if best_heap:
+            for _, guess_phonemes in sorted(best_heap, key=lambda item: item[0])[
+                :max_guesses
+            ]:
+                yield graphemes, [p for p in guess_phonemes if p]
+        else:
+            # No guesses
+            yield graphemes, []
+
+    def get_csr(self) -> "CSRGraph":
+        """Get graph in compressed sparse row form (created on first use)"""
+        if self.csr is None:
+            self.csr = CSRGraph.from_graph(self)
+
+        return self.csr
+
+    def get_out_edges(
+        self, node: int
+    ) -> typing.List[typing.Tuple[int, int, int, float]]:
+        """Get (to_node, ilabel, olabel, prob) for edges out of node (cached)"""
+        out_edges = self.out_edges.get(node)
+        if out_edges is not None:
+            return out_edges
+
+        if self.csr is not None:
+            start_idx = int(self.csr.offsets[node])
+            end_idx = int(self.csr.offsets[node + 1])
+            node_edges = zip(
+                self.csr.to_nodes[start_idx:end_idx].tolist(),
+                self.csr.ilabels[start_idx:end_idx].tolist(),
+                self.csr.olabels[start_idx:end_idx].tolist(),
+                self.csr.edge_probs[start_idx:end_idx].tolist(),
+            )
+        else:
+            # Edges are sorted by from node
+            from_nodes = self.edges[:, 0]
+            start_idx = int(np.searchsorted(from_nodes, node))
+            end_idx = int(np.searchsorted(from_nodes, node, side="right"))
+            node_edges = zip(
+                self.edges[start_idx:end_idx, 1].tolist(),
+                self.edges[start_idx:end_idx, 2].tolist(),
+                self.edges[start_idx:end_idx, 3].tolist(),
+                self.edge_probs[start_idx:end_idx].tolist(),
+            )
+
+        out_edges = list(node_edges)
+        self.out_edges[node] = out_edges
+
+        return out_edges
+
+    def get_final_prob(self, node: int) -> typing.Any:
+        """Get final probability of node or _NOT_FINAL (cached)"""
+        final_prob = self.final_node_probs.get(node)
+        if final_prob is not None:
+            return final_prob
+
+        if self.csr is not None:
+            if self.csr.node_is_final[node]:
+                final_prob = float(self.csr.node_final_probs[node])
+            else:
+                final_prob = _NOT_FINAL
+        else:
+            final_idx = int(np.searchsorted(self.final_nodes, node))
+            if (final_idx < len(self.final_nodes)) and (
+                self.final_nodes[final_idx] == node
+            ):
+                final_prob = float(self.final_probs[final_idx])
+            else:
+                # Not a final state
+                final_prob = _NOT_FINAL
+
+        self.final_node_probs[node] = final_prob
+
+        return final_prob
+
+
+# -----------------------------------------------------------------------------
+
+
+class CSRGraph:
+    """Phonetisaurus graph with out edges in compressed sparse row form.
+
+    Out edges of node n are offsets[n] to offsets[n + 1] in the edge arrays.
+    Input labels are matched by key: an integer id for each distinct sequence
+    of grapheme ids.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        to_nodes: np.ndarray,
+        ilabels: np.ndarray,
+        olabels: np.ndarray,
+        edge_probs: np.ndarray,
+        node_is_final: np.ndarray,
+        node_final_probs: np.ndarray,
+        symbols: typing.Sequence[typing.Tuple[int, typing.List[str]]],
+        ilabel_ids: typing.Sequence[typing.Tuple[int, ...]],
+    ):
+        self.offsets = offsets
+        self.to_nodes = to_nodes
+        self.ilabels = ilabels
+        self.olabels = olabels
+        self.edge_probs = edge_probs
+        self.node_is_final = node_is_final
+        self.node_final_probs = node_final_probs
+        self.symbols = symbols
+
+        # (grapheme id, ...) -> key
+        self.symbol_keys: typing.Dict[typing.Tuple[int, ...], int] = {}
+
+        # symbol -> key
+        self.ilabel_keys = np.zeros(len(ilabel_ids), dtype=np.int64)
+
+        # symbol -> number of graphemes
+        self.ilabel_lens = np.zeros(len(ilabel_ids), dtype=np.int64)
+
+        for symbol_idx, symbol_ids in enumerate(ilabel_ids):
+            self.ilabel_keys[symbol_idx] = self.symbol_keys.setdefault(
+                symbol_ids, len(self.symbol_keys)
+            )
+            self.ilabel_lens[symbol_idx] = len(symbol_ids)
+
+        self.max_ilabel_len = int(self.ilabel_lens.max(initial=0))
+
+    @staticmethod
+    def from_graph(phon_graph: PhonetisaurusGraph) -> "CSRGraph":
+        """Convert edge list of a graph to CSR form.
+
+        If the graph has edge_offsets (see fst2npy.py), its edges are used
+        without copying.
+        """
+        edges = phon_graph.edges
+        edge_probs = phon_graph.edge_probs
+        final_nodes = np.asarray(phon_graph.final_nodes)
+
+        if "edge_offsets" in phon_graph.graph:
+            # Edges are already sorted by from node
+            offsets = phon_graph.graph["edge_offsets"]
+            num_nodes = len(offsets) - 1
+        else:
+            num_nodes = (
+                max(
+                    int(edges[:, :2].max(initial=0)),
+                    int(final_nodes.max(initial=0)),
+                    phon_graph.start_node,
+                )
+                + 1
+            )
+
+            # Stable sort keeps edge order within each node
+            edge_order = np.argsort(edges[:, 0], kind="stable")
+            edges = edges[edge_order]
+            edge_probs = edge_probs[edge_order]
+
+            offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(edges[:, 0], minlength=num_nodes), out=offsets[1:])
+
+        node_is_final = np.zeros(num_nodes, dtype=bool)
+        node_is_final[final_nodes] = True
+
+        node_final_probs = np.zeros(num_nodes, dtype=np.float64)
+        node_final_probs[final_nodes] = phon_graph.final_probs
+
+        return CSRGraph(
+            offsets=offsets,
+            to_nodes=edges[:, 1],
+            ilabels=edges[:, 2],
+            olabels=edges[:, 3],
+            edge_probs=edge_probs,
+            node_is_final=node_is_final,
+            node_final_probs=node_final_probs,
+            symbols=phon_graph.symbols,
+            ilabel_ids=phon_graph.ilabel_ids,
+        )
+
+    def word_keys(self, word_ids: typing.Sequence[int]) -> np.ndarray:
+        """Get key of word_ids[i:i + n] at [i, n] (-1 if not an input label)"""
+        num_graphemes = len(word_ids)
+        keys = np.full((num_graphemes + 1, self.max_ilabel_len + 1), -1, dtype=np.int64)
+
+        for start_idx in range(num_graphemes):
+            for num_symbol_graphemes in range(
+                1, min(self.max_ilabel_len, num_graphemes - start_idx) + 1
+            ):
+                key = self.symbol_keys.get(
+                    tuple(word_ids[start_idx : start_idx + num_symbol_graphemes])
+                )
+                if key is not None:
+                    keys[start_idx, num_symbol_graphemes] = key
+
+        return keys
+
+    def history_phonemes(
+        self, history: "_SearchHistory", history_idx: int
+    ) -> typing.Tuple[str, ...]:
+        """Get output phonemes by following history back-pointers"""
+        olabels: typing.List[int] = []
+        parents, labels = history.arrays()
+
+        while history_idx >= 0:
+            olabels.append(int(labels[history_idx]))
+            history_idx = int(parents[history_idx])
+
+        phonemes: typing.List[str] = []
+        for olabel in reversed(olabels):
+            phonemes.extend(self.symbols[olabel][1])
+
+        return tuple(phonemes)
+
+
+# -----------------------------------------------------------------------------
+# Batch guessing
+# -----------------------------------------------------------------------------
+
+# Graph loaded in a worker process (see _init_worker)
+_WORKER_GRAPH: typing.Optional[PhonetisaurusGraph] = None
+
+
+def _init_worker(
+    graph_source: typing.Union[Path, NUMPY_GRAPH], graph_args: typing.Dict[str, bool]
+):
+    """Load graph once per worker process"""
+    global _WORKER_GRAPH
+
+    if isinstance(graph_source, dict):
+        _WORKER_GRAPH = PhonetisaurusGraph(graph_source, **graph_args)
+    else:
+        _WORKER_GRAPH = PhonetisaurusGraph.load(graph_source, **graph_args)
+
+
+def _g2p_worker(
+    words: typing.Sequence[WORD_TYPE], g2p_args: typing.Dict[str, typing.Any]
+) -> typing.Dict[typing.Hashable, GUESSES_TYPE]:
+    """Guess phonemes for words in a worker process"""
+    assert _WORKER_GRAPH is not None, "Worker graph not loaded"
+
+    return {
+        _word_key(word): list(_WORKER_GRAPH.g2p_one(word, **g2p_args))
+        for word in words
+    }
+
+
+def _batch_guesses(
+    pending_batch: typing.Tuple[
+        typing.List[WORD_TYPE], "Future[typing.Dict[typing.Hashable, GUESSES_TYPE]]"
+    ],
+    word_guesses: typing.Dict[typing.Hashable, GUESSES_TYPE],
+) -> typing.Iterable[
+    typing.Tuple[WORD_TYPE, typing.Sequence[str], typing.Sequence[str]]
+]:
+    """Wait for a batch from a worker and yield its guesses in order"""
+    batch, future = pending_batch
+    word_guesses.update(future.result())
+
+    for word in batch:
+        for graphemes, phonemes in word_guesses[_word_key(word)]:
+            yield word, graphemes, list(phonemes)
+
+
+def _batches(
+    words: typing.Iterable[WORD_TYPE], batch_size: int
+) -> typing.Iterable[typing.List[WORD_TYPE]]:
+    """Split words into lists of at most batch_size"""
+    batch: typing.List[WORD_TYPE] = []
+    for word in words:
+        batch.append(word)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _word_key(word: WORD_TYPE) -> typing.Hashable:
+    """Get hashable key for a word or list of graphemes"""
+    if isinstance(word, str):
+        return word
+
+    return tuple(word)
+
+
+# -----------------------------------------------------------------------------
+
+
+class _SearchHistory:
+    """Back-pointers to output labels of search hypotheses"""
+
+    def __init__(self):
+        self.num_items = 0
+        self._parents: typing.List[np.ndarray] = []
+        self._labels: typing.List[np.ndarray] = []
+        self._arrays: typing.Optional[typing.Tuple[np.ndarray, np.ndarray]] = None
+
+    def add(self, parents: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """Add items and return their indexes"""
+        item_idxs = np.arange(self.num_items, self.num_items + len(parents))
+        self.num_items += len(parents)
+        self._parents.append(parents)
+        self._labels.append(labels)
+        self._arrays = None
+
+        return item_idxs
+
+    def arrays(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Get (parents, labels) for all items"""
+        if self._arrays is None:
+            if self._parents:
+                self._arrays = (
+                    np.concatenate(self._parents),
+                    np.concatenate(self._labels),
+                )
+            else:
+                self._arrays = (
+                    np.zeros(0, dtype=np.int64),
+                    np.zeros(0, dtype=np.int64),
+                )
+
+        return self._arrays
+
 
 # -----------------------------------------------------------------------------
 
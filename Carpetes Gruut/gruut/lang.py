@@ -3,20 +3,32 @@
 import logging
 import re
 import sqlite3
+import threading
 import typing
+import unicodedata
+from datetime import datetime
 from pathlib import Path
 
-import networkx as nx
-
 from gruut.const import PHONEMES_TYPE, GraphType, SentenceNode, Time
 from gruut.g2p import GraphemesToPhonemes
-from gruut.phonemize import SqlitePhonemizer
+from gruut.phonemize import ROLE_TO_PHONEMES, MmapPhonemizer, SqlitePhonemizer
 from gruut.pos import PartOfSpeechTagger
+from gruut.registry import MODEL_REGISTRY, ModelRegistry
 from gruut.text_processor import InterpretAsFormat, TextProcessorSettings
-from gruut.utils import find_lang_dir, remove_non_word_chars, resolve_lang
+from gruut.utils import (
+    CacheStats,
+    LRUCache,
+    dfs_preorder_nodes,
+    find_lang_dir,
+    remove_non_word_chars,
+    resolve_lang,
+)
 
 _LOGGER = logging.getLogger("gruut")
 
+# Phonemizer arguments that apply to a compiled lexicon
+MMAP_PHONEMIZER_ARGS = {"word_transform_funcs", "casing_func"}
+
 # -----------------------------------------------------------------------------
 
 
@@ -28,9 +40,21 @@ def get_settings(
     load_pos_tagger: bool = True,
     load_phoneme_lexicon: bool = True,
     load_g2p_guesser: bool = True,
+    phonemizer_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    guesser_args: typing.Optional[typing.Dict[str, typing.Any]] = None,
     **settings_args,
 ) -> TextProcessorSettings:
-    """Get settings for a specific language"""
+    """Get settings for a specific language
+
+    phonemizer_args are passed to the SqlitePhonemizer of the lexicon
+    database (e.g., cache_size, cache_bytes, cache_misses).
+
+    A compiled lexicon.mmap (see lexicon2mmap.py) is used instead of
+    lexicon.db when present.
+
+    guesser_args are passed to DelayedGraphemesToPhonemes (e.g., cache_size,
+    guess_db_path).
+    """
     model_prefix = model_prefix or ""
 
     # Resolve language
@@ -71,17 +95,39 @@ def get_settings(
 
         # Phonemizer
         if load_phoneme_lexicon and ("lookup_phonemes" not in settings_args):
+            lexicon_mmap_path = lang_dir / lang_model_prefix / "lexicon.mmap"
             lexicon_db_path = lang_dir / lang_model_prefix / "lexicon.db"
-            if lexicon_db_path.is_file():
-                # Transformations to apply to words when they can't be found in the lexicon
-                phonemizer_args = {
-                    "word_transform_funcs": [
-                        str.lower,
-                        remove_non_word_chars,
-                        lambda s: remove_non_word_chars(s.lower()),
-                    ],
-                }
 
+            # Transformations to apply to words when they can't be found in the lexicon
+            phonemizer_args = {
+                "word_transform_funcs": [
+                    str.lower,
+                    remove_non_word_chars,
+                    lambda s: remove_non_word_chars(s.lower()),
+                ],
+                **(phonemizer_args or {}),
+            }
+
+            if lexicon_mmap_path.is_file():
+                # Compiled lexicon (see lexicon2mmap.py) is shared between
+                # processes through the page cache, so it has no cache settings.
+                _LOGGER.debug(
+                    "(%s) using compiled phoneme lexicon at %s",
+                    lang,
+                    lexicon_mmap_path,
+                )
+                settings_args["lookup_phonemes"] = DelayedMmapPhonemizer(
+                    lexicon_mmap_path,
+                    **{
+                        arg_name: arg_value
+                        for arg_name, arg_value in phonemizer_args.items()
+                        if arg_name in MMAP_PHONEMIZER_ARGS
+                    },
+                )
+            elif lexicon_db_path.is_file():
+                _LOGGER.debug(
+                    "(%s) using phoneme lexicon database at %s", lang, lexicon_db_path,
+                )
                 settings_args["lookup_phonemes"] = DelayedSqlitePhonemizer(
                     lexicon_db_path, **phonemizer_args
                 )
@@ -97,7 +143,7 @@ def get_settings(
             g2p_model_path = lang_dir / lang_model_prefix / "g2p" / "model.crf"
             if g2p_model_path.is_file():
                 settings_args["guess_phonemes"] = DelayedGraphemesToPhonemes(
-                    g2p_model_path, transform_func=str.lower
+                    g2p_model_path, transform_func=str.lower, **(guesser_args or {})
                 )
 
             else:
@@ -179,6 +225,78 @@ def get_settings(
     return TextProcessorSettings(lang=lang, **settings_args)
 
 
+# -----------------------------------------------------------------------------
+# Dates (day/month/year)
+# -----------------------------------------------------------------------------
+
+# Runs of digits in a word
+DIGITS_PATTERN = re.compile(r"[0-9]+")
+
+# Longest run of digits that dateparser won't take as a Unix timestamp
+MAX_NON_TIMESTAMP_DIGITS = 8
+
+
+def is_maybe_dmy_date(s: str) -> bool:
+    """True if string may be a date for dateparser with strict parsing.
+
+    Words without letters need a day, month, and year (3 runs of digits), or a
+    long run of digits (timestamp). Words with letters are always checked.
+    """
+    digit_runs = DIGITS_PATTERN.findall(s)
+    if not digit_runs:
+        return False
+
+    if (len(digit_runs) >= 3) or any(c.isalpha() for c in s):
+        return True
+
+    return any(len(run) > MAX_NON_TIMESTAMP_DIGITS for run in digit_runs)
+
+
+class DayMonthYearParser:
+    """Parses dates like 12/05/2021, 12.05.21, or 12/maig/2021 without dateparser.
+
+    Returns None for anything else, including impossible dates, so dateparser
+    can be tried instead. Two digit years are 1969-2068, like dateparser.
+    """
+
+    def __init__(self, month_names: typing.Mapping[str, int]):
+        # Lower-cased month name -> month number (1-12)
+        self.month_names = {name.lower(): month for name, month in month_names.items()}
+
+        month_pattern = "|".join(
+            re.escape(name)
+            for name in sorted(self.month_names, key=len, reverse=True)
+        )
+
+        self.pattern = re.compile(
+            r"^([0-9]{1,2})([/.])([0-9]{1,2}"
+            + (f"|{month_pattern}" if month_pattern else "")
+            + r")\2([1-9][0-9]{3}|[0-9]{2})$",
+            re.IGNORECASE,
+        )
+
+    def __call__(self, s: str) -> typing.Optional[datetime]:
+        match = self.pattern.match(s)
+        if match is None:
+            return None
+
+        day_str, _separator, month_str, year_str = match.groups()
+        if month_str.isdigit():
+            month = int(month_str)
+        else:
+            month = self.month_names[month_str.lower()]
+
+        year = int(year_str)
+        if len(year_str) == 2:
+            year += 1900 if year >= 69 else 2000
+
+        try:
+            return datetime(year, month, int(day_str))
+        except ValueError:
+            # Not a real date (e.g., 31/02/2021)
+            return None
+
+
 # -----------------------------------------------------------------------------
 # Arabic (ar, اَلْعَرَبِيَّةُ)
 # -----------------------------------------------------------------------------
@@ -229,6 +347,34 @@ def get_ar_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
 # -----------------------------------------------------------------------------
 
 
+# Month names from dateparser's Catalan data
+CA_PARSE_DATE = DayMonthYearParser(
+    {
+        "gen": 1,
+        "gener": 1,
+        "febr": 2,
+        "febrer": 2,
+        "març": 3,
+        "abr": 4,
+        "abril": 4,
+        "maig": 5,
+        "juny": 6,
+        "jul": 7,
+        "juliol": 7,
+        "ag": 8,
+        "agost": 8,
+        "set": 9,
+        "setembre": 9,
+        "oct": 10,
+        "octubre": 10,
+        "nov": 11,
+        "novembre": 11,
+        "des": 12,
+        "desembre": 12,
+    }
+)
+
+
 def get_ca_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
     """Create settings for Catalan"""
     settings_args = {
@@ -241,6 +387,8 @@ def get_ca_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
         "default_date_format": InterpretAsFormat.DATE_DMY,
         "replacements": [("’", "'")],  # normalize apostrophe
         "post_process_sentence": fr_post_process_sentence,
+        "is_maybe_date": is_maybe_dmy_date,
+        "parse_date": CA_PARSE_DATE,
         **settings_args,
     }
     return TextProcessorSettings(lang="ca_ES", **settings_args)
@@ -450,6 +598,40 @@ def get_de_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
 # -----------------------------------------------------------------------------
 
 
+# Month names from dateparser's Spanish data
+ES_PARSE_DATE = DayMonthYearParser(
+    {
+        "ene": 1,
+        "enero": 1,
+        "feb": 2,
+        "febrero": 2,
+        "mar": 3,
+        "marzo": 3,
+        "abr": 4,
+        "abril": 4,
+        "may": 5,
+        "mayo": 5,
+        "jun": 6,
+        "junio": 6,
+        "jul": 7,
+        "julio": 7,
+        "ago": 8,
+        "agosto": 8,
+        "sept": 9,
+        "septiembre": 9,
+        "setiembre": 9,
+        "sep": 9,
+        "set": 9,
+        "oct": 10,
+        "octubre": 10,
+        "nov": 11,
+        "noviembre": 11,
+        "dic": 12,
+        "diciembre": 12,
+    }
+)
+
+
 def get_es_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
     """Create settings for Spanish"""
     settings_args = {
@@ -461,6 +643,8 @@ def get_es_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
         "default_currency": "EUR",
         "default_date_format": InterpretAsFormat.DATE_DMY,
         "replacements": [("’", "'")],  # normalize apostrophe
+        "is_maybe_date": is_maybe_dmy_date,
+        "parse_date": ES_PARSE_DATE,
         **settings_args,
     }
     return TextProcessorSettings(lang="es_ES", **settings_args)
@@ -514,7 +698,7 @@ def fa_post_process_sentence(
     """Add e̞ for genitive case"""
     from gruut.text_processor import DATA_PROP, WordNode
 
-    for dfs_node in nx.dfs_preorder_nodes(graph, sent_node.node):
+    for dfs_node in dfs_preorder_nodes(graph, sent_node.node):
         if not graph.out_degree(dfs_node) == 0:
             # Only leave
             continue
@@ -562,7 +746,7 @@ def fr_post_process_sentence(
     from gruut.utils import sliding_window
 
     words = []
-    for dfs_node in nx.dfs_preorder_nodes(graph, sent_node.node):
+    for dfs_node in dfs_preorder_nodes(graph, sent_node.node):
         if not graph.out_degree(dfs_node) == 0:
             # Only leave
             continue
@@ -855,70 +1039,315 @@ def get_zh_settings(lang_dir=None, **settings_args) -> TextProcessorSettings:
 
 
 class DelayedGraphemesToPhonemes:
-    """Grapheme to phoneme guesser that loads on first use"""
+    """Grapheme to phoneme guesser that loads on first use
+
+    Guesses are memoized in a bounded cache keyed on (normalized word, model).
+    If guess_db_path is set, guesses are also saved to a SQLite table there
+    so the CRF model doesn't need to be rerun after a restart.
+
+    The model is loaded once per process from registry (default: MODEL_REGISTRY).
+    """
+
+    DEFAULT_CACHE_SIZE = 10000
+
+    # Number of new guesses written before committing to guess_db_path
+    GUESS_DB_COMMIT_INTERVAL = 100
 
     def __init__(
         self,
         model_path: typing.Union[str, Path],
         transform_func: typing.Optional[typing.Callable[[str], str]] = None,
+        cache_size: typing.Optional[int] = DEFAULT_CACHE_SIZE,
+        cache: typing.Optional[LRUCache] = None,
+        guess_db_path: typing.Optional[typing.Union[str, Path]] = None,
+        registry: typing.Optional[ModelRegistry] = None,
         **g2p_args,
     ):
         self.model_path = model_path
         self.g2p: typing.Optional[GraphemesToPhonemes] = None
         self.transform_func = transform_func
         self.g2p_args = g2p_args
+        self.registry = registry or MODEL_REGISTRY
+
+        # (word, model) -> phonemes
+        # A cache may be shared between guessers for different models.
+        if cache is None:
+            cache = LRUCache(max_size=cache_size)
+
+        self.cache = cache
+
+        # Guesses are only valid for the model file that made them
+        model_path = Path(model_path).absolute()
+        self.model_key = str(model_path)
+        if model_path.is_file():
+            self.model_key += f"@{model_path.stat().st_mtime_ns}"
+
+        self.guess_db_path = Path(guess_db_path) if guess_db_path else None
+        self.guess_db: typing.Optional[sqlite3.Connection] = None
+        self.guess_db_lock = threading.RLock()
+        self.num_guess_db_hits = 0
+        self._num_uncommitted = 0
 
     def __call__(
         self, word: str, role: typing.Optional[str] = None
     ) -> typing.Optional[PHONEMES_TYPE]:
+        if self.transform_func is not None:
+            word = self.transform_func(word)
+
+        word = unicodedata.normalize("NFC", word)
+        cache_key = (word, self.model_key)
+
+        phonemes = self.cache.get(cache_key)
+        if phonemes is None:
+            phonemes = self._load_guess(word)
+            if phonemes is None:
+                phonemes = self._get_g2p()(word, normalize=False)
+                self._save_guess(word, phonemes)
+
+            self.cache[cache_key] = phonemes
+
+        # Cached list is not handed out to callers
+        return list(phonemes)
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Hit/miss counters of the guess cache"""
+        return self.cache.stats
+
+    def flush(self):
+        """Commit pending guesses to guess_db_path"""
+        with self.guess_db_lock:
+            if (self.guess_db is not None) and (self._num_uncommitted > 0):
+                self.guess_db.commit()
+                self._num_uncommitted = 0
+
+    def _get_g2p(self) -> GraphemesToPhonemes:
         if self.g2p is None:
-            _LOGGER.debug(
-                "Loading grapheme to phoneme CRF model from %s", self.model_path
-            )
-            self.g2p = GraphemesToPhonemes(self.model_path, **self.g2p_args)
+            if self.g2p_args:
+                _LOGGER.debug(
+                    "Loading grapheme to phoneme CRF model from %s", self.model_path
+                )
+                self.g2p = GraphemesToPhonemes(self.model_path, **self.g2p_args)
+            else:
+                self.g2p = self.registry.get_g2p(self.model_path)
 
         assert self.g2p is not None
+        return self.g2p
+
+    def _get_guess_db(self) -> typing.Optional[sqlite3.Connection]:
+        if (self.guess_db is None) and (self.guess_db_path is not None):
+            _LOGGER.debug("Connecting to guess database at %s", self.guess_db_path)
+            self.guess_db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.guess_db = sqlite3.connect(
+                str(self.guess_db_path), check_same_thread=False
+            )
+            self.guess_db.execute(
+                "CREATE TABLE IF NOT EXISTS g2p_guesses "
+                + "(model TEXT, word TEXT, phonemes TEXT, PRIMARY KEY (model, word));"
+            )
+            self.guess_db.commit()
 
-        if self.transform_func is not None:
-            word = self.transform_func(word)
+        return self.guess_db
+
+    def _load_guess(self, word: str) -> typing.Optional[PHONEMES_TYPE]:
+        with self.guess_db_lock:
+            guess_db = self._get_guess_db()
+            if guess_db is None:
+                return None
+
+            row = guess_db.execute(
+                "SELECT phonemes FROM g2p_guesses WHERE model = ? AND word = ?",
+                (self.model_key, word),
+            ).fetchone()
+
+            if row is None:
+                return None
 
-        return self.g2p(word)
+            self.num_guess_db_hits += 1
+
+        return row[0].split()
+
+    def _save_guess(self, word: str, phonemes: PHONEMES_TYPE):
+        with self.guess_db_lock:
+            guess_db = self._get_guess_db()
+            if guess_db is None:
+                return
+
+            guess_db.execute(
+                "INSERT OR REPLACE INTO g2p_guesses (model, word, phonemes) VALUES (?, ?, ?)",
+                (self.model_key, word, " ".join(phonemes)),
+            )
+
+            self._num_uncommitted += 1
+            if self._num_uncommitted >= self.GUESS_DB_COMMIT_INTERVAL:
+                self.flush()
+
+    def __del__(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
 
 
 class DelayedPartOfSpeechTagger:
-    """POS tagger that loads on first use"""
+    """POS tagger that loads on first use
 
-    def __init__(self, model_path: typing.Union[str, Path], **tagger_args):
+    The model is loaded once per process from registry (default: MODEL_REGISTRY).
+    """
+
+    def __init__(
+        self,
+        model_path: typing.Union[str, Path],
+        registry: typing.Optional[ModelRegistry] = None,
+        **tagger_args,
+    ):
 
         self.model_path = Path(model_path)
         self.tagger: typing.Optional[PartOfSpeechTagger] = None
         self.tagger_args = tagger_args
+        self.registry = registry or MODEL_REGISTRY
 
     def __call__(self, words: typing.Sequence[str]) -> typing.Sequence[str]:
+        return self._get_tagger()(words)
+
+    def tag_many(
+        self, sentences: typing.Iterable[typing.Sequence[str]]
+    ) -> typing.List[typing.Sequence[str]]:
+        """Get POS tags for the words of many sentences at once"""
+        return self._get_tagger().tag_many(sentences)
+
+    def _get_tagger(self) -> PartOfSpeechTagger:
         if self.tagger is None:
-            _LOGGER.debug("Loading part of speech tagger from %s", self.model_path)
-            self.tagger = PartOfSpeechTagger(self.model_path, **self.tagger_args)
+            if self.tagger_args:
+                _LOGGER.debug(
+                    "Loading part of speech tagger from %s", self.model_path
+                )
+                self.tagger = PartOfSpeechTagger(self.model_path, **self.tagger_args)
+            else:
+                self.tagger = self.registry.get_pos_tagger(self.model_path)
 
         assert self.tagger is not None
-        return self.tagger(words)
+        return self.tagger
 
 
 class DelayedSqlitePhonemizer:
-    """Phonemizer that loads on first use"""
+    """Phonemizer that loads on first use
+
+    phonemizer_args are passed to SqlitePhonemizer, including the lexicon
+    cache settings (cache_size, cache_bytes, cache_misses).
 
-    def __init__(self, db_path: typing.Union[str, Path], **phonemizer_args):
+    The database is read through a pool of read-only connections from
+    registry (default: MODEL_REGISTRY), so it can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        db_path: typing.Union[str, Path],
+        registry: typing.Optional[ModelRegistry] = None,
+        **phonemizer_args,
+    ):
 
         self.db_path = Path(db_path)
         self.phonemizer: typing.Optional[SqlitePhonemizer] = None
         self.phonemizer_args = phonemizer_args
+        self.registry = registry or MODEL_REGISTRY
+        self.load_lock = threading.Lock()
+
+    def __call__(
+        self, word: str, role: typing.Optional[str] = None, do_transforms: bool = True
+    ) -> typing.Optional[PHONEMES_TYPE]:
+        phonemizer = self._get_phonemizer()
+        return phonemizer(word, role=role, do_transforms=do_transforms)
+
+    @property
+    def cache_stats(self) -> typing.Optional[CacheStats]:
+        """Lexicon cache counters (None if the database hasn't been loaded yet)"""
+        if self.phonemizer is None:
+            return None
+
+        return self.phonemizer.cache_stats
+
+    def lookup_many(
+        self,
+        words: typing.Sequence[str],
+        roles: typing.Optional[typing.Sequence[typing.Optional[str]]] = None,
+        do_transforms: bool = True,
+    ) -> typing.List[typing.Optional[PHONEMES_TYPE]]:
+        """Look up phonemes for many words with batched queries"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_many(words, roles=roles, do_transforms=do_transforms)
+
+    def lookup_prons(
+        self, word: str, do_transforms: bool = True
+    ) -> typing.Optional[ROLE_TO_PHONEMES]:
+        """Get pronunciations of a word by role (None if not in lexicon)"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_prons(word, do_transforms=do_transforms)
+
+    def lookup_prons_many(
+        self, words: typing.Sequence[str], do_transforms: bool = True
+    ) -> typing.List[typing.Optional[ROLE_TO_PHONEMES]]:
+        """Get pronunciations by role for many words"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_prons_many(words, do_transforms=do_transforms)
+
+    def _get_phonemizer(self) -> SqlitePhonemizer:
+        if self.phonemizer is None:
+            with self.load_lock:
+                if self.phonemizer is None:
+                    _LOGGER.debug("Connecting to lexicon database at %s", self.db_path)
+                    db_pool = self.registry.get_sqlite_pool(self.db_path)
+                    self.phonemizer = SqlitePhonemizer(
+                        db_conn=db_pool, **self.phonemizer_args
+                    )
+
+        assert self.phonemizer is not None
+        return self.phonemizer
+
+
+class DelayedMmapPhonemizer:
+    """Phonemizer for a compiled lexicon (see lexicon2mmap.py) that loads on first use"""
+
+    def __init__(self, lexicon_path: typing.Union[str, Path], **phonemizer_args):
+
+        self.lexicon_path = Path(lexicon_path)
+        self.phonemizer: typing.Optional[MmapPhonemizer] = None
+        self.phonemizer_args = phonemizer_args
 
     def __call__(
         self, word: str, role: typing.Optional[str] = None, do_transforms: bool = True
     ) -> typing.Optional[PHONEMES_TYPE]:
+        phonemizer = self._get_phonemizer()
+        return phonemizer(word, role=role, do_transforms=do_transforms)
+
+    def lookup_many(
+        self,
+        words: typing.Sequence[str],
+        roles: typing.Optional[typing.Sequence[typing.Optional[str]]] = None,
+        do_transforms: bool = True,
+    ) -> typing.List[typing.Optional[PHONEMES_TYPE]]:
+        """Look up phonemes for many words"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_many(words, roles=roles, do_transforms=do_transforms)
+
+    def lookup_prons(
+        self, word: str, do_transforms: bool = True
+    ) -> typing.Optional[ROLE_TO_PHONEMES]:
+        """Get pronunciations of a word by role (None if not in lexicon)"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_prons(word, do_transforms=do_transforms)
+
+    def lookup_prons_many(
+        self, words: typing.Sequence[str], do_transforms: bool = True
+    ) -> typing.List[typing.Optional[ROLE_TO_PHONEMES]]:
+        """Get pronunciations by role for many words"""
+        phonemizer = self._get_phonemizer()
+        return phonemizer.lookup_prons_many(words, do_transforms=do_transforms)
+
+    def _get_phonemizer(self) -> MmapPhonemizer:
         if self.phonemizer is None:
-            _LOGGER.debug("Connecting to lexicon database at %s", self.db_path)
-            db_conn = sqlite3.connect(str(self.db_path))
-            self.phonemizer = SqlitePhonemizer(db_conn=db_conn, **self.phonemizer_args)
+            _LOGGER.debug("Mapping compiled lexicon at %s", self.lexicon_path)
+            self.phonemizer = MmapPhonemizer(self.lexicon_path, **self.phonemizer_args)
 
         assert self.phonemizer is not None
-        return self.phonemizer(word, role=role, do_transforms=do_transforms)
+        return self.phonemizer
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """Converts a text lexicon to a gruut sqlite3 database"""
 import argparse
+import itertools
+import multiprocessing
 import sqlite3
 import sys
+import time
+import typing
+from pathlib import Path
+
+from gruut.phonemize import get_schema_version
 
 # -----------------------------------------------------------------------------
 
@@ -11,15 +18,12 @@ def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(prog="lexicon2db.py")
     parser.add_argument(
-        "--casing",
-        required=True,
-        choices=("keep", "lower", "upper"),
-        help="Casing to apply to words",
+        "--casing", choices=("keep", "lower", "upper"), help="Casing to apply to words",
     )
     parser.add_argument(
         "--lexicon",
-        required=True,
-        help="Text lexicon to read with <WORD> <PHONEME> <PHONEME> ...",
+        nargs="+",
+        help="Text lexicon(s) to read with <WORD> <PHONEME> <PHONEME> ...",
     )
     parser.add_argument("--database", required=True, help="SQLite database to write")
     parser.add_argument(
@@ -30,8 +34,53 @@ def main():
         default="_",
         help="String used to identify empty word role (see --role)",
     )
+    parser.add_argument(
+        "--upgrade",
+        action="store_true",
+        help="Migrate an existing database to the current schema in place",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Disable journaling/syncing and build the primary key after loading (faster)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of rows inserted at a time",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse lexicons (with multiple --lexicon)",
+    )
     args = parser.parse_args()
 
+    if args.upgrade:
+        conn = sqlite3.connect(args.database)
+        from_version = get_schema_version(conn)
+
+        if upgrade_database(conn):
+            print(
+                "Upgraded",
+                args.database,
+                "from schema version",
+                from_version,
+                "to",
+                LEXICON_SCHEMA_VERSION,
+                file=sys.stderr,
+            )
+        else:
+            print(args.database, "is already up to date", file=sys.stderr)
+
+        conn.close()
+        return
+
+    if (not args.lexicon) or (not args.casing):
+        parser.error("--lexicon and --casing are required (unless --upgrade)")
+
     # -------------------------------------------------------------------------
 
     word_casing = None
@@ -44,66 +93,330 @@ def main():
     # -------------------------------------------------------------------------
 
     conn = sqlite3.connect(args.database)
+    start_time = time.perf_counter()
+
+    num_rows = load_lexicons(
+        conn,
+        args.lexicon,
+        word_casing=word_casing,
+        has_role=args.role,
+        empty_role=args.empty_role,
+        bulk=args.bulk,
+        chunk_size=args.chunk_size,
+        num_workers=args.workers,
+        progress_file=sys.stderr,
+    )
+
+    conn.close()
+    report_progress("Wrote", num_rows, start_time, sys.stderr, to=args.database)
+
+
+# -----------------------------------------------------------------------------
+# Loading
+# -----------------------------------------------------------------------------
+
+# Default number of rows per executemany
+DEFAULT_CHUNK_SIZE = 10000
+
+# (word, pron_order, phonemes, role)
+LEXICON_ROW = typing.Tuple[str, int, str, str]
+
+
+def load_lexicons(
+    conn: sqlite3.Connection,
+    lexicon_paths: typing.Sequence[typing.Union[str, Path]],
+    word_casing: typing.Optional[typing.Callable[[str], str]] = None,
+    has_role: bool = False,
+    empty_role: str = "_",
+    bulk: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    num_workers: int = 1,
+    progress_file: typing.Optional[typing.TextIO] = None,
+) -> int:
+    """Re-create lexicon tables and load text lexicons into them.
+
+    Pronunciations of a word are ordered by lexicon, then by line.
+    Lexicons are parsed in separate processes if num_workers > 1 ("-" is stdin).
+
+    Returns the number of pronunciations loaded.
+    """
+    if bulk:
+        # Database is rebuilt from scratch if anything goes wrong
+        set_bulk_pragmas(conn)
 
     # Re-create tables in output
     conn.execute("DROP TABLE IF EXISTS word_phonemes")
     conn.execute("DROP TABLE IF EXISTS g2p_alignments")
+    create_tables(conn)
+    conn.commit()
+
+    read_args = [
+        (str(lexicon_path), word_casing, has_role, empty_role)
+        for lexicon_path in lexicon_paths
+    ]
+
+    if (num_workers > 1) and (len(read_args) > 1) and ("-" not in lexicon_paths):
+        pool = multiprocessing.Pool(processes=min(num_workers, len(read_args)))
+        lexicons_rows: typing.Iterable[typing.Iterable[LEXICON_ROW]] = pool.imap(
+            _read_lexicon_path, read_args
+        )
+    else:
+        pool = None
+        lexicons_rows = (_iter_lexicon_path(*path_args) for path_args in read_args)
+
+    # word -> next pron_order across all lexicons
+    pron_orders: typing.Dict[str, int] = {}
+
+    def renumber_rows(rows: typing.Iterable[LEXICON_ROW]):
+        for word, _pron_order, phonemes_str, role in rows:
+            pron_order = pron_orders.get(word, 0)
+            pron_orders[word] = pron_order + 1
+
+            yield word, pron_order, phonemes_str, role
+
+    # Unordered rows are loaded into a plain table first in bulk mode, then
+    # copied into the clustered table in primary key order.
+    table_name = "word_phonemes_load" if bulk else "word_phonemes"
+    if bulk:
+        conn.execute(
+            f"CREATE TEMPORARY TABLE {table_name} "
+            + "(word TEXT, pron_order INTEGER, phonemes TEXT, role TEXT)"
+        )
+
+    insert_sql = (
+        f"INSERT INTO {table_name} (word, pron_order, phonemes, role) VALUES (?, ?, ?, ?)"
+    )
+
+    num_rows = 0
+    start_time = time.perf_counter()
+
+    try:
+        with conn:
+            for (lexicon_path, *_), rows in zip(read_args, lexicons_rows):
+                lexicon_start_time = time.perf_counter()
+                num_lexicon_rows = insert_rows(
+                    conn, insert_sql, renumber_rows(rows), chunk_size=chunk_size
+                )
+                num_rows += num_lexicon_rows
+
+                if progress_file is not None:
+                    report_progress(
+                        "Loaded",
+                        num_lexicon_rows,
+                        lexicon_start_time,
+                        progress_file,
+                        source=lexicon_path,
+                    )
+
+            if bulk:
+                conn.execute(
+                    "INSERT INTO word_phonemes (word, pron_order, phonemes, role) "
+                    + f"SELECT word, pron_order, phonemes, role FROM {table_name} "
+                    + "ORDER BY word, pron_order"
+                )
+                conn.execute(f"DROP TABLE {table_name}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Update statistics for the query planner
+    conn.execute("ANALYZE")
+
+    if bulk and (progress_file is not None):
+        report_progress("Loaded and indexed", num_rows, start_time, progress_file)
+
+    return num_rows
+
+
+def insert_rows(
+    conn: sqlite3.Connection,
+    insert_sql: str,
+    rows: typing.Iterable[typing.Sequence[typing.Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Insert rows with executemany in chunks (without committing).
+
+    Returns the number of rows inserted.
+    """
+    num_rows = 0
+    rows_iter = iter(rows)
+
+    while True:
+        chunk = list(itertools.islice(rows_iter, chunk_size))
+        if not chunk:
+            break
+
+        conn.executemany(insert_sql, chunk)
+        num_rows += len(chunk)
+
+    return num_rows
+
+
+def set_bulk_pragmas(conn: sqlite3.Connection):
+    """Trade durability for speed while (re-)building a database"""
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+
+def report_progress(
+    action: str,
+    num_rows: int,
+    start_time: float,
+    progress_file: typing.TextIO,
+    source: typing.Optional[str] = None,
+    to: typing.Optional[str] = None,
+):
+    """Print number of rows and rows/sec since start_time"""
+    elapsed_sec = max(time.perf_counter() - start_time, 1e-9)
+    message = [action, num_rows, "row(s)"]
+
+    if source is not None:
+        message.extend(["from", source])
+
+    if to is not None:
+        message.extend(["to", to])
+
+    message.append(f"in {elapsed_sec:.2f} second(s) ({num_rows / elapsed_sec:.0f}/sec)")
+    print(*message, file=progress_file)
+
+
+def _iter_lexicon_path(
+    lexicon_path: str,
+    word_casing: typing.Optional[typing.Callable[[str], str]],
+    has_role: bool,
+    empty_role: str,
+) -> typing.Iterable[LEXICON_ROW]:
+    """Stream rows from a text lexicon file (or stdin)"""
+    if lexicon_path == "-":
+        lexicon_file = sys.stdin
+    else:
+        lexicon_file = open(lexicon_path, "r", encoding="utf-8")
+
+    with lexicon_file:
+        yield from read_lexicon(
+            lexicon_file,
+            word_casing=word_casing,
+            has_role=has_role,
+            empty_role=empty_role,
+        )
+
+
+def _read_lexicon_path(path_args) -> typing.List[LEXICON_ROW]:
+    """Parse an entire text lexicon file (in a worker process)"""
+    return list(_iter_lexicon_path(*path_args))
+
+
+# -----------------------------------------------------------------------------
+# Schema
+# -----------------------------------------------------------------------------
+
+# Stored in PRAGMA user_version.
+#
+# 0 - word_phonemes with autoincrement id and no index
+# 1 - word_phonemes clustered on (word, pron_order)
+LEXICON_SCHEMA_VERSION = 1
+
+
+def create_tables(conn: sqlite3.Connection):
+    """Create lexicon tables with the current schema (if they don't exist)"""
     conn.execute(
         "CREATE TABLE IF NOT EXISTS word_phonemes "
-        + "(id INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT, pron_order INTEGER, phonemes TEXT, role TEXT);"
+        + "(word TEXT NOT NULL, pron_order INTEGER NOT NULL, phonemes TEXT, role TEXT, "
+        + "PRIMARY KEY (word, pron_order)) WITHOUT ROWID;"
     )
     conn.execute(
         "CREATE TABLE IF NOT EXISTS g2p_alignments "
         + "(id INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT, alignment TEXT);"
     )
-    conn.commit()
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS g2p_alignments_word ON g2p_alignments (word);"
+    )
+    conn.execute(f"PRAGMA user_version = {LEXICON_SCHEMA_VERSION}")
 
-    # word -> pron_order
-    pron_orders = {}
 
-    if args.lexicon == "-":
-        lexicon_file = sys.stdin
-    else:
-        lexicon_file = open(args.lexicon, "r", encoding="utf-8")
+def upgrade_database(conn: sqlite3.Connection) -> bool:
+    """Migrate a lexicon database to the current schema in place.
+
+    Returns True if the database was changed.
+    """
+    if get_schema_version(conn) >= LEXICON_SCHEMA_VERSION:
+        return False
 
-    with lexicon_file, conn:
-        for i, line in enumerate(lexicon_file):
-            try:
-                line = line.strip()
-                if (not line) or line.startswith(";") or (" " not in line):
-                    # Skip blank lines and comments.
-                    # Also skip lines without a pronunciation.
-                    continue
+    has_word_phonemes = (
+        conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'word_phonemes'"
+        ).fetchone()[0]
+        > 0
+    )
 
-                role = ""
+    with conn:
+        if has_word_phonemes:
+            conn.execute("ALTER TABLE word_phonemes RENAME TO word_phonemes_old")
 
-                if args.role:
-                    # With role
-                    word, role, phonemes_str = line.split(maxsplit=2)
+        create_tables(conn)
 
-                    if role == args.empty_role:
-                        role = ""
-                    elif ":" not in role:
-                        role = f"gruut:{role}"
-                else:
-                    # Without part of speech
-                    word, phonemes_str = line.split(maxsplit=1)
+        if has_word_phonemes:
+            # Renumber pronunciations in case of duplicate (word, pron_order) rows
+            conn.execute(
+                "INSERT INTO word_phonemes (word, pron_order, phonemes, role) "
+                + "SELECT word, ROW_NUMBER() OVER (PARTITION BY word ORDER BY pron_order, rowid) - 1, "
+                + "phonemes, role FROM word_phonemes_old WHERE word IS NOT NULL"
+            )
+            conn.execute("DROP TABLE word_phonemes_old")
 
-                if word_casing:
-                    word = word_casing(word)
+    # Update statistics for the query planner and reclaim space
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
 
-                pron_order = pron_orders.get(word, 0)
+    return True
 
-                # Don't commit on every word, or it will be terribly slow
-                conn.execute(
-                    "INSERT into word_phonemes (word, pron_order, phonemes, role) VALUES (?, ?, ?, ?)",
-                    (word, pron_order, phonemes_str, role),
-                )
 
-                pron_orders[word] = pron_order + 1
-            except Exception as e:
-                print("Error on line", i + 1, "-", line)
-                raise e
+# -----------------------------------------------------------------------------
+
+
+def read_lexicon(
+    lexicon_file: typing.Iterable[str],
+    word_casing: typing.Optional[typing.Callable[[str], str]] = None,
+    has_role: bool = False,
+    empty_role: str = "_",
+) -> typing.Iterable[typing.Tuple[str, int, str, str]]:
+    """Parse text lexicon lines into (word, pron_order, phonemes, role) tuples"""
+    # word -> pron_order
+    pron_orders: typing.Dict[str, int] = {}
+
+    for i, line in enumerate(lexicon_file):
+        try:
+            line = line.strip()
+            if (not line) or line.startswith(";") or (" " not in line):
+                # Skip blank lines and comments.
+                # Also skip lines without a pronunciation.
+                continue
+
+            role = ""
+
+            if has_role:
+                # With role
+                word, role, phonemes_str = line.split(maxsplit=2)
+
+                if role == empty_role:
+                    role = ""
+                elif ":" not in role:
+                    role = f"gruut:{role}"
+            else:
+                # Without part of speech
+                word, phonemes_str = line.split(maxsplit=1)
+
+            if word_casing:
+                word = word_casing(word)
+
+            pron_order = pron_orders.get(word, 0)
+            pron_orders[word] = pron_order + 1
+        except Exception as e:
+            print("Error on line", i + 1, "-", line)
+            raise e
+
+        yield word, pron_order, phonemes_str, role
 
 
 # -----------------------------------------------------------------------------
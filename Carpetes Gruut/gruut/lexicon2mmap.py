@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Compiles a gruut lexicon into a read-only file that can be memory-mapped"""
+import argparse
+import array
+import sqlite3
+import sys
+import typing
+from pathlib import Path
+
+from gruut.lexicon2db import read_lexicon
+from gruut.phonemize import (
+    MMAP_LEXICON_HEADER,
+    MMAP_LEXICON_MAGIC,
+    MMAP_LEXICON_VERSION,
+)
+
+# (word, pron_order, phonemes, role)
+LEXICON_ROW = typing.Tuple[str, int, str, str]
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(prog="lexicon2mmap.py")
+    parser.add_argument(
+        "--database", help="SQLite lexicon database to read (see lexicon2db.py)"
+    )
+    parser.add_argument(
+        "--lexicon", help="Text lexicon to read with <WORD> <PHONEME> <PHONEME> ...",
+    )
+    parser.add_argument("--output", required=True, help="Compiled lexicon to write")
+    parser.add_argument(
+        "--casing",
+        default="keep",
+        choices=("keep", "lower", "upper"),
+        help="Casing to apply to words (--lexicon only)",
+    )
+    parser.add_argument(
+        "--role",
+        action="store_true",
+        help="Lexicon includes word roles (2nd column, --lexicon only)",
+    )
+    parser.add_argument(
+        "--empty-role",
+        default="_",
+        help="String used to identify empty word role (see --role)",
+    )
+    args = parser.parse_args()
+
+    if bool(args.database) == bool(args.lexicon):
+        parser.error("Exactly one of --database or --lexicon is required")
+
+    # -------------------------------------------------------------------------
+
+    if args.database:
+        conn = sqlite3.connect(args.database)
+        with conn:
+            rows = list(
+                conn.execute(
+                    "SELECT word, pron_order, phonemes, role FROM word_phonemes"
+                )
+            )
+    else:
+        word_casing = None
+
+        if args.casing == "lower":
+            word_casing = str.lower
+        elif args.casing == "upper":
+            word_casing = str.upper
+
+        if args.lexicon == "-":
+            lexicon_file = sys.stdin
+        else:
+            lexicon_file = open(args.lexicon, "r", encoding="utf-8")
+
+        with lexicon_file:
+            rows = list(
+                read_lexicon(
+                    lexicon_file,
+                    word_casing=word_casing,
+                    has_role=args.role,
+                    empty_role=args.empty_role,
+                )
+            )
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "wb") as output_file:
+        num_words = write_mmap_lexicon(rows, output_file)
+
+    print("Wrote", num_words, "word(s) to", output_path, file=sys.stderr)
+
+
+# -----------------------------------------------------------------------------
+
+
+def write_mmap_lexicon(
+    rows: typing.Iterable[LEXICON_ROW], output_file: typing.BinaryIO
+) -> int:
+    """Write (word, pron_order, phonemes, role) rows in the format read by MmapLexicon.
+
+    Returns the number of unique words written.
+    """
+    # word -> [(pron_order, role, phonemes)]
+    word_prons: typing.Dict[bytes, typing.List[typing.Tuple[int, str, bytes]]] = {}
+    for word, pron_order, phonemes, role in rows:
+        word_prons.setdefault(word.encode(), []).append(
+            (pron_order or 0, role or "", phonemes.encode())
+        )
+
+    # Words are sorted by bytes to match the binary search in MmapLexicon
+    sorted_words = sorted(word_prons)
+
+    roles: typing.Dict[str, int] = {}
+    word_offsets = array.array("I", [0])
+    pron_starts = array.array("I", [0])
+    pron_roles = array.array("I")
+    phonemes_offsets = array.array("I", [0])
+
+    word_blob = bytearray()
+    phonemes_blob = bytearray()
+
+    for word_bytes in sorted_words:
+        word_blob.extend(word_bytes)
+        word_offsets.append(len(word_blob))
+
+        for _pron_order, role, phonemes_bytes in sorted(
+            word_prons[word_bytes], key=lambda pron: pron[0]
+        ):
+            pron_roles.append(roles.setdefault(role, len(roles)))
+            phonemes_blob.extend(phonemes_bytes)
+            phonemes_offsets.append(len(phonemes_blob))
+
+        pron_starts.append(len(pron_roles))
+
+    role_offsets = array.array("I", [0])
+    role_blob = bytearray()
+    for role in roles:
+        role_blob.extend(role.encode())
+        role_offsets.append(len(role_blob))
+
+    output_file.write(
+        MMAP_LEXICON_HEADER.pack(
+            MMAP_LEXICON_MAGIC,
+            MMAP_LEXICON_VERSION,
+            len(sorted_words),
+            len(pron_roles),
+            len(roles),
+        )
+    )
+
+    for values in (
+        word_offsets,
+        pron_starts,
+        pron_roles,
+        phonemes_offsets,
+        role_offsets,
+    ):
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        output_file.write(values.tobytes())
+
+    output_file.write(word_blob)
+    output_file.write(phonemes_blob)
+    output_file.write(role_blob)
+
+    return len(sorted_words)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Integer phoneme ids for sentences and packed corpora of them (for TTS training).
+
+A corpus is saved as a .npz file or a directory of .npy files (memory-mapped
+when loaded) with the arrays:
+
+* phoneme_ids - ids of all sentences, one after another
+* offsets - start of each sentence in phoneme_ids, plus the total length
+* symbols - phoneme for each id ("" if unused)
+"""
+import array
+import logging
+import sqlite3
+import typing
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from gruut_ipa import IPA, Phonemes
+
+from gruut.const import Sentence
+
+# -----------------------------------------------------------------------------
+
+_LOGGER = logging.getLogger("gruut.phoneme_ids")
+
+PAD = "_"
+BOS = "^"
+EOS = "$"
+WORD_BREAK = IPA.BREAK_WORD.value
+
+# Symbols at the start of every inventory from a language
+SPECIAL_SYMBOLS = [
+    PAD,
+    BOS,
+    EOS,
+    WORD_BREAK,
+    IPA.BREAK_MINOR.value,
+    IPA.BREAK_MAJOR.value,
+    IPA.STRESS_PRIMARY.value,
+    IPA.STRESS_SECONDARY.value,
+]
+
+ID_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+
+# -----------------------------------------------------------------------------
+
+
+class PhonemeInventory:
+    """Map from phonemes to integer ids.
+
+    Phonemes that aren't in the inventory are split into leading stress/accent
+    marks and the remaining phoneme (e.g., ˈa -> ˈ a). If still unknown, they're
+    given the next id with add_unknown, and dropped otherwise (see
+    unknown_counts). Ids given with add_unknown depend on the order of the
+    input, so it's off by default.
+    """
+
+    def __init__(
+        self,
+        phoneme_ids: typing.Optional[typing.Mapping[str, int]] = None,
+        add_unknown: bool = False,
+    ):
+        self.phoneme_ids: typing.Dict[str, int] = dict(phoneme_ids or {})
+        self.add_unknown = add_unknown
+
+        # Phonemes dropped because they're not in the inventory
+        self.unknown_counts: typing.Counter[str] = Counter()
+
+        # phoneme string -> ids (including split stress)
+        self._ids_cache: typing.Dict[str, typing.Tuple[int, ...]] = {}
+
+    def __len__(self):
+        return len(self.phoneme_ids)
+
+    def __contains__(self, phoneme: str):
+        return phoneme in self.phoneme_ids
+
+    def __getitem__(self, phoneme: str) -> int:
+        return self.phoneme_ids[phoneme]
+
+    @property
+    def num_ids(self) -> int:
+        """One more than the largest id"""
+        return (max(self.phoneme_ids.values()) + 1) if self.phoneme_ids else 0
+
+    @property
+    def symbols(self) -> typing.List[str]:
+        """Phoneme for each id (first phoneme wins, "" for unused ids)"""
+        id_symbols = [""] * self.num_ids
+        for phoneme, phoneme_id in self.phoneme_ids.items():
+            if not id_symbols[phoneme_id]:
+                id_symbols[phoneme_id] = phoneme
+
+        return id_symbols
+
+    def add(self, phoneme: str) -> int:
+        """Get id for phoneme, adding it to the inventory if necessary"""
+        phoneme_id = self.phoneme_ids.get(phoneme)
+        if phoneme_id is None:
+            phoneme_id = self.num_ids
+            self.phoneme_ids[phoneme] = phoneme_id
+            self._ids_cache.clear()
+
+        return phoneme_id
+
+    def ids(self, phoneme: str) -> typing.Tuple[int, ...]:
+        """Ids for a single phoneme (empty if unknown)"""
+        phoneme_ids = self._ids_cache.get(phoneme)
+        if phoneme_ids is not None:
+            return phoneme_ids
+
+        phoneme_id = self.phoneme_ids.get(phoneme)
+        if phoneme_id is not None:
+            phoneme_ids = (phoneme_id,)
+        else:
+            # Split off stress/accents
+            ids_list: typing.List[int] = []
+            base_phoneme = phoneme
+            while base_phoneme and (
+                IPA.is_stress(base_phoneme[0]) or IPA.is_accent(base_phoneme[0])
+            ):
+                stress_id = self.phoneme_ids.get(base_phoneme[0])
+                if stress_id is not None:
+                    ids_list.append(stress_id)
+
+                base_phoneme = base_phoneme[1:]
+
+            base_id = self.phoneme_ids.get(base_phoneme)
+            if (base_id is None) and base_phoneme and self.add_unknown:
+                base_id = self.add(base_phoneme)
+
+            if base_id is not None:
+                ids_list.append(base_id)
+            elif base_phoneme:
+                # Not cached, so unknown phonemes are counted every time
+                self.unknown_counts[base_phoneme] += 1
+                return ()
+
+            phoneme_ids = tuple(ids_list)
+
+        self._ids_cache[phoneme] = phoneme_ids
+        return phoneme_ids
+
+    def extend_sentence_ids(
+        self,
+        ids: "array.array[int]",
+        sentence: Sentence,
+        word_breaks: bool = True,
+        breaks: bool = True,
+        bos_eos: bool = True,
+    ) -> int:
+        """Append ids for a sentence to an array; returns number of ids added.
+
+        A word break id is added between two words that aren't breaks.
+        """
+        start_len = len(ids)
+        if bos_eos:
+            ids.append(self.phoneme_ids[BOS])
+
+        word_break_id = self.phoneme_ids[WORD_BREAK] if word_breaks else None
+        prev_was_word = False
+
+        for word in sentence:
+            if (not word.phonemes) or (word.is_break and (not breaks)):
+                continue
+
+            is_word = not word.is_break
+            if (word_break_id is not None) and is_word and prev_was_word:
+                ids.append(word_break_id)
+
+            for phoneme in word.phonemes:
+                ids.extend(self.ids(phoneme))
+
+            prev_was_word = is_word
+
+        if bos_eos:
+            ids.append(self.phoneme_ids[EOS])
+
+        return len(ids) - start_len
+
+    def sentence_ids(self, sentence: Sentence, **sentence_args) -> np.ndarray:
+        """Get phoneme ids for a sentence as an int32 array"""
+        ids: "array.array[int]" = array.array("i")
+        self.extend_sentence_ids(ids, sentence, **sentence_args)
+
+        return np.array(ids, dtype=ID_DTYPE)
+
+    @staticmethod
+    def from_language(
+        language: str,
+        lang_dir: typing.Optional[typing.Union[str, Path]] = None,
+        add_unknown: bool = False,
+    ) -> "PhonemeInventory":
+        """Create inventory with special symbols, phonemes, and allophones.
+
+        With lang_dir, phonemes from the lexicon and g2p model there are added
+        after (sorted, so ids are the same for any input).
+        """
+        inventory = PhonemeInventory(add_unknown=add_unknown)
+        for symbol in SPECIAL_SYMBOLS:
+            inventory.add(symbol)
+
+        try:
+            lang_phonemes: typing.Optional[Phonemes] = Phonemes.from_language(
+                language
+            )
+        except FileNotFoundError:
+            if lang_dir is None:
+                raise
+
+            _LOGGER.warning("No phonemes for %s in gruut-ipa", language)
+            lang_phonemes = None
+
+        if lang_phonemes is not None:
+            for phoneme in lang_phonemes:
+                inventory.add(phoneme.text)
+
+            for allophone in lang_phonemes.ipa_map:
+                if not allophone.startswith(","):
+                    # Skip raw regexes
+                    inventory.add(allophone)
+
+        if lang_dir is not None:
+            for phoneme in sorted(read_lang_phonemes(lang_dir)):
+                inventory.add(phoneme)
+
+        return inventory
+
+    @staticmethod
+    def from_text(text_file, add_unknown: bool = False) -> "PhonemeInventory":
+        """Load inventory from lines with "phoneme [id]".
+
+        Lines without an id get the next id. The table must have the special
+        symbols that are used (^ $ # by default).
+        """
+        inventory = PhonemeInventory(add_unknown=add_unknown)
+        for line in text_file:
+            parts = line.split()
+            if not parts:
+                continue
+
+            if len(parts) > 1:
+                inventory.phoneme_ids[parts[0]] = int(parts[1])
+            else:
+                inventory.add(parts[0])
+
+        return inventory
+
+    def to_text(self, text_file):
+        """Write inventory as lines with "phoneme id" (see from_text)"""
+        for phoneme, phoneme_id in self.phoneme_ids.items():
+            print(phoneme, phoneme_id, file=text_file)
+
+
+def read_lang_phonemes(lang_dir: typing.Union[str, Path]) -> typing.Set[str]:
+    """Get phonemes of lexicon.db and g2p/model.crf in a language directory.
+
+    Leading stress/accent marks are removed, since they have their own ids.
+    """
+    lang_dir = Path(lang_dir)
+    phonemes: typing.Set[str] = set()
+
+    lexicon_db_path = lang_dir / "lexicon.db"
+    if lexicon_db_path.is_file():
+        _LOGGER.debug("Reading phonemes from %s", lexicon_db_path)
+        conn = sqlite3.connect(str(lexicon_db_path))
+        try:
+            cursor = conn.execute("SELECT DISTINCT phonemes FROM word_phonemes")
+            for (phonemes_str,) in cursor:
+                phonemes.update((phonemes_str or "").split())
+        finally:
+            conn.close()
+
+    g2p_model_path = lang_dir / "g2p" / "model.crf"
+    if g2p_model_path.is_file():
+        from gruut.g2p import GraphemesToPhonemes
+
+        _LOGGER.debug("Reading phonemes from %s", g2p_model_path)
+        g2p = GraphemesToPhonemes(g2p_model_path)
+        for label_phonemes in g2p.decoded_labels.values():
+            phonemes.update(label_phonemes)
+
+    base_phonemes: typing.Set[str] = set()
+    for phoneme in phonemes:
+        while phoneme and (IPA.is_stress(phoneme[0]) or IPA.is_accent(phoneme[0])):
+            phoneme = phoneme[1:]
+
+        if phoneme:
+            base_phonemes.add(phoneme)
+
+    return base_phonemes
+
+
+# -----------------------------------------------------------------------------
+
+
+class PhonemeIdCorpusWriter:
+    """Packs phoneme ids of many sentences into two flat arrays.
+
+    Ids are appended to a typed array, so no Python objects are kept per
+    sentence or phoneme.
+    """
+
+    def __init__(self, inventory: PhonemeInventory, **sentence_args):
+        self.inventory = inventory
+        self.sentence_args = sentence_args
+
+        self.phoneme_ids: "array.array[int]" = array.array("i")
+        self.offsets: "array.array[int]" = array.array("q", [0])
+
+    def __len__(self):
+        """Number of sentences"""
+        return len(self.offsets) - 1
+
+    def add(self, sentence: Sentence) -> int:
+        """Add a sentence; returns its number of ids"""
+        num_ids = self.inventory.extend_sentence_ids(
+            self.phoneme_ids, sentence, **self.sentence_args
+        )
+        self.offsets.append(len(self.phoneme_ids))
+
+        return num_ids
+
+    def add_many(self, sentences: typing.Iterable[Sentence]):
+        """Add many sentences"""
+        for sentence in sentences:
+            self.add(sentence)
+
+    def save(self, corpus_path: typing.Union[str, Path]):
+        """Save as .npz file or directory of .npy files (see PhonemeIdCorpus)"""
+        corpus_path = Path(corpus_path)
+        arrays = {
+            "phoneme_ids": np.array(self.phoneme_ids, dtype=ID_DTYPE),
+            "offsets": np.array(self.offsets, dtype=OFFSET_DTYPE),
+            "symbols": np.array(self.inventory.symbols, dtype=str),
+        }
+
+        if corpus_path.suffix == ".npz":
+            with open(corpus_path, "wb") as npz_file:
+                np.savez(npz_file, **arrays)
+        else:
+            # One .npy file per array, loaded with mmap_mode
+            corpus_path.mkdir(parents=True, exist_ok=True)
+            for array_name, np_array in arrays.items():
+                np.save(corpus_path / f"{array_name}.npy", np_array)
+
+
+class PhonemeIdCorpus:
+    """Sentences of phoneme ids saved by PhonemeIdCorpusWriter"""
+
+    def __init__(
+        self, phoneme_ids: np.ndarray, offsets: np.ndarray, symbols: np.ndarray
+    ):
+        self.phoneme_ids = phoneme_ids
+        self.offsets = offsets
+        self.symbols = symbols
+
+    def __len__(self):
+        """Number of sentences"""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        """Phoneme ids of a sentence"""
+        if idx < 0:
+            idx += len(self)
+
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+
+        return self.phoneme_ids[self.offsets[idx] : self.offsets[idx + 1]]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @staticmethod
+    def load(corpus_path: typing.Union[str, Path]) -> "PhonemeIdCorpus":
+        """Load .npz file or directory of .npy files.
+
+        Arrays in a directory are memory-mapped.
+        """
+        corpus_path = Path(corpus_path)
+
+        if corpus_path.is_dir():
+            arrays = {
+                npy_path.stem: np.load(npy_path, mmap_mode="r")
+                for npy_path in corpus_path.glob("*.npy")
+            }
+        else:
+            arrays = np.load(corpus_path)
+
+        return PhonemeIdCorpus(
+            phoneme_ids=arrays["phoneme_ids"],
+            offsets=arrays["offsets"],
+            symbols=arrays["symbols"],
+        )
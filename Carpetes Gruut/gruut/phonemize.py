@@ -1,11 +1,19 @@
 """Class for getting phonetic pronunciations for tokenized text"""
+import array
 import itertools
 import logging
+import mmap
 import sqlite3
+import struct
+import sys
 import typing
 from pathlib import Path
 
 from gruut.const import PHONEMES_TYPE
+from gruut.utils import CacheStats, LRUCache
+
+if typing.TYPE_CHECKING:
+    from gruut.registry import SqliteConnectionPool
 
 # -----------------------------------------------------------------------------
 
@@ -16,100 +24,591 @@ ROLE_TO_PHONEMES = typing.Dict[str, PHONEMES_TYPE]
 WORD_TRANSFORM_TYPE = typing.Callable[[str], str]
 
 
+# -----------------------------------------------------------------------------
+# Lexicon database schema
+# -----------------------------------------------------------------------------
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get lexicon schema version of a database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def is_lexicon_indexed(conn: sqlite3.Connection) -> bool:
+    """True if word_phonemes can be searched by word without a full table scan"""
+    for index_row in conn.execute("PRAGMA index_list(word_phonemes)").fetchall():
+        index_name = index_row[1]
+        index_columns = [
+            info_row[2]
+            for info_row in conn.execute(f'PRAGMA index_info("{index_name}")')
+        ]
+
+        if index_columns and (index_columns[0] == "word"):
+            return True
+
+    return False
+
+
 # -----------------------------------------------------------------------------
 
 
 class SqlitePhonemizer:
-    """Phonemizes text using a lexicon from a sqlite database"""
+    """Phonemizes text using a lexicon from a sqlite database
+
+    db_conn may also be a SqliteConnectionPool (see registry.py), so the
+    database can be shared between threads.
+    """
 
     DEFAULT_ROLE: str = ""
 
+    # Maximum number of words in a single SELECT ... WHERE word IN (...) query.
+    # Kept below SQLite's default limit on host parameters (999).
+    LOOKUP_BATCH_SIZE: int = 500
+
+    # Default maximum number of cached words (including misses)
+    DEFAULT_CACHE_SIZE: int = 100000
+
     def __init__(
         self,
-        db_conn: sqlite3.Connection,
-        lexicon: typing.Optional[typing.Dict[str, ROLE_TO_PHONEMES]] = None,
+        db_conn: typing.Union[sqlite3.Connection, "SqliteConnectionPool"],
+        lexicon: typing.Optional[typing.MutableMapping[str, ROLE_TO_PHONEMES]] = None,
         g2p_model: typing.Optional[typing.Dict[str, typing.Union[str, Path]]] = None,
         word_transform_funcs: typing.Optional[
             typing.Iterable[WORD_TRANSFORM_TYPE]
         ] = None,
         casing_func: typing.Optional[WORD_TRANSFORM_TYPE] = None,
+        cache_size: typing.Optional[int] = DEFAULT_CACHE_SIZE,
+        cache_bytes: typing.Optional[int] = None,
+        cache_misses: bool = True,
     ):
         self.db_conn = db_conn
 
+        try:
+            if not is_lexicon_indexed(db_conn):
+                db_path = db_conn.execute("PRAGMA database_list").fetchone()[2]
+                _LOGGER.warning(
+                    "Lexicon database %s has no index on word, so lookups will be slow. "
+                    + "Upgrade it with: python3 -m gruut.lexicon2db --upgrade --database %s",
+                    db_path or ":memory:",
+                    db_path or "<DATABASE>",
+                )
+        except sqlite3.Error:
+            _LOGGER.exception("is_lexicon_indexed")
+
         # word -> role -> [phonemes]
-        self.lexicon = lexicon if lexicon is not None else {}
+        if lexicon is None:
+            # Bounded by number of words and/or approximate size in bytes
+            lexicon = LRUCache(
+                max_size=cache_size, max_bytes=cache_bytes, get_size=_lexicon_entry_size
+            )
+
+        self.lexicon = lexicon
+
+        # True if words that aren't in the database should be cached too
+        self.cache_misses = cache_misses
 
         # [functions]
         self.word_transform_funcs = word_transform_funcs or []
 
         self.casing_func = casing_func
 
+    @property
+    def cache_stats(self) -> typing.Optional[CacheStats]:
+        """Hit/miss/eviction counters of the lexicon cache (None if not an LRUCache)"""
+        return getattr(self.lexicon, "stats", None)
+
     def __call__(
         self, word: str, role: typing.Optional[str] = None, do_transforms: bool = True
     ) -> typing.Optional[PHONEMES_TYPE]:
+        role_to_word = self.lookup_prons(word, do_transforms=do_transforms)
+        if role_to_word is None:
+            # Not in lexicon
+            return None
+
+        return phonemes_for_role(role_to_word, role)
+
+    def lookup_prons(
+        self, word: str, do_transforms: bool = True
+    ) -> typing.Optional[ROLE_TO_PHONEMES]:
+        """Get pronunciations of a word by role (None if not in lexicon)"""
         # Look up in cache first
         if self.casing_func is not None:
             word = self.casing_func(word)
 
+        transforms = self.word_transform_funcs if do_transforms else []
         role_to_word = self.lexicon.get(word)
 
-        if role_to_word is not None:
-            if role is not None:
-                # Exact role
-                phonemes = role_to_word.get(role)
-                if phonemes is not None:
-                    return phonemes
+        if role_to_word is _EXACT_WORD_MISSING:
+            if not transforms:
+                # Not in lexicon (transformed words weren't checked)
+                return None
+
+            # Only transformed words are left to check
+            lookup_words = self._lookup_words(word, transforms, skip_exact=True)
+        elif role_to_word is not None:
+            # Empty if not in lexicon (or database) for sure
+            return role_to_word or None
+        else:
+            lookup_words = self._lookup_words(word, transforms)
 
-            # Default role
-            phonemes = role_to_word.get(SqlitePhonemizer.DEFAULT_ROLE)
-            if phonemes is not None:
-                return phonemes
+        for lookup_word in lookup_words:
+            # Load pronunciations for word from database.
+            cursor = self.db_conn.execute(
+                "SELECT role, phonemes FROM word_phonemes WHERE word = ? ORDER BY pron_order",
+                (lookup_word,),
+            )
 
-            # Any role
-            if role_to_word:
-                return next(iter(role_to_word.values()))
+            prons = cursor.fetchall()
+            if prons:
+                # Successfully looked up in the database
+                return self._add_prons(word, lookup_word, prons)
 
-            # Not in lexicon (or database) for sure because role_to_word was present.
-            return None
+        # Not in lexicon
+        self._add_miss(word, transforms)
+
+        return None
+
+    def lookup_many(
+        self,
+        words: typing.Sequence[str],
+        roles: typing.Optional[typing.Sequence[typing.Optional[str]]] = None,
+        do_transforms: bool = True,
+    ) -> typing.List[typing.Optional[PHONEMES_TYPE]]:
+        """Look up phonemes for many words at once.
+
+        Words that are not cached are loaded with a few batched queries
+        (including transformed forms) instead of one query per word.
+        Results are the same as calling the phonemizer on each word.
+        """
+        if roles is None:
+            roles = [None] * len(words)
+
+        assert len(roles) == len(words), "Words and roles must have the same length"
+
+        results: typing.List[typing.Optional[PHONEMES_TYPE]] = []
+        for role_to_word, role in zip(
+            self.lookup_prons_many(words, do_transforms=do_transforms), roles
+        ):
+            if role_to_word is None:
+                # Not in lexicon
+                results.append(None)
+            else:
+                results.append(phonemes_for_role(role_to_word, role))
+
+        return results
 
-        transforms = self.word_transform_funcs
-        if not do_transforms:
-            # No transforms
-            transforms = []
+    def lookup_prons_many(
+        self, words: typing.Sequence[str], do_transforms: bool = True
+    ) -> typing.List[typing.Optional[ROLE_TO_PHONEMES]]:
+        """Get pronunciations by role for many words (see lookup_many)"""
+        if self.casing_func is not None:
+            words = [self.casing_func(word) for word in words]
+
+        transforms = self.word_transform_funcs if do_transforms else []
+
+        # word -> role -> [phonemes] (None if not in lexicon)
+        word_entries: typing.Dict[str, typing.Optional[ROLE_TO_PHONEMES]] = {}
+
+        # word -> [lookup word] for words that need to be loaded from the database
+        missing_words: typing.Dict[str, typing.List[str]] = {}
+
+        for word in words:
+            if (word in word_entries) or (word in missing_words):
+                continue
+
+            role_to_word = self.lexicon.get(word)
+            if role_to_word is _EXACT_WORD_MISSING:
+                if transforms:
+                    missing_words[word] = self._lookup_words(
+                        word, transforms, skip_exact=True
+                    )
+                else:
+                    word_entries[word] = None
+            elif role_to_word is not None:
+                word_entries[word] = role_to_word or None
+            else:
+                missing_words[word] = self._lookup_words(word, transforms)
+
+        if missing_words:
+            # lookup word -> [(role, phonemes)]
+            db_prons = self._select_many(
+                set(itertools.chain.from_iterable(missing_words.values()))
+            )
 
+            for word, lookup_words in missing_words.items():
+                word_entries[word] = None
+
+                # Original word is linked to the first transformed word that
+                # was found in the database (same as __call__).
+                for lookup_word in lookup_words:
+                    prons = db_prons.get(lookup_word)
+                    if prons:
+                        word_entries[word] = self._add_prons(word, lookup_word, prons)
+                        break
+                else:
+                    # Not in lexicon
+                    self._add_miss(word, transforms)
+
+        return [word_entries[word] for word in words]
+
+    def _lookup_words(
+        self,
+        word: str,
+        transforms: typing.Iterable[WORD_TRANSFORM_TYPE],
+        skip_exact: bool = False,
+    ) -> typing.List[str]:
+        """Get unique words to look up in order (word first, then transformed words)"""
+        lookup_words: typing.List[str] = []
         for transform_func in itertools.chain([None], transforms):
             if transform_func is not None:
                 lookup_word = transform_func(word)
             else:
                 # No transform
+                if skip_exact:
+                    continue
+
                 lookup_word = word
 
-            if not lookup_word:
-                continue
+            if lookup_word and (lookup_word not in lookup_words):
+                lookup_words.append(lookup_word)
 
-            # Load pronunciations for word from database.
+        return lookup_words
+
+    def _add_prons(
+        self,
+        word: str,
+        lookup_word: str,
+        prons: typing.Iterable[typing.Tuple[str, str]],
+    ) -> ROLE_TO_PHONEMES:
+        """Cache pronunciations from the database for word and its transformed word"""
+        role_to_word: ROLE_TO_PHONEMES = {}
+        for db_role, db_phonemes in prons:
+            if db_role not in role_to_word:
+                role_to_word[db_role] = db_phonemes.split()
+
+        self.lexicon[word] = role_to_word
+
+        # Link to transformed word
+        self.lexicon[lookup_word] = role_to_word
+
+        return role_to_word
+
+    def _add_miss(self, word: str, transforms: typing.Sequence[WORD_TRANSFORM_TYPE]):
+        """Cache a word that isn't in the database"""
+        if not self.cache_misses:
+            return
+
+        if transforms or (not self.word_transform_funcs):
+            # Not in lexicon for sure, even with transforms
+            self.lexicon[word] = {}
+        else:
+            # Only the exact word is known to be missing
+            self.lexicon[word] = typing.cast(ROLE_TO_PHONEMES, _EXACT_WORD_MISSING)
+
+    def _select_many(
+        self, lookup_words: typing.Iterable[str]
+    ) -> typing.Dict[str, typing.List[typing.Tuple[str, str]]]:
+        """Load (role, phonemes) for words from the database in batches"""
+        # word -> [(role, phonemes)]
+        db_prons: typing.Dict[str, typing.List[typing.Tuple[str, str]]] = {}
+        lookup_words = list(lookup_words)
+
+        for batch_start in range(0, len(lookup_words), self.LOOKUP_BATCH_SIZE):
+            batch = lookup_words[batch_start : batch_start + self.LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
             cursor = self.db_conn.execute(
-                "SELECT role, phonemes FROM word_phonemes WHERE word = ? ORDER BY pron_order",
-                (lookup_word,),
+                "SELECT word, role, phonemes FROM word_phonemes "
+                + f"WHERE word IN ({placeholders}) ORDER BY word, pron_order",
+                batch,
             )
 
-            for row in cursor:
-                if role_to_word is None:
-                    # Create new lexicon entry for original word
-                    role_to_word = {}
-                    self.lexicon[word] = role_to_word
+            for db_word, db_role, db_phonemes in cursor:
+                db_prons.setdefault(db_word, []).append((db_role, db_phonemes))
+
+        return db_prons
 
-                db_role, db_phonemes = row[0], row[1].split()
 
-                if db_role not in role_to_word:
-                    role_to_word[db_role] = db_phonemes
+# -----------------------------------------------------------------------------
+# Memory-mapped lexicon
+# -----------------------------------------------------------------------------
 
-            if role_to_word is not None:
-                # Link to transformed word
-                self.lexicon[lookup_word] = self.lexicon[word]
+# File layout (little endian, see lexicon2mmap.py):
+#
+# header: magic, version, num_words, num_prons, num_roles
+# uint32[num_words + 1]  word_offsets (into word blob)
+# uint32[num_words + 1]  pron_starts (into pronunciations, grouped by word)
+# uint32[num_prons]      pron_roles (index into roles)
+# uint32[num_prons + 1]  phonemes_offsets (into phonemes blob)
+# uint32[num_roles + 1]  role_offsets (into role blob)
+# word blob, phonemes blob, role blob (UTF-8)
+#
+# Words are unique and sorted by their UTF-8 bytes, so they can be found
+# with a binary search directly in the mapped file.
+MMAP_LEXICON_MAGIC = b"GRUUTLEX"
+MMAP_LEXICON_VERSION = 1
+MMAP_LEXICON_HEADER = struct.Struct("<8sIIII")
 
-                # Successfully looked up in the database
-                return self(word, role=role)
+
+class MmapLexicon:
+    """Read-only lexicon in a memory-mapped file created by lexicon2mmap.py
+
+    The file is never copied into Python objects, so processes that map the
+    same file share a single copy in the operating system's page cache.
+    """
+
+    def __init__(self, lexicon_path: typing.Union[str, Path]):
+        self.lexicon_path = Path(lexicon_path)
+
+        with open(self.lexicon_path, "rb") as lexicon_file:
+            self._mmap = mmap.mmap(lexicon_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._data = memoryview(self._mmap)
+
+        magic, version, num_words, num_prons, num_roles = MMAP_LEXICON_HEADER.unpack_from(
+            self._data, 0
+        )
+        if magic != MMAP_LEXICON_MAGIC:
+            raise ValueError(f"Not a gruut lexicon file: {self.lexicon_path}")
+
+        if version != MMAP_LEXICON_VERSION:
+            raise ValueError(
+                f"Unsupported lexicon version {version} in {self.lexicon_path} (expected {MMAP_LEXICON_VERSION})"
+            )
+
+        self.num_words = num_words
+        self.num_prons = num_prons
+        self.num_roles = num_roles
+
+        offset = MMAP_LEXICON_HEADER.size
+        self._word_offsets, offset = self._uint32_array(offset, num_words + 1)
+        self._pron_starts, offset = self._uint32_array(offset, num_words + 1)
+        self._pron_roles, offset = self._uint32_array(offset, num_prons)
+        self._phonemes_offsets, offset = self._uint32_array(offset, num_prons + 1)
+        self._role_offsets, offset = self._uint32_array(offset, num_roles + 1)
+
+        self._word_blob = self._data[offset : offset + self._word_offsets[-1]]
+        offset += self._word_offsets[-1]
+
+        self._phonemes_blob = self._data[offset : offset + self._phonemes_offsets[-1]]
+        offset += self._phonemes_offsets[-1]
+
+        # Roles are few, so they're decoded once
+        role_blob = bytes(self._data[offset : offset + self._role_offsets[-1]])
+        self.roles = [
+            role_blob[self._role_offsets[i] : self._role_offsets[i + 1]].decode()
+            for i in range(num_roles)
+        ]
+
+    def __len__(self) -> int:
+        return self.num_words
+
+    def __contains__(self, word: str) -> bool:
+        return self.find(word) >= 0
+
+    def find(self, word: str) -> int:
+        """Get index of word or -1 if it's not in the lexicon"""
+        word_bytes = word.encode()
+        word_offsets = self._word_offsets
+        word_blob = self._word_blob
+
+        low, high = 0, self.num_words
+        while low < high:
+            mid = (low + high) // 2
+            # Only the candidate word is copied out of the map
+            mid_bytes = bytes(word_blob[word_offsets[mid] : word_offsets[mid + 1]])
+            if mid_bytes < word_bytes:
+                low = mid + 1
+            else:
+                high = mid
+
+        if (low < self.num_words) and (
+            word_blob[word_offsets[low] : word_offsets[low + 1]] == word_bytes
+        ):
+            return low
+
+        return -1
+
+    def prons(self, word: str) -> typing.List[typing.Tuple[str, str]]:
+        """Get (role, phonemes) for word in pronunciation order"""
+        word_idx = self.find(word)
+        if word_idx < 0:
+            return []
+
+        prons: typing.List[typing.Tuple[str, str]] = []
+        for pron_idx in range(
+            self._pron_starts[word_idx], self._pron_starts[word_idx + 1]
+        ):
+            phonemes_bytes = self._phonemes_blob[
+                self._phonemes_offsets[pron_idx] : self._phonemes_offsets[pron_idx + 1]
+            ]
+            prons.append(
+                (self.roles[self._pron_roles[pron_idx]], str(phonemes_bytes, "utf-8"))
+            )
+
+        return prons
+
+    def close(self):
+        """Release the memory map"""
+        self._word_blob.release()
+        self._phonemes_blob.release()
+        for values in (
+            self._word_offsets,
+            self._pron_starts,
+            self._pron_roles,
+            self._phonemes_offsets,
+            self._role_offsets,
+        ):
+            if isinstance(values, memoryview):
+                values.release()
+
+        self._data.release()
+        self._mmap.close()
+
+    def _uint32_array(
+        self, offset: int, length: int
+    ) -> typing.Tuple[typing.Sequence[int], int]:
+        """Get zero-copy view of a uint32 array and the offset after it"""
+        end_offset = offset + (4 * length)
+        array_bytes = self._data[offset:end_offset]
+
+        if sys.byteorder != "little":
+            # Values must be swapped, so a copy is unavoidable
+            values = array.array("I", array_bytes)
+            values.byteswap()
+            return values, end_offset
+
+        return array_bytes.cast("I"), end_offset
+
+
+class MmapPhonemizer:
+    """Phonemizes text using a memory-mapped lexicon (see lexicon2mmap.py)
+
+    Behaves like SqlitePhonemizer, but has no per-process cache.
+    """
+
+    def __init__(
+        self,
+        lexicon: typing.Union[str, Path, MmapLexicon],
+        word_transform_funcs: typing.Optional[
+            typing.Iterable[WORD_TRANSFORM_TYPE]
+        ] = None,
+        casing_func: typing.Optional[WORD_TRANSFORM_TYPE] = None,
+    ):
+        if isinstance(lexicon, MmapLexicon):
+            self.lexicon = lexicon
+        else:
+            self.lexicon = MmapLexicon(lexicon)
+
+        # [functions]
+        self.word_transform_funcs = list(word_transform_funcs or [])
+
+        self.casing_func = casing_func
+
+    def __call__(
+        self, word: str, role: typing.Optional[str] = None, do_transforms: bool = True
+    ) -> typing.Optional[PHONEMES_TYPE]:
+        role_to_word = self.lookup_prons(word, do_transforms=do_transforms)
+        if role_to_word is None:
+            # Not in lexicon
+            return None
+
+        return phonemes_for_role(role_to_word, role)
+
+    def lookup_prons(
+        self, word: str, do_transforms: bool = True
+    ) -> typing.Optional[ROLE_TO_PHONEMES]:
+        """Get pronunciations of a word by role (None if not in lexicon)"""
+        if self.casing_func is not None:
+            word = self.casing_func(word)
+
+        transforms = self.word_transform_funcs if do_transforms else []
+
+        for transform_func in itertools.chain([None], transforms):
+            if transform_func is not None:
+                lookup_word = transform_func(word)
+            else:
+                # No transform
+                lookup_word = word
+
+            if not lookup_word:
+                continue
+
+            prons = self.lexicon.prons(lookup_word)
+            if prons:
+                role_to_word: ROLE_TO_PHONEMES = {}
+                for lex_role, lex_phonemes in prons:
+                    if lex_role not in role_to_word:
+                        role_to_word[lex_role] = lex_phonemes.split()
+
+                return role_to_word
 
         # Not in lexicon
         return None
+
+    def lookup_many(
+        self,
+        words: typing.Sequence[str],
+        roles: typing.Optional[typing.Sequence[typing.Optional[str]]] = None,
+        do_transforms: bool = True,
+    ) -> typing.List[typing.Optional[PHONEMES_TYPE]]:
+        """Look up phonemes for many words (see SqlitePhonemizer.lookup_many)"""
+        if roles is None:
+            roles = [None] * len(words)
+
+        assert len(roles) == len(words), "Words and roles must have the same length"
+
+        return [
+            self(word, role=role, do_transforms=do_transforms)
+            for word, role in zip(words, roles)
+        ]
+
+    def lookup_prons_many(
+        self, words: typing.Sequence[str], do_transforms: bool = True
+    ) -> typing.List[typing.Optional[ROLE_TO_PHONEMES]]:
+        """Get pronunciations by role for many words"""
+        return [self.lookup_prons(word, do_transforms=do_transforms) for word in words]
+
+
+# -----------------------------------------------------------------------------
+
+
+def phonemes_for_role(
+    role_to_word: ROLE_TO_PHONEMES, role: typing.Optional[str] = None
+) -> typing.Optional[PHONEMES_TYPE]:
+    """Pick pronunciation for a role (exact, then default, then any)"""
+    if role is not None:
+        # Exact role
+        phonemes = role_to_word.get(role)
+        if phonemes is not None:
+            return phonemes
+
+    # Default role
+    phonemes = role_to_word.get(SqlitePhonemizer.DEFAULT_ROLE)
+    if phonemes is not None:
+        return phonemes
+
+    # Any role
+    if role_to_word:
+        return next(iter(role_to_word.values()))
+
+    # Not in lexicon (or database) for sure because role_to_word was present.
+    return None
+
+
+# -----------------------------------------------------------------------------
+
+# Cached for words whose exact form is not in the database, but whose
+# transformed forms have not been checked yet.
+_EXACT_WORD_MISSING = object()
+
+
+def _lexicon_entry_size(word: str, role_to_phonemes: typing.Any) -> int:
+    """Approximate size of a cached lexicon entry in bytes"""
+    size = sys.getsizeof(word)
+    if isinstance(role_to_phonemes, dict):
+        size += sys.getsizeof(role_to_phonemes)
+        for role, phonemes in role_to_phonemes.items():
+            size += sys.getsizeof(role) + sys.getsizeof(phonemes)
+            size += sum(sys.getsizeof(p) for p in phonemes)
+
+    return size
@@ -33,6 +33,7 @@ import logging
 import os
 import string
 import sys
+import threading
 import time
 import typing
 from pathlib import Path
@@ -62,10 +63,33 @@ class PartOfSpeechTagger:
             self.crf_tagger = pycrfsuite.Tagger()
             self.crf_tagger.open(str(crf_tagger))
 
+        # Tagger keeps the current item sequence, so it can be shared between
+        # threads only one sequence at a time.
+        self.tag_lock = threading.Lock()
+
     def __call__(self, words: typing.Sequence[str]) -> typing.Sequence[str]:
         """Returns POS tag for each word"""
         features = PartOfSpeechTagger.sent2features(words)
-        return self.crf_tagger.tag(features)
+        with self.tag_lock:
+            return self.crf_tagger.tag(features)
+
+    def tag_many(
+        self, sentences: typing.Iterable[typing.Sequence[str]]
+    ) -> typing.List[typing.Sequence[str]]:
+        """Returns POS tags for the words of many sentences.
+
+        Features are computed for all sentences before the tagger is locked
+        once for the whole batch.
+        """
+        sentences_features = [
+            PartOfSpeechTagger.sent2features(words) for words in sentences
+        ]
+
+        with self.tag_lock:
+            return [
+                self.crf_tagger.tag(features) if features else []
+                for features in sentences_features
+            ]
 
     @staticmethod
     def local_features(
@@ -147,14 +171,64 @@ class PartOfSpeechTagger:
 
     @staticmethod
     def sent2features(
-        sentence: typing.Sequence[str], **kwargs
+        sentence: typing.Sequence[str],
+        add_bos: bool = True,
+        add_eos: bool = True,
+        words_backward: int = 2,
+        words_forward: int = 2,
+        **kwargs,
     ) -> typing.List[FEATURES_TYPE]:
-        """Get features for all words in a sentence"""
-        return [
-            PartOfSpeechTagger.word2features(sentence, i, **kwargs)
-            for i in range(len(sentence))
+        """Get features for all words in a sentence (same as word2features).
+
+        Local features are computed once per word, and reused with a position
+        prefix (e.g., -1:word) as context features of the surrounding words.
+        """
+        num_words = len(sentence)
+        word_features = [
+            PartOfSpeechTagger.local_features(word, **kwargs) for word in sentence
         ]
 
+        if not word_features:
+            return []
+
+        # Every word has the same feature names, so prefixed names are only
+        # created once per position.
+        feature_names = list(word_features[0])
+        word_values = [list(features.values()) for features in word_features]
+
+        # prefix -> [prefixed feature name]
+        prefixed_names: typing.Dict[str, typing.List[str]] = {}
+
+        def add_context(features: FEATURES_TYPE, prefix: str, j: int):
+            names = prefixed_names.get(prefix)
+            if names is None:
+                names = [f"{prefix}{name}" for name in feature_names]
+                prefixed_names[prefix] = names
+
+            features.update(zip(names, word_values[j]))
+
+        sentence_features: typing.List[FEATURES_TYPE] = []
+        for i in range(num_words):
+            features = dict(word_features[i])
+
+            if (i == 0) and add_bos:
+                features["BOS"] = True
+
+            if (i == (num_words - 1)) and add_eos:
+                features["EOS"] = True
+
+            for j in range(1, words_backward + 1):
+                if i >= j:
+                    add_context(features, f"-{j}:", i - j)
+
+            for j in range(1, words_forward + 1):
+                if i < (num_words - j):
+                    add_context(features, f"+{j}:", i + j)
+
+            sentence_features.append(features)
+
+        return sentence_features
+
     @staticmethod
     def encode_string(s: str) -> str:
         """Encodes string in a form that crfsuite will accept (ASCII) and can be decoded"""
@@ -314,28 +388,34 @@ def do_test(args):
 
     _LOGGER.debug("Testing file (%s)", args.conllu)
 
+    with open(args.conllu, "r", encoding="utf-8") as conllu_file:
+        test_sents = conllu.parse(conllu_file.read())
+
+    sents_words = [[token["form"] for token in sent] for sent in test_sents]
+
+    start_time = time.perf_counter()
+    sents_labels = tagger.tag_many(sents_words)
+    tag_seconds = time.perf_counter() - start_time
+
     num_sentences = 0
     num_words = 0
     sents_with_errors = 0
     total_errors = 0
-    with open(args.conllu, "r", encoding="utf-8") as conllu_file:
-        for sent in conllu.parse(conllu_file.read()):
-            words = [token["form"] for token in sent]
-            actual_labels = [token.get(args.label) for token in sent]
-            expected_labels = tagger(words)
+    for sent, expected_labels in zip(test_sents, sents_labels):
+        actual_labels = [token.get(args.label) for token in sent]
 
-            had_error = False
-            for actual, expected in zip(actual_labels, expected_labels):
-                if actual != expected:
-                    total_errors += 1
-                    had_error = True
+        had_error = False
+        for actual, expected in zip(actual_labels, expected_labels):
+            if actual != expected:
+                total_errors += 1
+                had_error = True
 
-                num_words += 1
+            num_words += 1
 
-            if had_error:
-                sents_with_errors += 1
+        if had_error:
+            sents_with_errors += 1
 
-            num_sentences += 1
+        num_sentences += 1
 
     if (num_sentences < 1) or (num_words < 1):
         return
@@ -350,6 +430,14 @@ def do_test(args):
             sents_with_errors, num_sentences, sents_with_errors / num_sentences
         )
     )
+    print(
+        "Tagged {0} word(s) in {1:0.2f} second(s) ({2:0.0f} word(s)/sec, {3:0.0f} sentence(s)/sec)".format(
+            num_words,
+            tag_seconds,
+            num_words / tag_seconds if tag_seconds > 0 else 0,
+            num_sentences / tag_seconds if tag_seconds > 0 else 0,
+        )
+    )
 
 
 # -----------------------------------------------------------------------------
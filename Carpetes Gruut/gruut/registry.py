@@ -0,0 +1,191 @@
+"""Process-wide registry of models that are loaded once and shared between threads"""
+import logging
+import queue
+import sqlite3
+import threading
+import typing
+from pathlib import Path
+
+from gruut.g2p import GraphemesToPhonemes
+from gruut.pos import PartOfSpeechTagger
+
+if typing.TYPE_CHECKING:
+    from gruut.g2p_phonetisaurus import PhonetisaurusGraph
+
+# -----------------------------------------------------------------------------
+
+_LOGGER = logging.getLogger("gruut.registry")
+
+# -----------------------------------------------------------------------------
+
+
+class FetchedRows:
+    """Rows of a query that was run on a pooled connection (cursor-like)"""
+
+    def __init__(self, rows: typing.List[typing.Any]):
+        self.rows = rows
+
+    def fetchone(self) -> typing.Optional[typing.Any]:
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self) -> typing.List[typing.Any]:
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class SqliteConnectionPool:
+    """Pool of read-only connections to a SQLite database.
+
+    Connections are opened with mode=ro and immutable=1 (no locking or change
+    detection), and may be used from any thread. The database must not be
+    modified while it's open; a rebuilt file gets a new pool from the
+    registry because its modification time changes.
+    """
+
+    DEFAULT_MAX_IDLE = 8
+
+    def __init__(
+        self, db_path: typing.Union[str, Path], max_idle: int = DEFAULT_MAX_IDLE
+    ):
+        self.db_path = Path(db_path).absolute()
+        self.db_uri = self.db_path.as_uri() + "?mode=ro&immutable=1"
+
+        # Connections that aren't being used right now
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(
+            maxsize=max_idle
+        )
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new read-only connection"""
+        return sqlite3.connect(self.db_uri, uri=True, check_same_thread=False)
+
+    def execute(
+        self, sql: str, parameters: typing.Sequence[typing.Any] = ()
+    ) -> FetchedRows:
+        """Run a query on an idle connection and fetch all of its rows"""
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+
+        try:
+            rows = conn.execute(sql, parameters).fetchall()
+        finally:
+            try:
+                self.idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+        return FetchedRows(rows)
+
+    def close(self):
+        """Close idle connections"""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# -----------------------------------------------------------------------------
+
+
+class ModelRegistry:
+    """Loads models once per process and shares them between threads.
+
+    Models are keyed by kind, absolute path, and file modification time, so
+    different languages and model prefixes never share an entry.
+    """
+
+    def __init__(self):
+        self.models: typing.Dict[typing.Tuple[str, ...], typing.Any] = {}
+        self.lock = threading.Lock()
+
+        # key -> lock held while the model is loading
+        self.load_locks: typing.Dict[typing.Tuple[str, ...], threading.Lock] = {}
+
+    def get_pos_tagger(
+        self, model_path: typing.Union[str, Path]
+    ) -> PartOfSpeechTagger:
+        """Shared part of speech tagger for a CRF model"""
+        return self._get("pos", model_path, PartOfSpeechTagger)
+
+    def get_g2p(self, model_path: typing.Union[str, Path]) -> GraphemesToPhonemes:
+        """Shared grapheme to phoneme tagger for a CRF model"""
+        return self._get("g2p", model_path, GraphemesToPhonemes)
+
+    def get_phonetisaurus_graph(
+        self, graph_path: typing.Union[str, Path], **graph_args
+    ) -> "PhonetisaurusGraph":
+        """Shared Phonetisaurus graph (.npz file or directory of .npy files)"""
+        from gruut.g2p_phonetisaurus import PhonetisaurusGraph
+
+        return self._get(
+            "phonetisaurus",
+            graph_path,
+            lambda path: PhonetisaurusGraph.load(path, **graph_args),
+            *(f"{k}={v}" for k, v in sorted(graph_args.items())),
+        )
+
+    def get_sqlite_pool(
+        self, db_path: typing.Union[str, Path]
+    ) -> SqliteConnectionPool:
+        """Shared pool of read-only connections to a SQLite database"""
+        return self._get("sqlite", db_path, SqliteConnectionPool)
+
+    def clear(self):
+        """Forget all models (shared objects stay usable by their holders)"""
+        with self.lock:
+            for model in self.models.values():
+                if isinstance(model, SqliteConnectionPool):
+                    model.close()
+
+            self.models.clear()
+            self.load_locks.clear()
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def _get(
+        self,
+        kind: str,
+        path: typing.Union[str, Path],
+        load: typing.Callable[[Path], typing.Any],
+        *extra_key: str,
+    ) -> typing.Any:
+        path = Path(path).absolute()
+        key = (kind, str(path), str(_mtime_ns(path))) + extra_key
+
+        with self.lock:
+            model = self.models.get(key)
+            if model is not None:
+                return model
+
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads each model, without blocking other models
+        with load_lock:
+            with self.lock:
+                model = self.models.get(key)
+
+            if model is None:
+                _LOGGER.debug("Loading %s model from %s", kind, path)
+                model = load(path)
+
+                with self.lock:
+                    self.models[key] = model
+
+        return model
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+# Registry used by default
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,137 @@
+"""Fast JSON encoding of sentences/words and a buffered JSON lines writer.
+
+Sentences are converted to dictionaries without dataclasses.asdict, which
+deep-copies every word. orjson is used to encode JSON when it's installed
+(compact output), and json otherwise (same output as jsonlines).
+"""
+import dataclasses
+import json
+import typing
+
+from gruut.const import Sentence, Word
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# -----------------------------------------------------------------------------
+
+SENTENCE_FIELDS: typing.Tuple[str, ...] = tuple(
+    f.name for f in dataclasses.fields(Sentence)
+)
+WORD_FIELDS: typing.Tuple[str, ...] = tuple(f.name for f in dataclasses.fields(Word))
+
+_JSON_ENCODE = json.JSONEncoder(ensure_ascii=False).encode
+
+# -----------------------------------------------------------------------------
+
+
+def dumps(obj: typing.Any) -> str:
+    """Encode object as a line of JSON (with orjson if available)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+
+    return _JSON_ENCODE(obj)
+
+
+class SentenceEncoder:
+    """Encodes sentences as dictionaries or JSON with a subset of fields.
+
+    Fields may be from Sentence or Word (e.g., text,phonemes). Word fields are
+    output under "words", and "text" selects the text of both.
+    """
+
+    def __init__(self, fields: typing.Optional[typing.Iterable[str]] = None):
+        self.sentence_fields = SENTENCE_FIELDS
+        self.word_fields = WORD_FIELDS
+        self.all_fields = fields is None
+
+        if fields is not None:
+            fields = set(fields)
+            unknown_fields = fields - set(SENTENCE_FIELDS) - set(WORD_FIELDS)
+            if unknown_fields:
+                raise ValueError(f"Unknown field(s): {sorted(unknown_fields)}")
+
+            self.word_fields = tuple(f for f in WORD_FIELDS if f in fields)
+            if self.word_fields:
+                fields.add("words")
+            elif "words" in fields:
+                self.word_fields = WORD_FIELDS
+
+            self.sentence_fields = tuple(f for f in SENTENCE_FIELDS if f in fields)
+
+    def to_dict(self, sentence: Sentence) -> typing.Dict[str, typing.Any]:
+        """Convert sentence to a dictionary (values are not copied)"""
+        sentence_dict = {name: getattr(sentence, name) for name in self.sentence_fields}
+
+        if "words" in sentence_dict:
+            word_fields = self.word_fields
+            sentence_dict["words"] = [
+                {name: getattr(word, name) for name in word_fields}
+                for word in sentence.words
+            ]
+
+        return sentence_dict
+
+    def encode(
+        self,
+        sentence: Sentence,
+        extra: typing.Optional[typing.Mapping[str, typing.Any]] = None,
+    ) -> str:
+        """Encode sentence as a line of JSON with optional extra keys"""
+        if (orjson is not None) and self.all_fields and (not extra):
+            # orjson encodes dataclasses itself
+            return orjson.dumps(sentence).decode("utf-8")
+
+        sentence_dict = self.to_dict(sentence)
+        if extra:
+            sentence_dict.update(extra)
+
+        return dumps(sentence_dict)
+
+
+# -----------------------------------------------------------------------------
+
+
+class JsonLinesWriter:
+    """Writes lines of JSON to a text file in batches.
+
+    Lines are written and the file is flushed after every flush_every lines
+    (only on flush/close if 0).
+    """
+
+    def __init__(self, out_file: typing.TextIO, flush_every: int = 1):
+        self.out_file = out_file
+        self.flush_every = flush_every
+        self.lines: typing.List[str] = []
+
+    def write_line(self, line: str):
+        """Write an encoded line of JSON"""
+        self.lines.append(line)
+
+        if (self.flush_every > 0) and (len(self.lines) >= self.flush_every):
+            self.flush()
+
+    def write(self, obj: typing.Any):
+        """Encode object as JSON and write it"""
+        self.write_line(dumps(obj))
+
+    def flush(self):
+        """Write buffered lines and flush the file"""
+        if self.lines:
+            self.lines.append("")
+            self.out_file.write("\n".join(self.lines))
+            self.lines.clear()
+
+        self.out_file.flush()
+
+    def close(self):
+        """Write buffered lines (file is not closed)"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
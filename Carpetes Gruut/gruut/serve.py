@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""Long-running gruut server that processes JSONL requests with preloaded models.
+
+Start with: python3 -m gruut serve --language ca [--socket /tmp/gruut.sock]
+
+Each request is a JSON object on one line with the arguments of gruut.sentences:
+
+    {"id": 1, "text": "Hola món.", "lang": "ca"}
+
+and gets a response on one line with the same id:
+
+    {"id": 1, "sentences": [...]}
+
+or {"id": 1, "error": "..."} if processing failed. Clients may send many
+requests without waiting; responses are written in request order for each
+connection. A {"stats": true} request returns latency histograms.
+"""
+import argparse
+import asyncio
+import bisect
+import dataclasses
+import json
+import logging
+import os
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import gruut
+from gruut.serialize import SentenceEncoder
+
+_LOGGER = logging.getLogger("gruut.serve")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5002
+
+# Upper bounds of latency histogram buckets (milliseconds)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Maximum number of requests from one client that are waiting for a response
+MAX_PENDING_REQUESTS = 256
+
+# Maximum length of a single request line
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+# -----------------------------------------------------------------------------
+
+
+@dataclasses.dataclass
+class LatencyHistogram:
+    """Counts of latencies in buckets (see LATENCY_BUCKETS_MS)"""
+
+    bucket_bounds_ms: typing.Sequence[float] = LATENCY_BUCKETS_MS
+    counts: typing.List[int] = dataclasses.field(default_factory=list)
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def __post_init__(self):
+        if not self.counts:
+            # Last bucket is for anything above the largest bound
+            self.counts = [0] * (len(self.bucket_bounds_ms) + 1)
+
+    @property
+    def num_samples(self) -> int:
+        """Total number of latencies recorded"""
+        return sum(self.counts)
+
+    def add(self, latency_ms: float):
+        """Record a latency"""
+        self.counts[bisect.bisect_left(self.bucket_bounds_ms, latency_ms)] += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """Get histogram as a JSON-compatible dict"""
+        num_samples = self.num_samples
+        buckets = {
+            f"<={bound}": count
+            for bound, count in zip(self.bucket_bounds_ms, self.counts)
+        }
+        buckets[f">{self.bucket_bounds_ms[-1]}"] = self.counts[-1]
+
+        return {
+            "count": num_samples,
+            "mean_ms": (self.total_ms / num_samples) if num_samples > 0 else 0.0,
+            "max_ms": self.max_ms,
+            "buckets_ms": buckets,
+        }
+
+
+# -----------------------------------------------------------------------------
+
+
+class GruutServer:
+    """Processes JSONL requests from concurrent clients.
+
+    Text is processed on a single thread, which owns the text processors and
+    their database connections. The event loop only handles client I/O.
+    """
+
+    def __init__(
+        self,
+        languages: typing.Sequence[str],
+        espeak: bool = False,
+        max_pending: int = MAX_PENDING_REQUESTS,
+    ):
+        self.languages = list(languages)
+        self.espeak = espeak
+        self.max_pending = max_pending
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="gruut-process"
+        )
+
+        # Time from receiving a request to writing its response
+        self.latency = LatencyHistogram()
+
+        # Time spent processing text
+        self.process_latency = LatencyHistogram()
+
+        self.num_clients = 0
+        self.num_errors = 0
+
+        # Converts sentences to dictionaries without copying words
+        self.encoder = SentenceEncoder()
+
+    async def preload(self):
+        """Load language settings and models before accepting clients"""
+        loop = asyncio.get_running_loop()
+        for lang in self.languages:
+            start_time = time.perf_counter()
+            await loop.run_in_executor(self.executor, self._preload_language, lang)
+            _LOGGER.info(
+                "Loaded %s in %0.2f second(s)", lang, time.perf_counter() - start_time
+            )
+
+    def _preload_language(self, lang: str):
+        # Processing a word loads the lexicon, tagger, and guesser
+        list(gruut.sentences("gruut", lang=lang, espeak=self.espeak))
+
+    def process_request(
+        self, request: typing.Dict[str, typing.Any]
+    ) -> typing.Dict[str, typing.Any]:
+        """Process a single request (on the processing thread)"""
+        start_time = time.perf_counter()
+        request_id = request.pop("id", None)
+
+        try:
+            sentence_args = {"lang": self.languages[0], "espeak": self.espeak}
+            sentence_args.update(request)
+            text = sentence_args.pop("text")
+
+            response = {
+                "id": request_id,
+                "sentences": [
+                    self.encoder.to_dict(sentence)
+                    for sentence in gruut.sentences(text, **sentence_args)
+                ],
+            }
+        except Exception as e:
+            _LOGGER.exception("process_request")
+            self.num_errors += 1
+            response = {"id": request_id, "error": f"{e.__class__.__name__}: {e}"}
+
+        self.process_latency.add((time.perf_counter() - start_time) * 1000)
+
+        return response
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Get server statistics"""
+        return {
+            "clients": self.num_clients,
+            "errors": self.num_errors,
+            "latency": self.latency.to_dict(),
+            "process_latency": self.process_latency.to_dict(),
+        }
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Read pipelined requests and write responses in order"""
+        self.num_clients += 1
+        loop = asyncio.get_running_loop()
+
+        # (receive time, response future) in request order, None when done.
+        # Stats requests have no future, and are answered when they are reached.
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+
+        async def write_responses():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+
+                receive_time, future, stats_id = item
+                if future is None:
+                    response = {"id": stats_id, "stats": self.stats()}
+                else:
+                    response = await future
+
+                writer.write(
+                    json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+                )
+                await writer.drain()
+
+                if future is not None:
+                    self.latency.add((time.perf_counter() - receive_time) * 1000)
+
+        writer_task = asyncio.ensure_future(write_responses())
+
+        async def put_pending(item) -> bool:
+            """Queue item unless the writer stops first (False if it did)"""
+            if not pending.full():
+                pending.put_nowait(item)
+                return True
+
+            # Blocks reading when too many responses are waiting
+            put_task = asyncio.ensure_future(pending.put(item))
+            await asyncio.wait(
+                [put_task, writer_task], return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if not put_task.done():
+                # Writer failed (e.g., client disconnected), so nothing is read
+                put_task.cancel()
+                return False
+
+            return True
+
+        try:
+            while not writer_task.done():
+                line = await reader.readline()
+                if not line:
+                    break
+
+                line = line.strip()
+                if not line:
+                    continue
+
+                receive_time = time.perf_counter()
+                future: typing.Optional[asyncio.Future] = None
+                stats_id = None
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                except ValueError as e:
+                    future = loop.create_future()
+                    future.set_result({"id": None, "error": f"Invalid request: {e}"})
+                else:
+                    if request.get("stats"):
+                        stats_id = request.get("id")
+                    else:
+                        future = loop.run_in_executor(
+                            self.executor, self.process_request, request
+                        )
+
+                if not await put_pending((receive_time, future, stats_id)):
+                    if future is not None:
+                        future.cancel()
+
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            _LOGGER.debug("Client disconnected")
+        except ValueError as e:
+            # Line is longer than the stream limit; answer and disconnect
+            _LOGGER.warning("Request too long: %s", e)
+            if not writer_task.done():
+                future = loop.create_future()
+                future.set_result({"id": None, "error": f"Request too long: {e}"})
+                await put_pending((time.perf_counter(), future, None))
+        finally:
+            if not writer_task.done():
+                await put_pending(None)
+
+            try:
+                await writer_task
+            except ConnectionError:
+                _LOGGER.debug("Client disconnected")
+
+            # Drop responses that can't be written anymore
+            while not pending.empty():
+                item = pending.get_nowait()
+                if (item is not None) and (item[1] is not None):
+                    item[1].cancel()
+
+            writer.close()
+            self.num_clients -= 1
+
+
+# -----------------------------------------------------------------------------
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None):
+    """Main entry point"""
+    parser = argparse.ArgumentParser(prog="gruut serve")
+    parser.add_argument(
+        "-l",
+        "--language",
+        action="append",
+        help="Language to preload (may be repeated, first is default)",
+    )
+    parser.add_argument(
+        "--espeak",
+        action="store_true",
+        help="Use eSpeak versions of lexicons by default",
+    )
+    parser.add_argument("--socket", help="Path to Unix domain socket to listen on")
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST, help="Host to listen on (without --socket)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="Port to listen on (without --socket)",
+    )
+    parser.add_argument(
+        "--debug", action="store_true", help="Print DEBUG messages to console"
+    )
+    args = parser.parse_args(argv)
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.INFO)
+
+    _LOGGER.debug(args)
+
+    server = GruutServer(args.language or ["en-us"], espeak=args.espeak)
+
+    try:
+        asyncio.run(
+            serve(server, socket_path=args.socket, host=args.host, port=args.port)
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _LOGGER.info("Stats: %s", json.dumps(server.stats()))
+
+
+async def serve(
+    server: GruutServer,
+    socket_path: typing.Optional[typing.Union[str, Path]] = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+):
+    """Preload models and serve clients forever"""
+    await server.preload()
+
+    if socket_path:
+        socket_path = Path(socket_path)
+        if socket_path.is_socket():
+            # Left over from a previous run
+            os.unlink(socket_path)
+
+        async_server = await asyncio.start_unix_server(
+            server.handle_client, path=str(socket_path), limit=MAX_REQUEST_BYTES
+        )
+        _LOGGER.info("Listening on %s", socket_path)
+    else:
+        async_server = await asyncio.start_server(
+            server.handle_client, host=host, port=port, limit=MAX_REQUEST_BYTES
+        )
+        _LOGGER.info("Listening on %s:%s", host, port)
+
+    try:
+        async with async_server:
+            await async_server.serve_forever()
+    finally:
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
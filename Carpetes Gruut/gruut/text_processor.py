@@ -1,19 +1,18 @@
 #!/usr/bin/env python3
 """Tokenizes, verbalizes, and phonemizes text and SSML"""
+import copy
+import functools
 import itertools
 import logging
 import re
 import typing
 import xml.etree.ElementTree as etree
+from concurrent.futures import Executor
+from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 
-import babel
-import babel.numbers
-import dateparser
-import networkx as nx
 from gruut_ipa import IPA
-from num2words import num2words
 
 from gruut.const import (
     DATA_PROP,
@@ -43,14 +42,19 @@ from gruut.const import (
     WordRole,
 )
 from gruut.lang import get_settings
+from gruut.phonemize import ROLE_TO_PHONEMES, phonemes_for_role
 from gruut.utils import (
+    CacheStats,
+    DocumentTree,
+    LeafWorklist,
+    LRUCache,
     attrib_no_namespace,
+    dfs_preorder_nodes,
+    iter_ssml_windows,
+    iter_text_windows,
     leaves,
     load_lexicon,
     maybe_split_ipa,
-    pipeline_split,
-    pipeline_transform,
-    pipeline_transform_window,
     resolve_lang,
     tag_no_namespace,
     text_and_elements,
@@ -62,6 +66,53 @@ _LOGGER = logging.getLogger("gruut.text_processor")
 
 DEFAULT_LEXICON_ID = ""
 
+# Graph attribute with the lexicon pronunciations of the document's words:
+# (lang, do_transforms, word) -> role -> phonemes (None if not in lexicon)
+WORD_PRONS_ATTR = "word_prons"
+
+# Approximate number of characters in each window of plain text (see stream_sentences)
+DEFAULT_MAX_WINDOW_CHARS = 10000
+
+# Maximum number of parsed/verbalized numbers to keep per language
+DEFAULT_VERBALIZE_CACHE_SIZE = 4096
+
+# Maximum number of dateparser results to keep (see parse_date_cached)
+DATE_CACHE_SIZE = 4096
+
+_DATE_CACHE = LRUCache(max_size=DATE_CACHE_SIZE)
+_CACHE_MISSING = object()
+
+
+def parse_date_cached(
+    text: str, lang: str, strict: bool = True
+) -> typing.Optional[datetime]:
+    """Parse a date with dateparser, remembering results for (text, lang, strict)"""
+    key = (text, lang, strict)
+    date = _DATE_CACHE.get(key, _CACHE_MISSING)
+    if date is _CACHE_MISSING:
+        import dateparser
+
+        date = dateparser.parse(
+            text, settings={"STRICT_PARSING": strict}, languages=[lang]
+        )
+        _DATE_CACHE[key] = date
+
+    return date
+
+
+# -----------------------------------------------------------------------------
+
+
+class _AsyncRequest:
+    """Executor future shared by concurrent async requests for the same text"""
+
+    def __init__(self, future: typing.Any):
+        self.future = future
+        self.num_waiters = 0
+
+        # Total number of callers that joined (results are copied if > 1)
+        self.num_callers = 0
+
 
 # -----------------------------------------------------------------------------
 
@@ -78,11 +129,17 @@ class TextProcessor:
         settings: typing.Optional[
             typing.MutableMapping[str, TextProcessorSettings]
         ] = None,
+        use_networkx: bool = False,
+        verbalize_cache_size: typing.Optional[int] = DEFAULT_VERBALIZE_CACHE_SIZE,
+        executor: typing.Optional[Executor] = None,
         **kwargs,
     ):
         self.default_lang = default_lang
         self.default_settings_kwargs = kwargs
 
+        # Build networkx graphs instead of DocumentTree (for debugging)
+        self.use_networkx = use_networkx
+
         self.model_prefix = model_prefix
         self.search_dirs = search_dirs
 
@@ -99,6 +156,17 @@ class TextProcessor:
 
         self.settings = settings
 
+        # Language -> cache of parsed numbers and verbalized number/currency
+        # words. Size 0 disables caching, None is unbounded.
+        self.verbalize_cache_size = verbalize_cache_size
+        self.verbalize_caches: typing.Dict[str, LRUCache] = {}
+
+        # Runs process_async/sentences_async (None for the event loop's default)
+        self.executor = executor
+
+        # (event loop, function, arguments) -> request being processed
+        self.async_requests: typing.Dict[typing.Hashable, _AsyncRequest] = {}
+
     def sentences(
         self,
         graph: GraphType,
@@ -113,8 +181,10 @@ class TextProcessor:
     ) -> typing.Iterable[Sentence]:
         """Processes text and returns each sentence"""
 
+        default_lang = resolve_lang(self.default_lang)
+
         def get_lang(lang: str) -> str:
-            if explicit_lang or (lang != self.default_lang):
+            if explicit_lang or (resolve_lang(lang) != default_lang):
                 return lang
 
             # Implicit default language
@@ -133,7 +203,7 @@ class TextProcessor:
 
         sentences: typing.List[Sentence] = []
 
-        for dfs_node in nx.dfs_preorder_nodes(graph, root.node):
+        for dfs_node in dfs_preorder_nodes(graph, root.node):
             node = graph.nodes[dfs_node][DATA_PROP]
             if isinstance(node, ParagraphNode):
                 par_idx += 1
@@ -396,6 +466,113 @@ class TextProcessor:
             for word in sent:
                 yield word
 
+    def stream_sentences(
+        self,
+        text: typing.Union[str, typing.Iterable[str]],
+        lang: typing.Optional[str] = None,
+        ssml: bool = False,
+        major_breaks: bool = True,
+        minor_breaks: bool = True,
+        punctuations: bool = True,
+        explicit_lang: bool = True,
+        phonemes: bool = True,
+        break_phonemes: bool = True,
+        output_pos: bool = True,
+        max_window_chars: int = DEFAULT_MAX_WINDOW_CHARS,
+        **process_args,
+    ) -> typing.Iterable[Sentence]:
+        """Processes a long document in windows and yields sentences as they're ready.
+
+        Plain text is split at paragraphs (blank lines), and long paragraphs
+        after sentences once they reach max_window_chars. text may be an
+        iterable of lines (e.g., a file), which is read as needed.
+
+        SSML is split at <p> and <s> elements, which are processed with copies
+        of their enclosing elements (<speak>, <lang>, <voice>, etc.). The XML
+        itself is parsed up front, but only one window's graph is kept.
+
+        Paragraph/sentence indexes continue across windows, and inline
+        lexicons are shared between them.
+
+        process_args are passed to process (e.g., pos=False disables tagging),
+        and output_pos is passed to sentences as pos.
+        """
+        sentence_args = {
+            "major_breaks": major_breaks,
+            "minor_breaks": minor_breaks,
+            "punctuations": punctuations,
+            "explicit_lang": explicit_lang,
+            "phonemes": phonemes,
+            "break_phonemes": break_phonemes,
+            "pos": output_pos,
+        }
+
+        windows: typing.Iterable[typing.Tuple[str, bool]]
+        if ssml:
+            if not isinstance(text, str):
+                text = "".join(text)
+
+            try:
+                root_element = etree.fromstring(text)
+            except Exception:
+                # Try wrapping text in <speak> and parsing again
+                root_element = etree.fromstring(f"<speak>{text}</speak>")
+
+            windows = (
+                (etree.tostring(window, encoding="unicode"), True)
+                for window in iter_ssml_windows(root_element)
+            )
+        else:
+            if isinstance(text, str):
+                text = text.splitlines(keepends=True)
+
+            settings = self.get_settings(lang)
+            windows = iter_text_windows(
+                text,
+                max_window_chars,
+                major_breaks=settings.major_breaks,
+                abbreviations=[
+                    pattern
+                    for pattern in settings.abbreviations
+                    if isinstance(pattern, REGEX_PATTERN)
+                ],
+            )
+
+        # id -> lexicon, shared between windows
+        inline_lexicons: typing.Dict[str, InlineLexicon] = {}
+
+        par_idx = -1
+        sent_idx = 0
+
+        for window_text, new_paragraph in windows:
+            graph, root = self.process(
+                window_text,
+                lang=lang,
+                ssml=ssml,
+                inline_lexicons=inline_lexicons,
+                **process_args,
+            )
+
+            window_par_idx: typing.Optional[int] = None
+            for sentence in self.sentences(graph, root, **sentence_args):
+                if sentence.par_idx != window_par_idx:
+                    if (window_par_idx is not None) or new_paragraph or (par_idx < 0):
+                        # Next paragraph in document
+                        par_idx += 1
+                        sent_idx = 0
+
+                    window_par_idx = sentence.par_idx
+
+                sentence.par_idx = par_idx
+                sentence.idx = sent_idx
+                sent_idx += 1
+
+                for word in sentence.words:
+                    word.sent_idx = sentence.idx
+                    word.par_idx = sentence.par_idx
+
+                yield sentence
+
     def get_settings(self, lang: typing.Optional[str] = None) -> TextProcessorSettings:
         """Gets or creates settings for a language"""
         lang = lang or self.default_lang
@@ -436,6 +613,175 @@ class TextProcessor:
     # Processing
     # -------------------------------------------------------------------------
 
+    def get_verbalize_cache(
+        self, settings: TextProcessorSettings
+    ) -> typing.Optional[LRUCache]:
+        """Gets or creates the number/currency cache for a language (None if disabled)"""
+        if self.verbalize_cache_size == 0:
+            return None
+
+        cache = self.verbalize_caches.get(settings.lang)
+        if cache is None:
+            cache = LRUCache(max_size=self.verbalize_cache_size)
+            self.verbalize_caches[settings.lang] = cache
+
+        return cache
+
+    @property
+    def verbalize_cache_stats(self) -> typing.Dict[str, CacheStats]:
+        """Hit/miss counters of the number/currency cache for each language"""
+        return {lang: cache.stats for lang, cache in self.verbalize_caches.items()}
+
+    def warm_verbalize_cache(
+        self, texts: typing.Iterable[str], lang: typing.Optional[str] = None
+    ) -> int:
+        """Fill number/currency caches by processing a corpus.
+
+        Returns the total number of cached entries afterwards.
+        """
+        for text in texts:
+            self.process(text, lang=lang, pos=False, phonemize=False)
+
+        return sum(len(cache) for cache in self.verbalize_caches.values())
+
+    # -------------------------------------------------------------------------
+    # Async
+    # -------------------------------------------------------------------------
+
+    async def process_async(
+        self,
+        text: str,
+        executor: typing.Optional[Executor] = None,
+        timeout: typing.Optional[float] = None,
+        **process_args,
+    ) -> typing.Tuple[GraphType, Node]:
+        """Processes text or SSML in an executor without blocking the event loop.
+
+        Concurrent calls with the same arguments share a single executor job,
+        and each caller gets its own copy of the graph. Raises
+        asyncio.TimeoutError after timeout seconds.
+        """
+        return await self._run_async(
+            self.process, (text,), process_args, executor=executor, timeout=timeout
+        )
+
+    async def sentences_async(
+        self,
+        text: str,
+        major_breaks: bool = True,
+        minor_breaks: bool = True,
+        punctuations: bool = True,
+        explicit_lang: bool = True,
+        phonemes: bool = True,
+        break_phonemes: bool = True,
+        pos: bool = True,
+        executor: typing.Optional[Executor] = None,
+        timeout: typing.Optional[float] = None,
+        **process_args,
+    ) -> typing.AsyncIterator[Sentence]:
+        """Processes text or SSML in an executor and yields each sentence.
+
+        See process_async for sharing of results and timeouts.
+        """
+        sentence_args = (
+            ("major_breaks", major_breaks),
+            ("minor_breaks", minor_breaks),
+            ("punctuations", punctuations),
+            ("explicit_lang", explicit_lang),
+            ("phonemes", phonemes),
+            ("break_phonemes", break_phonemes),
+            ("pos", pos),
+        )
+
+        sentences = await self._run_async(
+            self._process_sentences,
+            (text, sentence_args),
+            process_args,
+            executor=executor,
+            timeout=timeout,
+        )
+
+        for sentence in sentences:
+            yield sentence
+
+    def _process_sentences(
+        self,
+        text: str,
+        sentence_args: typing.Iterable[typing.Tuple[str, bool]],
+        **process_args,
+    ) -> typing.List[Sentence]:
+        graph, root = self.process(text, **process_args)
+        return list(self.sentences(graph, root, **dict(sentence_args)))
+
+    async def _run_async(
+        self,
+        func: typing.Callable[..., typing.Any],
+        args: typing.Tuple[typing.Any, ...],
+        kwargs: typing.Dict[str, typing.Any],
+        executor: typing.Optional[Executor] = None,
+        timeout: typing.Optional[float] = None,
+    ) -> typing.Any:
+        """Runs func in an executor, sharing the job with identical requests.
+
+        If the job was shared, each caller gets a deep copy of the result, so
+        callers can't see each other's changes. When every caller is cancelled
+        or times out, the request is cancelled too. Work that has already
+        started in the executor runs to completion, but its result is
+        discarded.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        key: typing.Optional[typing.Hashable] = (
+            loop,
+            func,
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+
+        try:
+            hash(key)
+        except TypeError:
+            # Requests with unhashable arguments (e.g., pass_stats) aren't shared
+            key = None
+
+        request = self.async_requests.get(key) if key is not None else None
+        if request is None:
+            future = loop.run_in_executor(
+                executor or self.executor, functools.partial(func, *args, **kwargs)
+            )
+            request = _AsyncRequest(future)
+
+            if key is not None:
+                self.async_requests[key] = request
+                future.add_done_callback(
+                    functools.partial(self._remove_async_request, key, request)
+                )
+
+        request.num_waiters += 1
+        request.num_callers += 1
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(request.future), timeout)
+        finally:
+            request.num_waiters -= 1
+            if (request.num_waiters <= 0) and (not request.future.done()):
+                # No one is waiting for the result anymore
+                request.future.cancel()
+
+        if request.num_callers > 1:
+            # Callers can't join after the job is done, so this count is final
+            result = copy.deepcopy(result)
+
+        return result
+
+    def _remove_async_request(
+        self, key: typing.Hashable, request: _AsyncRequest, _future: typing.Any
+    ):
+        if self.async_requests.get(key) is request:
+            del self.async_requests[key]
+
     def __call__(self, *args, **kwargs):
         """Processes text or SSML"""
         return self.process(*args, **kwargs)
@@ -458,6 +804,8 @@ class TextProcessor:
         verbalize_dates: bool = True,
         verbalize_times: bool = True,
         max_passes: int = 5,
+        pass_stats: typing.Optional[typing.List[int]] = None,
+        inline_lexicons: typing.Optional[typing.Dict[str, InlineLexicon]] = None,
     ) -> typing.Tuple[GraphType, Node]:
         """
         Processes text or SSML
@@ -478,6 +826,9 @@ class TextProcessor:
             verbalize_currency: True if annotated currency amounts should be expanded into words
             verbalize_dates: True if annotated dates should be expanded into words
             verbalize_times: True if annotated clock times should be expanded into words
+            max_passes: maximum number of passes over the text graph
+            pass_stats: list to append the number of nodes touched in each pass to
+            inline_lexicons: lexicons from <lexicon> by id, shared with other calls
 
         Returns:
             graph, root: text graph and root node
@@ -503,7 +854,7 @@ class TextProcessor:
             def iter_elements():
                 yield text
 
-        graph = typing.cast(GraphType, nx.DiGraph())
+        graph = self.create_graph()
 
         # Parse XML
         last_paragraph: typing.Optional[ParagraphNode] = None
@@ -520,7 +871,8 @@ class TextProcessor:
 
         # [(tag, lang)]
         lang_stack: typing.List[typing.Tuple[str, str]] = []
-        current_lang: str = lang or self.default_lang
+        document_lang: str = lang or self.default_lang
+        current_lang: str = document_lang
 
         # [lexicon.id]
         lookup_stack: typing.List[str] = []
@@ -528,7 +880,8 @@ class TextProcessor:
         lexeme: typing.Optional[Lexeme] = None
 
         # id -> lexicon
-        inline_lexicons: typing.Dict[str, InlineLexicon] = {}
+        if inline_lexicons is None:
+            inline_lexicons = {}
 
         # True if current word is the last one
         is_last_word: bool = False
@@ -673,14 +1026,20 @@ class TextProcessor:
 
                     word_text_norm = settings.normalize_whitespace(word_text)
 
+                    if in_inline_lexicon(word_text_norm, word_role):
+                        lexicon_args: typing.Dict[str, typing.Any] = {
+                            "in_lexicon": True
+                        }
+                    else:
+                        lexicon_args = self._word_lexicon_args(
+                            graph, word_text_norm, settings
+                        )
+
                     word_node = WordNode(
                         node=len(graph),
                         text=word_text_norm,
                         text_with_ws=word_text,
-                        in_lexicon=(
-                            in_inline_lexicon(word_text_norm, word_role)
-                            or self._is_word_in_lexicon(word_text_norm, settings)
-                        ),
+                        **lexicon_args,
                         **word_kwargs,
                     )
                     graph.add_node(word_node.node, data=word_node)
@@ -761,7 +1120,7 @@ class TextProcessor:
                     if lang_stack:
                         current_lang = lang_stack[-1][1]  # tag, lang
                     else:
-                        current_lang = self.default_lang
+                        current_lang = document_lang
 
                     if end_tag in {"w", "token"}:
                         # End of word
@@ -1000,41 +1359,48 @@ class TextProcessor:
 
         assert root is not None
 
-        # Do multiple passes over the graph
-        num_passes_left = max_passes
-        while num_passes_left > 0:
+        # Do multiple passes over the graph.
+        #
+        # Each step only visits leaves that were created or changed since the
+        # step last ran.
+        worklist = LeafWorklist(graph, root)
+        pass_idx = 0
+
+        while pass_idx < max_passes:
             was_changed = False
+            worklist.num_touched = 0
 
             # Do replacements before minor/major breaks
-            if pipeline_split(self._split_replacements, graph, root):
+            if worklist.split(self._split_replacements):
                 was_changed = True
 
             # Split punctuations (quotes, etc.) before breaks
-            if pipeline_split(self._split_punctuations, graph, root):
+            if worklist.split(self._split_punctuations):
                 was_changed = True
 
             # Split on minor breaks (commas, etc.)
-            if pipeline_split(self._split_minor_breaks, graph, root):
+            if worklist.split(self._split_minor_breaks):
                 was_changed = True
 
             # Expand abbrevations before major breaks
-            if pipeline_split(self._split_abbreviations, graph, root):
+            if worklist.split(self._split_abbreviations):
                 was_changed = True
 
             # Break apart initialisms (e.g., TTS or T.T.S.) before major breaks
-            if pipeline_split(self._split_initialism, graph, root):
+            if worklist.split(self._split_initialism):
                 was_changed = True
 
             # Split on major breaks (periods, etc.)
-            if pipeline_split(self._split_major_breaks, graph, root):
+            if worklist.split(self._split_major_breaks):
                 was_changed = True
 
             # Break apart sentences using BreakWordNodes
-            if self._break_sentences(graph, root):
+            break_leaves = worklist.dirty_leaves(self._break_sentences)
+            if break_leaves and self._break_sentences(graph, root, break_leaves):
                 was_changed = True
 
             # spell-out (e.g., abc -> a b c) before number expansion
-            if pipeline_split(self._split_spell_out, graph, root):
+            if worklist.split(self._split_spell_out):
                 was_changed = True
 
             # Transform text into known classes.
@@ -1046,72 +1412,104 @@ class TextProcessor:
             # as numbers by Babel (the de_DE locale will parse this as 112000).
             #
             if detect_dates:
-                if pipeline_transform(self._transform_date, graph, root):
+                if worklist.transform(self._transform_date):
                     was_changed = True
 
             if detect_currency:
-                if pipeline_transform(self._transform_currency, graph, root):
+                if worklist.transform(self._transform_currency):
                     was_changed = True
 
             if detect_numbers:
-                if pipeline_transform(self._transform_number, graph, root):
+                if worklist.transform(self._transform_number):
                     was_changed = True
 
             if detect_times:
-                if pipeline_transform_window(
-                    self._collapse_time, graph, root, window_size=2
-                ):
+                if worklist.transform_window(self._collapse_time, window_size=2):
                     was_changed = True
 
-                if pipeline_transform(self._transform_time, graph, root):
+                if worklist.transform(self._transform_time):
                     was_changed = True
 
             # Verbalize known classes
             if verbalize_dates:
-                if pipeline_transform(self._verbalize_date, graph, root):
+                if worklist.transform(self._verbalize_date):
                     was_changed = True
 
             if verbalize_times:
-                if pipeline_transform(self._verbalize_time, graph, root):
+                if worklist.transform(self._verbalize_time):
                     was_changed = True
 
             if verbalize_numbers:
-                if pipeline_transform(self._verbalize_number, graph, root):
+                if worklist.transform(self._verbalize_number):
                     was_changed = True
 
             if verbalize_currency:
-                if pipeline_transform(self._verbalize_currency, graph, root):
+                if worklist.transform(self._verbalize_currency):
                     was_changed = True
 
             # Break apart words
-            if pipeline_split(self._break_words, graph, root):
+            if worklist.split(self._break_words):
                 was_changed = True
 
             # Ignore non-words
-            if pipeline_split(self._split_ignore_non_words, graph, root):
+            if worklist.split(self._split_ignore_non_words):
                 was_changed = True
 
+            _LOGGER.debug(
+                "Pass %s touched %s node(s) of %s leaves",
+                pass_idx + 1,
+                worklist.num_touched,
+                worklist.num_leaves,
+            )
+
+            if pass_stats is not None:
+                pass_stats.append(worklist.num_touched)
+
             if not was_changed:
                 # No changes, so we can stop
                 break
 
-            num_passes_left -= 1
+            pass_idx += 1
 
         # Gather words from leaves of the tree, group by sentence
-        def process_sentence(words: typing.List[WordNode]):
-            if pos:
-                pos_settings = self.get_settings(node.lang)
-                if pos_settings.get_parts_of_speech is not None:
-                    pos_tags = pos_settings.get_parts_of_speech(
-                        [word.text for word in words]
-                    )
+        def tag_sentences(
+            sentences: typing.Sequence[typing.Tuple[str, typing.List[WordNode]]]
+        ):
+            # lang -> [[word]] for each sentence in the language
+            sentences_by_lang: typing.Dict[str, typing.List[typing.List[WordNode]]] = {}
+            for sentence_lang, words in sentences:
+                sentences_by_lang.setdefault(sentence_lang, []).append(words)
+
+            for sentence_lang, lang_sentences in sentences_by_lang.items():
+                pos_settings = self.get_settings(sentence_lang)
+                if pos_settings.get_parts_of_speech is None:
+                    continue
+
+                sentences_texts = [
+                    [word.text for word in words] for words in lang_sentences
+                ]
+                tag_many = getattr(pos_settings.get_parts_of_speech, "tag_many", None)
+                if tag_many is not None:
+                    # Tag all sentences of the document at once
+                    sentences_tags = tag_many(sentences_texts)
+                else:
+                    sentences_tags = [
+                        pos_settings.get_parts_of_speech(texts)
+                        for texts in sentences_texts
+                    ]
+
+                for words, pos_tags in zip(lang_sentences, sentences_tags):
                     for word, pos_tag in zip(words, pos_tags):
                         word.pos = pos_tag
 
                         if not word.role:
                             word.role = f"gruut:{pos_tag}"
 
+        def process_sentence(words: typing.List[WordNode]):
             if phonemize:
+                # lang -> [word] for words that need the language lexicon/guesser
+                words_by_lang: typing.Dict[str, typing.List[WordNode]] = {}
+
                 # Add phonemes to word
                 for word in words:
                     if word.phonemes:
@@ -1150,41 +1548,52 @@ class TextProcessor:
                         # Got phonemes from inline lexicon
                         continue
 
-                    phonemize_settings = self.get_settings(word.lang)
-                    if phonemize_settings.lookup_phonemes is not None:
-                        word.phonemes = phonemize_settings.lookup_phonemes(
-                            word.text, word.role
-                        )
+                    words_by_lang.setdefault(word.lang, []).append(word)
 
-                    if (not word.phonemes) and (
-                        phonemize_settings.guess_phonemes is not None
-                    ):
-                        word.phonemes = phonemize_settings.guess_phonemes(
-                            word.text, word.role
-                        )
+                for word_lang, lang_words in words_by_lang.items():
+                    phonemize_settings = self.get_settings(word_lang)
 
-        # Process tree leaves
-        sentence_words: typing.List[WordNode] = []
+                    # Look up all words of the sentence at once
+                    self._lookup_word_phonemes(graph, lang_words, phonemize_settings)
 
-        for dfs_node in nx.dfs_preorder_nodes(graph, root.node):
+                    if phonemize_settings.guess_phonemes is not None:
+                        for word in lang_words:
+                            if not word.phonemes:
+                                word.phonemes = phonemize_settings.guess_phonemes(
+                                    word.text, word.role
+                                )
+
+        # Process tree leaves.
+        # (lang, [word]) for each sentence
+        sentences_words: typing.List[typing.Tuple[str, typing.List[WordNode]]] = []
+        sentence_lang = self.default_lang
+
+        for dfs_node in dfs_preorder_nodes(graph, root.node):
             node = graph.nodes[dfs_node][DATA_PROP]
             if isinstance(node, SentenceNode):
-                if sentence_words:
-                    process_sentence(sentence_words)
-                    sentence_words = []
+                sentence_lang = node.lang
+                sentences_words.append((sentence_lang, []))
             elif graph.out_degree(dfs_node) == 0:
                 if isinstance(node, WordNode):
+                    if not sentences_words:
+                        sentences_words.append((sentence_lang, []))
+
                     word_node = typing.cast(WordNode, node)
-                    sentence_words.append(word_node)
+                    sentences_words[-1][1].append(word_node)
 
-        if sentence_words:
-            # Final sentence
+        sentences_words = [
+            (sentence_lang, words) for sentence_lang, words in sentences_words if words
+        ]
+
+        if pos:
+            tag_sentences(sentences_words)
+
+        for _sentence_lang, sentence_words in sentences_words:
             process_sentence(sentence_words)
-            sentence_words = []
 
         if post_process:
             # Post-process sentences
-            for dfs_node in nx.dfs_preorder_nodes(graph, root.node):
+            for dfs_node in dfs_preorder_nodes(graph, root.node):
                 node = graph.nodes[dfs_node][DATA_PROP]
                 if isinstance(node, SentenceNode):
                     sent_node = typing.cast(SentenceNode, node)
@@ -1199,6 +1608,15 @@ class TextProcessor:
 
         return graph, root
 
+    def create_graph(self) -> GraphType:
+        """Create an empty text graph"""
+        if self.use_networkx:
+            import networkx as nx
+
+            return typing.cast(GraphType, nx.DiGraph())
+
+        return typing.cast(GraphType, DocumentTree())
+
     def post_process_graph(self, graph: GraphType, root: Node):
         """User-defined post-processing of entire graph"""
         pass
@@ -1207,15 +1625,26 @@ class TextProcessor:
     # Pipeline (custom)
     # -------------------------------------------------------------------------
 
-    def _break_sentences(self, graph: GraphType, root: Node) -> bool:
-        """Break sentences apart at BreakWordNode(break_type="major") nodes."""
+    def _break_sentences(
+        self,
+        graph: GraphType,
+        root: Node,
+        leaf_nodes: typing.Optional[typing.Iterable[Node]] = None,
+    ) -> bool:
+        """Break sentences apart at BreakWordNode(break_type="major") nodes.
+
+        Only leaf_nodes are checked for breaks if given (default: all leaves).
+        """
         was_changed = False
 
+        if leaf_nodes is None:
+            leaf_nodes = list(leaves(graph, root))
+
         # This involves:
         # 1. Identifying where in the edge list of sentence the break occurs
         # 2. Creating a new sentence next to the existing one in the parent paragraph
         # 3. Moving everything after the break into the new sentence
-        for leaf_node in list(leaves(graph, root)):
+        for leaf_node in leaf_nodes:
             if not isinstance(leaf_node, BreakWordNode):
                 # Not a break
                 continue
@@ -1328,7 +1757,7 @@ class TextProcessor:
                 "implicit": True,
                 "lang": word.lang,
                 "voice": word.voice,
-                "in_lexicon": self._is_word_in_lexicon(part_text_norm, settings),
+                **self._word_lexicon_args(graph, part_text_norm, settings),
                 "is_from_broken_word": True,
             }
 
@@ -1427,7 +1856,7 @@ class TextProcessor:
                 "implicit": True,
                 "lang": word.lang,
                 "voice": word.voice,
-                "in_lexicon": self._is_word_in_lexicon(word_text_norm, settings),
+                **self._word_lexicon_args(graph, word_text_norm, settings),
             }
 
         last_punct_idx = len(end_punctuations) - 1
@@ -1475,7 +1904,7 @@ class TextProcessor:
                 "implicit": True,
                 "lang": word.lang,
                 "voice": word.voice,
-                "in_lexicon": self._is_word_in_lexicon(word_part_norm, settings),
+                **self._word_lexicon_args(graph, word_part_norm, settings),
             }
         else:
             # Keep leading whitespace
@@ -1519,7 +1948,7 @@ class TextProcessor:
                 "implicit": True,
                 "lang": word.lang,
                 "voice": word.voice,
-                "in_lexicon": self._is_word_in_lexicon(word_part_norm, settings),
+                **self._word_lexicon_args(graph, word_part_norm, settings),
             }
 
         break_part = parts[1]
@@ -1613,16 +2042,18 @@ class TextProcessor:
                     word_text_norm, scope_kwargs.get("word_role")
                 )
 
-            if not in_lexicon:
-                # Check main language lexicon
-                in_lexicon = self._is_word_in_lexicon(word_text_norm, settings)
+            if in_lexicon:
+                lexicon_args: typing.Dict[str, typing.Any] = {"in_lexicon": True}
+            else:
+                # Check main language lexicon (pronunciations are kept for later)
+                lexicon_args = self._word_lexicon_args(graph, word_text_norm, settings)
 
             word_node = WordNode(
                 node=len(graph),
                 text=word_text_norm,
                 text_with_ws=word_text,
                 implicit=True,
-                in_lexicon=in_lexicon,
+                **lexicon_args,
                 **word_kwargs,
             )
             graph.add_node(word_node.node, data=word_node)
@@ -1724,7 +2155,7 @@ class TextProcessor:
                     "text_with_ws": part_text,
                     "implicit": True,
                     "lang": word.lang,
-                    "in_lexicon": self._is_word_in_lexicon(part_text_norm, settings),
+                    **self._word_lexicon_args(graph, part_text_norm, settings),
                 }
 
     def _split_abbreviations(self, graph: GraphType, node: Node):
@@ -1767,7 +2198,7 @@ class TextProcessor:
                     "text_with_ws": part_text,
                     "implicit": True,
                     "lang": word.lang,
-                    "in_lexicon": self._is_word_in_lexicon(part_text_norm, settings),
+                    **self._word_lexicon_args(graph, part_text_norm, settings),
                 }
 
     def _split_initialism(self, graph: GraphType, node: Node):
@@ -1862,36 +2293,59 @@ class TextProcessor:
                 word.number = Decimal(ordinal_num)
                 return False
 
-        try:
-            # Try to parse as a number
-            # This is important to handle thousand/decimal separators correctly.
-            number = babel.numbers.parse_decimal(
-                word.text, locale=settings.babel_locale
-            )
+        # Try to parse as a number
+        number = self._parse_number(word.text, settings)
+        if number is None:
+            # Probably not a number
+            word.is_maybe_number = False
+            return False
 
-            if not number.is_finite():
-                raise ValueError("Not parsing nan or inf")
+        word.interpret_as = InterpretAs.NUMBER
+
+        if not word.format:
+            # Retain ordinal, etc.
+            word.format = InterpretAsFormat.NUMBER_CARDINAL
+
+        word.number = number
+
+        if (1000 < number < 3000) and (re.match(r"^\d+$", word.text) is not None):
+            # Interpret numbers in this range as years by default, but only
+            # if the text was entirely digits.
+            #
+            # So "2020" will become "twenty twenty", but "2,020" will become
+            # "two thousand and twenty".
+            word.format = InterpretAsFormat.NUMBER_YEAR
+
+        return True
 
-            word.interpret_as = InterpretAs.NUMBER
+    def _parse_number(
+        self, text: str, settings: TextProcessorSettings
+    ) -> typing.Optional[Decimal]:
+        """Parse a finite number using the language's locale (None if not a number)"""
+        cache = self.get_verbalize_cache(settings)
+        cache_key = ("parse", text, settings.babel_locale)
 
-            if not word.format:
-                # Retain ordinal, etc.
-                word.format = InterpretAsFormat.NUMBER_CARDINAL
+        if cache is not None:
+            number = cache.get(cache_key, _CACHE_MISSING)
+            if number is not _CACHE_MISSING:
+                return number
 
-            word.number = number
+        import babel.numbers
 
-            if (1000 < number < 3000) and (re.match(r"^\d+$", word.text) is not None):
-                # Interpret numbers in this range as years by default, but only
-                # if the text was entirely digits.
-                #
-                # So "2020" will become "twenty twenty", but "2,020" will become
-                # "two thousand and twenty".
-                word.format = InterpretAsFormat.NUMBER_YEAR
+        try:
+            # This is important to handle thousand/decimal separators correctly.
+            number = babel.numbers.parse_decimal(text, locale=settings.babel_locale)
+
+            if not number.is_finite():
+                # Not parsing nan or inf
+                number = None
         except ValueError:
-            # Probably not a number
-            word.is_maybe_number = False
+            number = None
 
-        return True
+        if cache is not None:
+            cache[cache_key] = number
+
+        return number
 
     def _transform_currency(self, graph: GraphType, node: Node,) -> bool:
         if not isinstance(node, WordNode):
@@ -1914,6 +2368,8 @@ class TextProcessor:
 
         assert settings.babel_locale
 
+        import babel.numbers
+
         # Try to parse with known currency symbols
         parsed = False
         for currency_symbol in settings.currency_symbols:
@@ -1963,28 +2419,33 @@ class TextProcessor:
         settings = self.get_settings(word.lang)
 
         try:
-            if (settings.is_maybe_date is not None) and not settings.is_maybe_date(
-                word.text
+            if (
+                (word.interpret_as != InterpretAs.DATE)
+                and (settings.is_maybe_date is not None)
+                and not settings.is_maybe_date(word.text)
             ):
-                # Probably not a date
+                # Probably not a date (always try if <say-as> is used)
                 word.is_maybe_date = False
                 return False
 
             assert settings.dateparser_lang
 
-            dateparser_kwargs: typing.Dict[str, typing.Any] = {
-                "settings": {"STRICT_PARSING": True},
-                "languages": [settings.dateparser_lang],
-            }
+            date: typing.Optional[datetime] = None
+            if settings.parse_date is not None:
+                # Fast path for common formats
+                date = settings.parse_date(word.text)
+
+            if date is None:
+                date = parse_date_cached(word.text, settings.dateparser_lang)
 
-            date = dateparser.parse(word.text, **dateparser_kwargs)
             if date is not None:
                 word.interpret_as = InterpretAs.DATE
                 word.date = date
             elif word.interpret_as == InterpretAs.DATE:
                 # Try again without strict parsing
-                dateparser_kwargs["settings"]["STRICT_PARSING"] = False
-                date = dateparser.parse(word.text, **dateparser_kwargs)
+                date = parse_date_cached(
+                    word.text, settings.dateparser_lang, strict=False
+                )
                 if date is not None:
                     word.date = date
         except Exception:
@@ -2087,14 +2548,122 @@ class TextProcessor:
 
         return True
 
-    def _is_word_in_lexicon(
-        self, word: str, settings: TextProcessorSettings
-    ) -> typing.Optional[bool]:
-        """True if word is in the lexicon"""
+    def _word_lexicon_args(
+        self, graph: GraphType, word: str, settings: TextProcessorSettings
+    ) -> typing.Dict[str, typing.Any]:
+        """WordNode arguments for a word found (or not) in the language lexicon"""
         if settings.lookup_phonemes is None:
-            return None
+            return {"in_lexicon": None}
+
+        if not hasattr(settings.lookup_phonemes, "lookup_prons"):
+            # Only phonemes are available
+            return {
+                "in_lexicon": bool(
+                    settings.lookup_phonemes(word, do_transforms=False)
+                )
+            }
+
+        (role_to_word,) = self._lookup_prons(
+            graph, [word], settings, do_transforms=False
+        )
+        if role_to_word is None:
+            return {"in_lexicon": False}
+
+        return {
+            "in_lexicon": bool(phonemes_for_role(role_to_word)),
+            "lexicon_prons": role_to_word,
+        }
+
+    def _lookup_prons(
+        self,
+        graph: GraphType,
+        words: typing.Sequence[str],
+        settings: TextProcessorSettings,
+        do_transforms: bool = True,
+    ) -> typing.List[typing.Optional[ROLE_TO_PHONEMES]]:
+        """Get pronunciations by role of words from the language lexicon.
+
+        Results are kept in the graph, so each distinct word is looked up at
+        most once per document.
+        """
+        word_prons = graph.graph.setdefault(WORD_PRONS_ATTR, {})
+        lookup_phonemes = settings.lookup_phonemes
+
+        missing_words: typing.List[str] = []
+        for word in words:
+            key = (settings.lang, do_transforms, word)
+            if key in word_prons:
+                continue
+
+            if do_transforms:
+                # Exact word is looked up before transformed words
+                role_to_word = word_prons.get((settings.lang, False, word))
+                if role_to_word is not None:
+                    word_prons[key] = role_to_word
+                    continue
+
+            word_prons[key] = None
+            missing_words.append(word)
+
+        if missing_words:
+            lookup_prons_many = getattr(lookup_phonemes, "lookup_prons_many", None)
+            if lookup_prons_many is not None:
+                # Batched lookup (e.g., SqlitePhonemizer)
+                missing_prons = lookup_prons_many(
+                    missing_words, do_transforms=do_transforms
+                )
+            else:
+                missing_prons = [
+                    lookup_phonemes.lookup_prons(word, do_transforms=do_transforms)
+                    for word in missing_words
+                ]
 
-        return bool(settings.lookup_phonemes(word, do_transforms=False))
+            for word, role_to_word in zip(missing_words, missing_prons):
+                word_prons[(settings.lang, do_transforms, word)] = role_to_word
+
+        return [word_prons[(settings.lang, do_transforms, word)] for word in words]
+
+    def _lookup_word_phonemes(
+        self,
+        graph: GraphType,
+        words: typing.Sequence[WordNode],
+        settings: TextProcessorSettings,
+    ):
+        """Set phonemes of words from the lexicon, batching lookups if possible"""
+        if settings.lookup_phonemes is None:
+            return
+
+        if hasattr(settings.lookup_phonemes, "lookup_prons"):
+            # Reuse pronunciations from tokenization and earlier sentences
+            unresolved_words = [word for word in words if word.lexicon_prons is None]
+            if unresolved_words:
+                for word, role_to_word in zip(
+                    unresolved_words,
+                    self._lookup_prons(
+                        graph, [word.text for word in unresolved_words], settings
+                    ),
+                ):
+                    word.lexicon_prons = role_to_word
+
+            for word in words:
+                if word.lexicon_prons is not None:
+                    word.phonemes = phonemes_for_role(word.lexicon_prons, word.role)
+
+            return
+
+        lookup_many = getattr(settings.lookup_phonemes, "lookup_many", None)
+        if lookup_many is not None:
+            # Batched lookup
+            words_phonemes = lookup_many(
+                [word.text for word in words], [word.role for word in words]
+            )
+        else:
+            words_phonemes = [
+                settings.lookup_phonemes(word.text, word.role) for word in words
+            ]
+
+        for word, word_phonemes in zip(words, words_phonemes):
+            word.phonemes = word_phonemes
 
     # -------------------------------------------------------------------------
     # Verbalization
@@ -2118,6 +2687,46 @@ class TextProcessor:
             return
 
         assert settings.num2words_lang
+
+        cache = self.get_verbalize_cache(settings)
+        cache_key = (
+            "number",
+            word.text_with_ws,
+            str(word.number),
+            word.format,
+            settings.num2words_lang,
+        )
+
+        number_words = cache.get(cache_key) if (cache is not None) else None
+        if number_words is None:
+            number_words = self._number_words(word, settings)
+            if number_words is None:
+                # Conversion failed
+                return
+
+            if cache is not None:
+                cache[cache_key] = number_words
+
+        for number_word_text_norm, number_word_text in number_words:
+            number_word = WordNode(
+                node=len(graph),
+                implicit=True,
+                lang=word.lang,
+                text=number_word_text_norm,
+                text_with_ws=number_word_text,
+            )
+            graph.add_node(number_word.node, data=number_word)
+            graph.add_edge(word.node, number_word.node)
+
+    def _number_words(
+        self, word: WordNode, settings: TextProcessorSettings
+    ) -> typing.Optional[typing.Sequence[typing.Tuple[str, str]]]:
+        """Convert a number into (text, text with whitespace) for each word"""
+        assert word.number is not None
+        assert settings.num2words_lang
+
+        from num2words import num2words
+
         num2words_kwargs = {"lang": settings.num2words_lang}
         decimal_nums = [word.number]
 
@@ -2131,6 +2740,7 @@ class TextProcessor:
             num2words_kwargs["to"] = "cardinal"
             decimal_nums = [Decimal(d) for d in str(word.number.to_integral_value())]
 
+        number_words: typing.List[typing.Tuple[str, str]] = []
         for decimal_num in decimal_nums:
             num_has_frac = (decimal_num % 1) != 0
 
@@ -2150,7 +2760,7 @@ class TextProcessor:
                     word.text,
                     word.lang,
                 )
-                return
+                return None
 
             # Add original whitespace back in
             first_ws, last_ws = settings.get_whitespace(word.text_with_ws)
@@ -2165,15 +2775,9 @@ class TextProcessor:
                 if not settings.keep_whitespace:
                     number_word_text = number_word_text_norm
 
-                number_word = WordNode(
-                    node=len(graph),
-                    implicit=True,
-                    lang=word.lang,
-                    text=number_word_text_norm,
-                    text_with_ws=number_word_text,
-                )
-                graph.add_node(number_word.node, data=number_word)
-                graph.add_edge(word.node, number_word.node)
+                number_words.append((number_word_text_norm, number_word_text))
+
+        return tuple(number_words)
 
     def _verbalize_date(self, graph: GraphType, node: Node):
         """Split dates into words"""
@@ -2188,6 +2792,9 @@ class TextProcessor:
         assert settings.babel_locale
         assert settings.num2words_lang
 
+        import babel.dates
+        from num2words import num2words
+
         date = word.date
         date_format = word.format or settings.default_date_format
 
@@ -2371,6 +2978,52 @@ class TextProcessor:
 
         num2words_kwargs["currency"] = word.currency_name
 
+        cache = self.get_verbalize_cache(settings)
+        cache_key = (
+            "currency",
+            word.text_with_ws,
+            str(decimal_num),
+            word.currency_name,
+            settings.num2words_lang,
+        )
+
+        currency_words = cache.get(cache_key) if (cache is not None) else None
+        if currency_words is None:
+            currency_words = self._currency_words(
+                word, settings, num2words_kwargs, num_has_frac
+            )
+            if currency_words is None:
+                # Conversion failed
+                return
+
+            if cache is not None:
+                cache[cache_key] = currency_words
+
+        for currency_word_text_norm, currency_word_text in currency_words:
+            currency_word = WordNode(
+                node=len(graph),
+                implicit=True,
+                lang=word.lang,
+                text=currency_word_text_norm,
+                text_with_ws=currency_word_text,
+            )
+            graph.add_node(currency_word.node, data=currency_word)
+            graph.add_edge(word.node, currency_word.node)
+
+    def _currency_words(
+        self,
+        word: WordNode,
+        settings: TextProcessorSettings,
+        num2words_kwargs: typing.Dict[str, typing.Any],
+        num_has_frac: bool,
+    ) -> typing.Optional[typing.Sequence[typing.Tuple[str, str]]]:
+        """Convert a currency amount into (text, text with whitespace) for each word"""
+        assert word.number is not None
+
+        from num2words import num2words
+
+        decimal_num = word.number
+
         # Custom separator so we can remove 'zero cents'
         num2words_kwargs["separator"] = "|"
 
@@ -2380,7 +3033,7 @@ class TextProcessor:
             _LOGGER.exception(
                 "Failed to verbalize currency %s for language %s", word, word.lang
             )
-            return
+            return None
 
         # Post-process currency words
         if num_has_frac:
@@ -2395,6 +3048,7 @@ class TextProcessor:
         num_str = first_ws + num_str + last_ws
 
         # Split into separate words
+        currency_words: typing.List[typing.Tuple[str, str]] = []
         for currency_word_text in settings.split_words(num_str):
             currency_word_text_norm = settings.normalize_whitespace(currency_word_text)
             if not currency_word_text_norm:
@@ -2403,12 +3057,6 @@ class TextProcessor:
             if not settings.keep_whitespace:
                 currency_word_text = currency_word_text_norm
 
-            currency_word = WordNode(
-                node=len(graph),
-                implicit=True,
-                lang=word.lang,
-                text=currency_word_text_norm,
-                text_with_ws=currency_word_text,
-            )
-            graph.add_node(currency_word.node, data=currency_word)
-            graph.add_edge(word.node, currency_word.node)
+            currency_words.append((currency_word_text_norm, currency_word_text))
+
+        return tuple(currency_words)
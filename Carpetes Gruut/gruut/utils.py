@@ -1,21 +1,27 @@
 """Utility methods for gruut"""
+import copy
 import itertools
 import logging
 import os
 import re
 import ssl
+import sys
+import threading
 import typing
 import xml.etree.ElementTree as etree
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dataclasses import dataclass
 from pathlib import Path
 from urllib.request import urlopen
 
-import networkx as nx
 from gruut_ipa import IPA
 
 from gruut.const import (
     DATA_PROP,
     LANG_ALIASES,
     NODE_TYPE,
+    REGEX_PATTERN,
     EndElement,
     GraphType,
     InlineLexicon,
@@ -170,6 +176,131 @@ def sliding_window(iterable, n=2):
     return zip(*iterables)
 
 
+# -----------------------------------------------------------------------------
+# Caching
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class CacheStats:
+    """Counters for a cache"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits (0 if no lookups)"""
+        num_lookups = self.hits + self.misses
+        if num_lookups < 1:
+            return 0.0
+
+        return self.hits / num_lookups
+
+
+def default_get_size(key: typing.Any, value: typing.Any) -> int:
+    """Approximate size of a cache entry in bytes (shallow)"""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUCache(MutableMapping):
+    """Dictionary-like cache that evicts the least recently used entries.
+
+    The cache can be bounded by number of entries (max_size), by approximate
+    number of bytes (max_bytes, using get_size), or both. None means no limit.
+    Only get() updates the hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        max_size: typing.Optional[int] = None,
+        max_bytes: typing.Optional[int] = None,
+        get_size: typing.Callable[[typing.Any, typing.Any], int] = default_get_size,
+    ):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.get_size = get_size
+
+        self.stats = CacheStats()
+        self.num_bytes = 0
+
+        self._entries: "OrderedDict[typing.Any, typing.Any]" = OrderedDict()
+        self._entry_sizes: typing.Dict[typing.Any, int] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: typing.Any, default: typing.Any = None) -> typing.Any:
+        """Get value for key and mark it as recently used"""
+        with self._lock:
+            value = self._entries.get(key, _CACHE_MISSING)
+            if value is _CACHE_MISSING:
+                self.stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+
+            return value
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        with self._lock:
+            value = self._entries[key]
+            self._entries.move_to_end(key)
+
+            return value
+
+    def __setitem__(self, key: typing.Any, value: typing.Any):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = value
+
+            if self.max_bytes is not None:
+                entry_size = self.get_size(key, value)
+                self._entry_sizes[key] = entry_size
+                self.num_bytes += entry_size
+
+            self._evict()
+
+    def __delitem__(self, key: typing.Any):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key: typing.Any) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def clear(self):
+        """Remove all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._entry_sizes.clear()
+            self.num_bytes = 0
+
+    def _remove(self, key: typing.Any):
+        del self._entries[key]
+        self.num_bytes -= self._entry_sizes.pop(key, 0)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is within its limits"""
+        while self._entries and (
+            ((self.max_size is not None) and (len(self._entries) > self.max_size))
+            or ((self.max_bytes is not None) and (self.num_bytes > self.max_bytes))
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats.evictions += 1
+
+
+_CACHE_MISSING = object()
+
+
 # -----------------------------------------------------------------------------
 # XML
 # -----------------------------------------------------------------------------
@@ -271,6 +402,140 @@ def load_lexicon(
                     role_phonemes[role] = lexeme.phonemes
 
 
+# Elements that split an SSML document into windows (see iter_ssml_windows)
+SSML_WINDOW_TAGS = {"p", "s"}
+
+# Elements whose text is not spoken
+SSML_NO_TEXT_TAGS = {"lexicon", "metadata"}
+
+
+def iter_ssml_windows(
+    root_element: etree.Element,
+    window_tags: typing.Collection[str] = SSML_WINDOW_TAGS,
+) -> typing.Iterable[etree.Element]:
+    """Split an SSML document into smaller documents that can be processed separately.
+
+    Each window is a <p> or <s> element, or the text between them, wrapped in
+    copies of its ancestors (<speak>, <voice>, <lang>, etc.) so that it keeps
+    the same scope. Content without text (<break>, <mark>) goes into the
+    following window, or the previous one at the end of an element.
+
+    A window is yielded once the next one has started, since trailing content
+    may still be added to it.
+    """
+    # Copy of last window and its ancestor copies (id of original -> copy)
+    last_window: typing.Optional[etree.Element] = None
+    last_copies: typing.Dict[int, etree.Element] = {}
+
+    def has_window(element: etree.Element) -> bool:
+        return any(tag_no_namespace(e.tag) in window_tags for e in element.iter())
+
+    def copy_element(element: etree.Element) -> etree.Element:
+        element_copy = copy.deepcopy(element)
+        element_copy.tail = None
+        return element_copy
+
+    def add_content(
+        parent: etree.Element, text: str, children: typing.List[etree.Element]
+    ):
+        if len(parent) > 0:
+            parent[-1].tail = (parent[-1].tail or "") + text
+        else:
+            parent.text = (parent.text or "") + text
+
+        parent.extend(children)
+
+    def wrap(
+        ancestors: typing.List[etree.Element],
+        text: str,
+        children: typing.List[etree.Element],
+    ):
+        nonlocal last_window, last_copies
+
+        window: typing.Optional[etree.Element] = None
+        inner: typing.Optional[etree.Element] = None
+        copies: typing.Dict[int, etree.Element] = {}
+
+        for ancestor in ancestors:
+            ancestor_copy = etree.Element(ancestor.tag, ancestor.attrib)
+            copies[id(ancestor)] = ancestor_copy
+
+            if inner is None:
+                window = ancestor_copy
+            else:
+                inner.append(ancestor_copy)
+
+            inner = ancestor_copy
+
+        assert (window is not None) and (inner is not None)
+        add_content(inner, text, children)
+
+        if last_window is not None:
+            yield last_window
+
+        last_window, last_copies = window, copies
+
+    def visit(
+        element: etree.Element,
+        ancestors: typing.List[etree.Element],
+        pending_text: str = "",
+        pending: typing.Optional[typing.List[etree.Element]] = None,
+    ):
+        path = ancestors + [element]
+
+        # Content between windows (pending_text is before the first element)
+        pending = list(pending or [])
+
+        def add_pending_text(text: typing.Optional[str]):
+            nonlocal pending_text
+            if pending:
+                pending[-1].tail = (pending[-1].tail or "") + (text or "")
+            else:
+                pending_text += text or ""
+
+        def has_text() -> bool:
+            return bool(pending_text.strip()) or any(
+                (e.tail or "").strip()
+                or (
+                    (tag_no_namespace(e.tag) not in SSML_NO_TEXT_TAGS)
+                    and "".join(e.itertext()).strip()
+                )
+                for e in pending
+            )
+
+        add_pending_text(element.text)
+
+        for child in element:
+            child_tag = tag_no_namespace(child.tag)
+            if (child_tag in window_tags) or has_window(child):
+                if has_text():
+                    yield from wrap(path, pending_text, pending)
+                    pending_text, pending = "", []
+
+                if child_tag in window_tags:
+                    yield from wrap(path, pending_text, pending + [copy_element(child)])
+                else:
+                    # Content without text goes into the child's first window
+                    yield from visit(child, path, pending_text, pending)
+
+                pending_text, pending = "", []
+            else:
+                pending.append(copy_element(child))
+
+            add_pending_text(child.tail)
+
+        if has_text() or (last_window is None):
+            yield from wrap(path, pending_text, pending)
+        elif id(element) in last_copies:
+            # Trailing <break>, <mark>, etc.
+            add_content(last_copies[id(element)], pending_text, pending)
+
+    yield from visit(root_element, [])
+
+    if last_window is not None:
+        yield last_window
+
+
 # -----------------------------------------------------------------------------
 # Text
 # -----------------------------------------------------------------------------
@@ -293,11 +558,310 @@ def maybe_split_ipa(s: str) -> typing.List[str]:
     return IPA.graphemes(s)
 
 
+def iter_text_windows(
+    lines: typing.Iterable[str],
+    max_chars: int,
+    major_breaks: typing.Collection[str] = (),
+    abbreviations: typing.Collection[REGEX_PATTERN] = (),
+) -> typing.Iterable[typing.Tuple[str, bool]]:
+    """Group lines of text into windows that end at paragraphs (blank lines).
+
+    Paragraphs longer than max_chars are split after the last major break
+    (followed by whitespace or at the end of a line). Breaks that are part of
+    an abbreviation (word with break matched by one of abbreviations, e.g.
+    "Dr. ") don't end a sentence. If no sentence has ended yet, the window
+    keeps filling, so a sentence is never split across windows. Without major
+    breaks, paragraphs are split at line endings.
+
+    Yields (window text, True if window starts a new paragraph).
+    """
+    break_pattern: typing.Optional[REGEX_PATTERN] = None
+    if major_breaks:
+        # Word ending in a major break, then whitespace or end of line
+        break_pattern = re.compile(
+            r"\S*(?:"
+            + "|".join(re.escape(b) for b in sorted(major_breaks, key=len, reverse=True))
+            + r")(?:\s+|$)"
+        )
+
+    def sentence_ends(line: str) -> typing.Iterable[int]:
+        """Indexes in line after each sentence that ends in it"""
+        if break_pattern is None:
+            return
+
+        for match in break_pattern.finditer(line):
+            word_text = match.group()
+            if not any(pattern.match(word_text) for pattern in abbreviations):
+                yield match.end()
+
+    def split_line(line: str) -> typing.Iterable[str]:
+        if (len(line) <= max_chars) or (break_pattern is None):
+            yield line
+            return
+
+        # Split after sentences in long lines
+        start_idx = 0
+        for end_idx in sentence_ends(line):
+            if end_idx > start_idx:
+                yield line[start_idx:end_idx]
+                start_idx = end_idx
+
+        if start_idx < len(line):
+            yield line[start_idx:]
+
+    def last_sentence_end(line: str) -> int:
+        """End of the last sentence in a line (0 if none ends in it)"""
+        end_idx = 0
+        for end_idx in sentence_ends(line):
+            pass
+
+        return end_idx
+
+    window_lines: typing.List[str] = []
+    num_chars = 0
+    new_paragraph = True
+
+    # Lines before this index have no sentence ending in them
+    num_checked_lines = 0
+
+    for line in lines:
+        if not line.strip():
+            # End of paragraph
+            if window_lines:
+                yield "".join(window_lines), new_paragraph
+                window_lines, num_chars, num_checked_lines = [], 0, 0
+
+            new_paragraph = True
+            continue
+
+        for line_part in split_line(line):
+            window_lines.append(line_part)
+            num_chars += len(line_part)
+
+            if num_chars < max_chars:
+                continue
+
+            if not major_breaks:
+                # No way to find sentences
+                yield "".join(window_lines), new_paragraph
+                window_lines, num_chars = [], 0
+                new_paragraph = False
+                continue
+
+            # Split paragraph after the last sentence
+            split_line_idx, split_char_idx = -1, 0
+            for line_idx in range(len(window_lines) - 1, num_checked_lines - 1, -1):
+                split_char_idx = last_sentence_end(window_lines[line_idx])
+                if split_char_idx > 0:
+                    split_line_idx = line_idx
+                    break
+
+            if split_line_idx < 0:
+                # Keep filling until a sentence ends
+                num_checked_lines = len(window_lines)
+                continue
+
+            last_line = window_lines[split_line_idx]
+            window_text = "".join(window_lines[:split_line_idx])
+            yield window_text + last_line[:split_char_idx], new_paragraph
+
+            window_lines = window_lines[split_line_idx + 1 :]
+            if split_char_idx < len(last_line):
+                window_lines.insert(0, last_line[split_char_idx:])
+
+            num_chars = sum(len(l) for l in window_lines)
+            num_checked_lines = len(window_lines)
+            new_paragraph = False
+
+    if window_lines:
+        yield "".join(window_lines), new_paragraph
+
+
 # -----------------------------------------------------------------------------
 # Graph
 # -----------------------------------------------------------------------------
 
 
+class TreeNode:
+    """Node in a DocumentTree with its data and edges"""
+
+    __slots__ = ("data", "children", "parents", "attrs")
+
+    def __init__(self, data: typing.Any = None):
+        self.data = data
+        self.children: typing.List[NODE_TYPE] = []
+        self.parents: typing.List[NODE_TYPE] = []
+
+        # Attributes besides data (rarely used)
+        self.attrs: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key == DATA_PROP:
+            return self.data
+
+        if self.attrs is None:
+            raise KeyError(key)
+
+        return self.attrs[key]
+
+    def __setitem__(self, key: str, value: typing.Any):
+        if key == DATA_PROP:
+            self.data = value
+        else:
+            if self.attrs is None:
+                self.attrs = {}
+
+            self.attrs[key] = value
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        """Get attribute or default"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class DocumentTree:
+    """Ordered tree of text nodes (default graph for TextProcessor).
+
+    Implements the subset of the networkx DiGraph interface in GraphType with
+    the same edge order. Nodes may have more than one parent (e.g., when
+    several words are collapsed into one).
+    """
+
+    __slots__ = ("nodes", "has_shared_nodes", "graph")
+
+    def __init__(self):
+        # node -> data and edges
+        self.nodes: typing.Dict[NODE_TYPE, TreeNode] = {}
+
+        # Attributes of the whole tree (same as networkx)
+        self.graph: typing.Dict[str, typing.Any] = {}
+
+        # True if any node has more than one parent
+        self.has_shared_nodes = False
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __iter__(self) -> typing.Iterator[NODE_TYPE]:
+        return iter(self.nodes)
+
+    def __contains__(self, node: NODE_TYPE) -> bool:
+        return node in self.nodes
+
+    def add_node(self, node: NODE_TYPE, **kwargs):
+        """Add a new node or update the attributes of an existing one"""
+        tree_node = self._get_or_add(node)
+        for key, value in kwargs.items():
+            tree_node[key] = value
+
+    def add_edge(self, src: NODE_TYPE, dst: NODE_TYPE):
+        """Add edge after the existing out edges of src"""
+        src_node = self._get_or_add(src)
+        dst_node = self._get_or_add(dst)
+
+        if src in dst_node.parents:
+            # Edge already exists
+            return
+
+        src_node.children.append(dst)
+        dst_node.parents.append(src)
+
+        if len(dst_node.parents) > 1:
+            self.has_shared_nodes = True
+
+    def add_edges_from(
+        self, edges: typing.Iterable[typing.Tuple[NODE_TYPE, NODE_TYPE]]
+    ):
+        """Add edges from iterable"""
+        for src, dst in edges:
+            self.add_edge(src, dst)
+
+    def remove_edges_from(
+        self, edges: typing.Iterable[typing.Tuple[NODE_TYPE, NODE_TYPE]]
+    ):
+        """Remove edges from iterable"""
+        # src -> {dst}
+        removed_edges: typing.Dict[NODE_TYPE, typing.Set[NODE_TYPE]] = {}
+        for src, dst in edges:
+            removed_edges.setdefault(src, set()).add(dst)
+
+        for src, dsts in removed_edges.items():
+            src_node = self.nodes.get(src)
+            if src_node is None:
+                continue
+
+            src_node.children = [c for c in src_node.children if c not in dsts]
+
+            for dst in dsts:
+                dst_node = self.nodes.get(dst)
+                if dst_node is not None:
+                    dst_node.parents = [p for p in dst_node.parents if p != src]
+
+    def out_degree(self, node: NODE_TYPE) -> int:
+        """Get number of children"""
+        return len(self.nodes[node].children)
+
+    def successors(self, node: NODE_TYPE) -> typing.Iterable[NODE_TYPE]:
+        """Yield children in order"""
+        return iter(self.nodes[node].children)
+
+    def predecessors(self, node: NODE_TYPE) -> typing.Iterable[NODE_TYPE]:
+        """Yield parents in order"""
+        return iter(self.nodes[node].parents)
+
+    def out_edges(
+        self, node: NODE_TYPE
+    ) -> typing.Iterable[typing.Tuple[NODE_TYPE, NODE_TYPE]]:
+        """Yield edges to children in order"""
+        return [(node, child) for child in self.nodes[node].children]
+
+    def dfs_preorder_nodes(self, source: NODE_TYPE) -> typing.Iterable[NODE_TYPE]:
+        """Yield nodes in depth-first pre-order (same as networkx)"""
+        nodes = self.nodes
+        stack = [source]
+
+        if not self.has_shared_nodes:
+            # Simple tree, nodes can't be reached twice
+            while stack:
+                node = stack.pop()
+                yield node
+                stack.extend(reversed(nodes[node].children))
+
+            return
+
+        visited: typing.Set[NODE_TYPE] = set()
+        while stack:
+            node = stack.pop()
+            if node in visited:
+                continue
+
+            visited.add(node)
+            yield node
+            stack.extend(reversed(nodes[node].children))
+
+    def _get_or_add(self, node: NODE_TYPE) -> TreeNode:
+        tree_node = self.nodes.get(node)
+        if tree_node is None:
+            tree_node = TreeNode()
+            self.nodes[node] = tree_node
+
+        return tree_node
+
+
+def dfs_preorder_nodes(
+    graph: GraphType, source: NODE_TYPE
+) -> typing.Iterable[NODE_TYPE]:
+    """Yield nodes of a DocumentTree or networkx graph in depth-first pre-order"""
+    if isinstance(graph, DocumentTree):
+        return graph.dfs_preorder_nodes(source)
+
+    import networkx as nx
+
+    return nx.dfs_preorder_nodes(graph, source)
+
+
 def print_graph(
     graph: GraphType,
     node: typing.Union[NODE_TYPE, Node],
@@ -322,7 +886,16 @@ def print_graph(
 
 def leaves(graph: GraphType, node: Node):
     """Iterate through the leaves of a graph in depth-first order"""
-    for dfs_node in nx.dfs_preorder_nodes(graph, node.node):
+    if isinstance(graph, DocumentTree):
+        tree_nodes = graph.nodes
+        for dfs_node in graph.dfs_preorder_nodes(node.node):
+            tree_node = tree_nodes[dfs_node]
+            if not tree_node.children:
+                yield tree_node.data
+
+        return
+
+    for dfs_node in dfs_preorder_nodes(graph, node.node):
         if not graph.out_degree(dfs_node) == 0:
             continue
 
@@ -367,3 +940,247 @@ def pipeline_transform_window(
             was_changed = True
 
     return was_changed
+
+
+class WorklistLeaf:
+    """Leaf in a LeafWorklist, linked to its neighbors in depth-first order.
+
+    key orders leaves without renumbering: leaves that replace an expanded
+    leaf get its key plus their position.
+    """
+
+    __slots__ = ("node", "key", "prev", "next", "removed")
+
+    def __init__(self, node: Node, key: typing.Tuple[int, ...]):
+        self.node = node
+        self.key = key
+        self.prev: typing.Optional["WorklistLeaf"] = None
+        self.next: typing.Optional["WorklistLeaf"] = None
+
+        # True when replaced by the leaves of its children
+        self.removed = False
+
+
+class LeafWorklist:
+    """Leaves of a tree in depth-first order for incremental pipeline passes.
+
+    Each pipeline step has a set of leaves that were created or changed since
+    it last ran, and only visits those (every leaf on its first run). Leaves
+    that get children are replaced in place, so repeated passes cost grows
+    with the number of changes instead of the size of the tree.
+    """
+
+    def __init__(self, graph: GraphType, root: Node):
+        self.graph = graph
+        self.first: typing.Optional[WorklistLeaf] = None
+        self.num_leaves = 0
+
+        # step key -> leaves created/changed since step last ran
+        self.dirty_sets: typing.Dict[typing.Any, typing.Set[WorklistLeaf]] = {}
+
+        # (step key, node) that were changed in place by a transform
+        self.transformed: typing.Set[typing.Tuple[typing.Any, NODE_TYPE]] = set()
+
+        # Number of leaves visited or created by steps (reset by caller)
+        self.num_touched = 0
+
+        self._replace(None, list(leaves(graph, root)))
+
+    def __iter__(self) -> typing.Iterator[WorklistLeaf]:
+        leaf = self.first
+        while leaf is not None:
+            yield leaf
+            leaf = leaf.next
+
+    def dirty(self, step_key: typing.Any) -> typing.List[WorklistLeaf]:
+        """Leaves changed since step last ran in depth-first order"""
+        dirty_set = self.dirty_sets.get(step_key)
+        if dirty_set is None:
+            # First run visits every leaf
+            self.dirty_sets[step_key] = set()
+            dirty_leaves = list(self)
+        else:
+            dirty_leaves = sorted(
+                (leaf for leaf in dirty_set if not leaf.removed),
+                key=lambda leaf: leaf.key,
+            )
+            dirty_set.clear()
+
+        self.num_touched += len(dirty_leaves)
+
+        return dirty_leaves
+
+    def dirty_leaves(self, step_key: typing.Any) -> typing.List[Node]:
+        """Leaf nodes changed since step last ran"""
+        return [leaf.node for leaf in self.dirty(step_key)]
+
+    def split(self, split_func) -> bool:
+        """Splits changed leaf nodes into zero or more sub-nodes (see pipeline_split)"""
+        dirty_leaves = self.dirty(split_func)
+        if not dirty_leaves:
+            return False
+
+        was_changed = False
+        graph = self.graph
+
+        for leaf in dirty_leaves:
+            leaf_node = leaf.node
+            for node_class, node_kwargs in split_func(graph, leaf_node):
+                new_node = node_class(node=len(graph), **node_kwargs)
+                graph.add_node(new_node.node, data=new_node)
+                graph.add_edge(leaf_node.node, new_node.node)
+                was_changed = True
+
+        self._update(dirty_leaves)
+
+        return was_changed
+
+    def transform(self, transform_func) -> bool:
+        """Transforms changed leaf nodes (see pipeline_transform)"""
+        dirty_leaves = self.dirty(transform_func)
+        if not dirty_leaves:
+            return False
+
+        was_changed = False
+        for leaf in dirty_leaves:
+            if not transform_func(self.graph, leaf.node):
+                continue
+
+            # Transforms report the same leaf again when it is revisited, so
+            # only the first report is a change.
+            transform_key = (transform_func, leaf.node.node)
+            if transform_key in self.transformed:
+                continue
+
+            self.transformed.add(transform_key)
+
+            # Changed for other steps, but not this one
+            self._changed([leaf], except_key=transform_func)
+            was_changed = True
+
+        self._update(dirty_leaves)
+
+        return was_changed
+
+    def transform_window(self, transform_func, window_size: int) -> bool:
+        """Transforms windows with a changed leaf (see pipeline_transform_window)"""
+        dirty_leaves = self.dirty(transform_func)
+        if not dirty_leaves:
+            return False
+
+        # First leaves of windows that contain a changed leaf
+        window_starts: typing.Set[WorklistLeaf] = set()
+        for leaf in dirty_leaves:
+            start_leaf = leaf
+            for _ in range(window_size - 1):
+                if start_leaf.prev is None:
+                    break
+
+                start_leaf = start_leaf.prev
+
+            while True:
+                window_starts.add(start_leaf)
+                if (start_leaf is leaf) or (start_leaf.next is None):
+                    break
+
+                start_leaf = start_leaf.next
+
+        # Windows are gathered before any are transformed
+        windows: typing.List[typing.List[WorklistLeaf]] = []
+        for start_leaf in sorted(window_starts, key=lambda leaf: leaf.key):
+            window: typing.List[WorklistLeaf] = []
+            window_leaf: typing.Optional[WorklistLeaf] = start_leaf
+            while (window_leaf is not None) and (len(window) < window_size):
+                window.append(window_leaf)
+                window_leaf = window_leaf.next
+
+            if len(window) == window_size:
+                windows.append(window)
+
+        was_changed = False
+        window_leaves: typing.Dict[WorklistLeaf, None] = {}
+
+        for window in windows:
+            window_leaves.update((leaf, None) for leaf in window)
+            self.num_touched += len(window)
+
+            if transform_func(self.graph, [leaf.node for leaf in window]):
+                self._changed(window, except_key=transform_func)
+                was_changed = True
+
+        self._update(sorted(window_leaves, key=lambda leaf: leaf.key))
+
+        return was_changed
+
+    def _changed(
+        self, changed_leaves: typing.Iterable[WorklistLeaf], except_key=None
+    ):
+        """Mark leaves as changed for every step (except one)"""
+        changed_leaves = list(changed_leaves)
+        for step_key, dirty_set in self.dirty_sets.items():
+            if step_key != except_key:
+                dirty_set.update(changed_leaves)
+
+    def _update(self, visited_leaves: typing.Iterable[WorklistLeaf]):
+        """Replace visited leaves that now have children with their own leaves"""
+        graph = self.graph
+        placed: typing.Set[NODE_TYPE] = set()
+        new_leaves: typing.List[WorklistLeaf] = []
+
+        for leaf in visited_leaves:
+            if leaf.removed or (graph.out_degree(leaf.node.node) == 0):
+                continue
+
+            child_nodes: typing.List[Node] = []
+            for leaf_node in leaves(graph, leaf.node):
+                if leaf_node.node in placed:
+                    # Shared node is placed under its first parent
+                    continue
+
+                placed.add(leaf_node.node)
+                child_nodes.append(leaf_node)
+
+            new_leaves.extend(self._replace(leaf, child_nodes))
+
+        if new_leaves:
+            # New leaves are changed for every step, including the current one
+            self._changed(new_leaves)
+            self.num_touched += len(new_leaves)
+
+    def _replace(
+        self, leaf: typing.Optional[WorklistLeaf], nodes: typing.Sequence[Node]
+    ) -> typing.List[WorklistLeaf]:
+        """Link leaves for nodes in place of leaf (or as the only leaves if None)"""
+        if leaf is None:
+            parent_key: typing.Tuple[int, ...] = ()
+            prev_leaf, next_leaf = None, None
+        else:
+            parent_key = leaf.key
+            prev_leaf, next_leaf = leaf.prev, leaf.next
+            leaf.removed = True
+            self.num_leaves -= 1
+
+        new_leaves = [
+            WorklistLeaf(node, parent_key + (node_idx,))
+            for node_idx, node in enumerate(nodes)
+        ]
+        self.num_leaves += len(new_leaves)
+
+        for new_leaf in new_leaves:
+            new_leaf.prev = prev_leaf
+            if prev_leaf is None:
+                self.first = new_leaf
+            else:
+                prev_leaf.next = new_leaf
+
+            prev_leaf = new_leaf
+
+        if prev_leaf is None:
+            self.first = next_leaf
+        else:
+            prev_leaf.next = next_leaf
+
+        if next_leaf is not None:
+            next_leaf.prev = prev_leaf
+
+        return new_leaves
@@ -273,6 +273,87 @@ def do_convert(args):
 # -----------------------------------------------------------------------------
 
 
+def do_benchmark(args):
+    """Time splitting of lexicon pronunciations into phonemes"""
+    import time
+
+    from gruut_ipa import Phonemes
+
+    if args.phonemes_file:
+        with open(args.phonemes_file, "r", encoding="utf-8") as phonemes_file:
+            phonemes = Phonemes.from_text(phonemes_file)
+    else:
+        phonemes = Phonemes.from_language(args.language)
+
+    # word<TAB>pronunciation or just pronunciation
+    pron_strs: typing.List[str] = []
+    for lexicon_path in args.lexicon:
+        _LOGGER.debug("Loading pronunciations from %s", lexicon_path)
+        with open(lexicon_path, "r", encoding="utf-8") as lexicon_file:
+            for line in lexicon_file:
+                line = line.strip()
+                if line:
+                    pron_strs.append(line.split("\t", maxsplit=1)[-1])
+
+    split_args = {"keep_stress": args.keep_stress, "drop_tones": args.drop_tones}
+
+    def print_time(name: str, seconds: float, num_phonemes: int):
+        print(
+            "{}: split {} pronunciation(s) into {} phoneme(s) in {:.3f} second(s) "
+            "({:.0f} pronunciation(s)/sec)".format(
+                name,
+                len(pron_strs),
+                num_phonemes,
+                seconds,
+                len(pron_strs) / seconds if seconds > 0 else 0,
+            )
+        )
+
+    def time_split(clear_cache: bool) -> typing.Tuple[float, typing.List]:
+        best_seconds = float("inf")
+        prons_phonemes: typing.List[typing.List[typing.Any]] = []
+        for _ in range(args.repeat):
+            if clear_cache:
+                phonemes.update()
+
+            start_time = time.perf_counter()
+            prons_phonemes = phonemes.split_many(pron_strs, **split_args)
+            best_seconds = min(best_seconds, time.perf_counter() - start_time)
+
+        return best_seconds, prons_phonemes
+
+    # Previous linear scan over all phonemes (timed once, since it's slow)
+    split_reference = phonemes._split_reference  # pylint: disable=protected-access
+
+    start_time = time.perf_counter()
+    reference_prons = [
+        split_reference(pron_str, **split_args) for pron_str in pron_strs
+    ]
+    reference_seconds = time.perf_counter() - start_time
+    print_time("reference", reference_seconds, sum(map(len, reference_prons)))
+
+    for name, clear_cache in [("uncached", True), ("cached", False)]:
+        seconds, prons_phonemes = time_split(clear_cache)
+        print_time(name, seconds, sum(map(len, prons_phonemes)))
+
+        num_different = sum(
+            1
+            for pron_phonemes, reference_phonemes in zip(
+                prons_phonemes, reference_prons
+            )
+            if [(p.text, p.unknown) for p in pron_phonemes]
+            != [(p.text, p.unknown) for p in reference_phonemes]
+        )
+        print(
+            "{}: speedup {:.2f}x, {} pronunciation(s) different from reference".format(
+                name, reference_seconds / seconds if seconds > 0 else 0, num_different
+            )
+        )
+
+
+# -----------------------------------------------------------------------------
+
+
 def get_args() -> argparse.Namespace:
     """Parse command-line arguments"""
     parser = argparse.ArgumentParser(prog="gruut_ipa")
@@ -371,6 +452,37 @@ def get_args() -> argparse.Namespace:
         "--separator", default=" ", help="Separator between phonemes (default: space)"
     )
 
+    # ---------
+    # benchmark
+    # ---------
+    benchmark_parser = sub_parsers.add_parser(
+        "benchmark", help="Time splitting of lexicon pronunciations into phonemes"
+    )
+    benchmark_parser.set_defaults(func=do_benchmark)
+    benchmark_parser.add_argument("language", help="Language code (e.g., ca-ca)")
+    benchmark_parser.add_argument(
+        "lexicon",
+        nargs="+",
+        help="Text file(s) with word<TAB>pronunciation or pronunciation lines",
+    )
+    benchmark_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed passes of split (best time is reported, reference is timed once) (default: 3)",
+    )
+    benchmark_parser.add_argument(
+        "--keep-stress",
+        action="store_true",
+        help="Keep primary/secondary stress markers",
+    )
+    benchmark_parser.add_argument(
+        "--drop-tones", action="store_true", help="Remove tone numbers/letters"
+    )
+    benchmark_parser.add_argument(
+        "--phonemes-file", help="Load phonemes from file instead of using language code"
+    )
+
     # Shared arguments
     for sub_parser in [
         print_parser,
@@ -378,6 +490,7 @@ def get_args() -> argparse.Namespace:
         phones_parser,
         phonemes_parser,
         convert_parser,
+        benchmark_parser,
     ]:
         sub_parser.add_argument(
             "--debug", action="store_true", help="Print DEBUG messages to console"
@@ -7,8 +7,6 @@ import sys
 import threading
 import typing
 
-import numpy as np
-
 from gruut_ipa.constants import (
     _CONSONANTS,
     _DATA_DIR,
@@ -31,6 +29,7 @@ def create_closest(
     ] = None
 ) -> _CLOSEST_TYPE:
     """Create mapping from each IPA symbol to a list of other IPA symbols reverse ordered by feature distance"""
+    import numpy as np
     import sklearn.metrics
 
     if not symbols:
@@ -639,6 +639,9 @@ class Phonemes:
 
     COMMENT_STR = "#"
 
+    # Maximum number of split pronunciations that are kept
+    SPLIT_CACHE_SIZE = 65536
+
     def __init__(self, phonemes=None, ipa_map=None):
         self.phonemes = phonemes or []
         self.ipa_map = ipa_map or {}
@@ -649,6 +652,14 @@ class Phonemes:
         # Phonemes sorted by descreasing length
         self._phonemes_sorted = None
 
+        # Trie of split phoneme IPA pieces (phoneme is stored under None)
+        self._phoneme_trie: typing.Dict[typing.Optional[str], typing.Any] = {}
+
+        # (pron_str, settings) -> split phonemes
+        self._split_cache: typing.Dict[
+            typing.Tuple[typing.Any, ...], typing.Tuple[Phoneme, ...]
+        ] = {}
+
         # Map from original phoneme to gruut IPA
         self.gruut_ipa_map: typing.Dict[str, str] = {}
 
@@ -796,6 +807,17 @@ class Phonemes:
             split_phonemes, key=lambda kp: len(kp[0]), reverse=True
         )
 
+        # Longest match wins in split, and the first phoneme wins a tie
+        self._phoneme_trie = {}
+        for phoneme_ipas, phoneme in self._phonemes_sorted:
+            node = self._phoneme_trie
+            for ipa in phoneme_ipas:
+                node = node.setdefault(ipa, {})
+
+            node.setdefault(None, phoneme)
+
+        self._split_cache = {}
+
         # Update IPA texts set for phonemes
         self.phoneme_texts = set(p.text for p in self.phonemes)
 
@@ -807,15 +829,61 @@ class Phonemes:
         drop_tones: bool = False,
         is_ipa: bool = True,
     ) -> typing.List[Phoneme]:
-        """Split an IPA pronunciation into phonemes"""
+        """Split an IPA pronunciation into phonemes.
+
+        Results for string pronunciations are cached, so the returned phonemes
+        may be shared between calls and should not be modified.
+        """
         if not self._ipa_map_regex:
             self.update()
 
         if keep_accents is None:
             keep_accents = keep_stress
 
-        word_phonemes: typing.List[Phoneme] = []
+        if not isinstance(pron_str, str):
+            return self._split(
+                pron_str,
+                keep_stress=keep_stress,
+                keep_accents=keep_accents,
+                drop_tones=drop_tones,
+                is_ipa=is_ipa,
+            )
 
+        cache_key = (pron_str, keep_stress, keep_accents, drop_tones, is_ipa)
+        cached_phonemes = self._split_cache.get(cache_key)
+        if cached_phonemes is None:
+            cached_phonemes = tuple(
+                self._split(
+                    pron_str,
+                    keep_stress=keep_stress,
+                    keep_accents=keep_accents,
+                    drop_tones=drop_tones,
+                    is_ipa=is_ipa,
+                )
+            )
+
+            if len(self._split_cache) >= Phonemes.SPLIT_CACHE_SIZE:
+                self._split_cache.clear()
+
+            self._split_cache[cache_key] = cached_phonemes
+
+        return list(cached_phonemes)
+
+    def split_many(
+        self, pron_strs: typing.Iterable[typing.Union[str, Pronunciation]], **split_args
+    ) -> typing.List[typing.List[Phoneme]]:
+        """Split many IPA pronunciations into phonemes with the same settings"""
+        return [self.split(pron_str, **split_args) for pron_str in pron_strs]
+
+    def _split_pieces(
+        self,
+        pron_str: typing.Union[str, Pronunciation],
+        keep_stress: bool,
+        keep_accents: bool,
+        drop_tones: bool,
+        is_ipa: bool,
+    ) -> typing.Tuple[typing.List[str], typing.List[str], typing.List[str]]:
+        """Split pronunciation into IPA pieces with stress/tones kept separate"""
         if self.ipa_map:
             if isinstance(pron_str, Pronunciation):
                 pron_str = "".join(p.text for p in pron_str)
@@ -843,8 +911,8 @@ class Phonemes:
             ipas = IPA.graphemes(pron_str)
 
         # Keep stress and tones separate to make phoneme comparisons easier
-        ipa_stress: typing.Dict[int, str] = defaultdict(str)
-        ipa_tones: typing.Dict[int, str] = defaultdict(str)
+        ipa_stress: typing.List[str] = [""] * len(ipas)
+        ipa_tones: typing.List[str] = [""] * len(ipas)
 
         if is_ipa:
             in_tone = False
@@ -874,9 +942,85 @@ class Phonemes:
 
                     ipas[ipa_idx] = keep_ipa
 
+        return ipas, ipa_stress, ipa_tones
+
+    def _split(
+        self,
+        pron_str: typing.Union[str, Pronunciation],
+        keep_stress: bool,
+        keep_accents: bool,
+        drop_tones: bool,
+        is_ipa: bool,
+    ) -> typing.List[Phoneme]:
+        word_phonemes: typing.List[Phoneme] = []
+        ipas, ipa_stress, ipa_tones = self._split_pieces(
+            pron_str, keep_stress, keep_accents, drop_tones, is_ipa
+        )
+
+        # Walk the phoneme trie from each piece, keeping the longest match
         num_ipas: int = len(ipas)
+        ipa_idx = 0
+        while ipa_idx < num_ipas:
+            ipa = ipas[ipa_idx]
 
-        # ---------------------------------------------------------------------
+            node = self._phoneme_trie
+            phoneme = node.get(None)
+            phoneme_len = 0
+            trie_idx = ipa_idx
+            while trie_idx < num_ipas:
+                node = node.get(ipas[trie_idx])
+                if node is None:
+                    break
+
+                trie_idx += 1
+                if None in node:
+                    phoneme = node[None]
+                    phoneme_len = trie_idx - ipa_idx
+
+            if phoneme is None:
+                # Add unknown phoneme
+                word_phonemes.append(Phoneme(text=ipa, unknown=True))
+                ipa_idx += 1
+                continue
+
+            phoneme_stress = "".join(ipa_stress[ipa_idx : ipa_idx + phoneme_len])
+            phoneme_tones = "".join(ipa_tones[ipa_idx : ipa_idx + phoneme_len])
+
+            if phoneme_stress or phoneme_tones:
+                # Create a copy of the phoneme with applied stress/tones
+                phoneme = Phoneme(
+                    text=(phoneme_stress + phoneme.text + phoneme_tones),
+                    example=phoneme.example,
+                )
+
+            word_phonemes.append(phoneme)
+
+            # Skip matched pieces
+            ipa_idx += max(1, phoneme_len)
+
+        return word_phonemes
+
+    def _split_reference(
+        self,
+        pron_str: typing.Union[str, Pronunciation],
+        keep_stress: bool = True,
+        keep_accents: typing.Optional[bool] = None,
+        drop_tones: bool = False,
+        is_ipa: bool = True,
+    ) -> typing.List[Phoneme]:
+        """Split by scanning every phoneme at each piece (for benchmarking)"""
+        if not self._ipa_map_regex:
+            self.update()
+
+        if keep_accents is None:
+            keep_accents = keep_stress
+
+        word_phonemes: typing.List[Phoneme] = []
+        ipas, ipa_stress, ipa_tones = self._split_pieces(
+            pron_str, keep_stress, keep_accents, drop_tones, is_ipa
+        )
+
+        num_ipas: int = len(ipas)
 
         # pylint: disable=consider-using-enumerate
         for ipa_idx in range(len(ipas)):
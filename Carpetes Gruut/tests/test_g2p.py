@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """Tests for GraphemesToPhonemes class"""
+import tempfile
 import unittest
+from pathlib import Path
 
 from gruut.g2p import GraphemesToPhonemes
+from gruut.lang import DelayedGraphemesToPhonemes
+from gruut.utils import find_lang_dir
 
 
 class GraphemesToPhonemesTestCase(unittest.TestCase):
@@ -31,6 +35,58 @@ class GraphemesToPhonemesTestCase(unittest.TestCase):
 
         self.assertEqual(expected_features, actual_features)
 
+    def test_encoded_features(self):
+        """Test that the fast feature path matches word2features"""
+        lang_dir = find_lang_dir("ca")
+        assert lang_dir is not None
+        g2p = GraphemesToPhonemes(Path(lang_dir) / "g2p" / "model.crf")
+
+        for word in ["a", "un", "test", "anticonstitucionalment", "l·lí"]:
+            self.assertEqual(
+                g2p.encoded_word2features(word),
+                GraphemesToPhonemes.word2features(word),
+            )
+
+
+class DelayedGraphemesToPhonemesTestCase(unittest.TestCase):
+    """Test cases for memoized grapheme to phoneme guesses"""
+
+    def setUp(self):
+        lang_dir = find_lang_dir("ca")
+        assert lang_dir is not None
+        self.model_path = Path(lang_dir) / "g2p" / "model.crf"
+
+    def test_cache(self):
+        """Test that repeated guesses come from the cache"""
+        guesser = DelayedGraphemesToPhonemes(self.model_path, transform_func=str.lower)
+        expected = GraphemesToPhonemes(self.model_path)("xqzt")
+
+        self.assertEqual(guesser("xqzt"), expected)
+        self.assertEqual(guesser("XQZT"), expected)
+        self.assertEqual(guesser.cache_stats.hits, 1)
+        self.assertEqual(guesser.cache_stats.misses, 1)
+
+    def test_guess_db(self):
+        """Test that guesses are reloaded from the sidecar database"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            guess_db_path = Path(temp_dir) / "guesses.db"
+
+            guesser = DelayedGraphemesToPhonemes(
+                self.model_path, guess_db_path=guess_db_path
+            )
+            expected = guesser("xqzt")
+            guesser.flush()
+            guesser.guess_db.close()
+
+            # CRF model is never loaded on a warm restart
+            guesser = DelayedGraphemesToPhonemes(
+                self.model_path, guess_db_path=guess_db_path
+            )
+            self.assertEqual(guesser("xqzt"), expected)
+            self.assertEqual(guesser.num_guess_db_hits, 1)
+            self.assertIsNone(guesser.g2p)
+            guesser.guess_db.close()
+
 
 # -----------------------------------------------------------------------------
 
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Tests for PhonetisaurusGraph class"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from gruut.g2p_phonetisaurus import PhonetisaurusGraph
+
+# grapheme(s) -> possible phonemes
+MAPPINGS = {
+    "a": ["a", "ə"],
+    "e": ["e", "ɛ", "ə"],
+    "o": ["o", "ɔ", "u"],
+    "i": ["i"],
+    "u": ["u", "w"],
+    "c": ["k", "s"],
+    "d": ["d"],
+    "l": ["l"],
+    "m": ["m"],
+    "n": ["n"],
+    "r": ["r", "ɾ"],
+    "s": ["s", "z", "_"],
+    "t": ["t"],
+    "l|l": ["ʎ"],
+    "n|y": ["ɲ"],
+    "q|u": ["k"],
+    "x": ["ʃ", "k|s"],
+}
+
+WORDS = [
+    "casa",
+    "llamp",
+    "nyo",
+    "quelcom",
+    "x",
+    "anticonstitucionalment",
+    "desoxiribonucleic",
+    "",
+]
+
+
+def make_graph(seed: int = 0):
+    """Create a small random graph with one state per grapheme context"""
+    rng = np.random.RandomState(seed)
+    symbols = {"<eps>": 0}
+    contexts = sorted({g.split("|")[-1] for g in MAPPINGS})
+    context_nodes = {c: i + 2 for i, c in enumerate(contexts)}
+    start_node, backoff_node = 0, 1
+
+    edges = []
+    edge_probs = []
+    for from_node in [start_node, backoff_node] + list(context_nodes.values()):
+        is_context = from_node not in (start_node, backoff_node)
+        if is_context:
+            edges.append((from_node, backoff_node, 0, 0))
+            edge_probs.append(rng.uniform(0.5, 2))
+
+        for g, ps in MAPPINGS.items():
+            if is_context and (rng.rand() < 0.5):
+                continue
+
+            for p in ps:
+                ilabel = symbols.setdefault(g, len(symbols))
+                olabel = symbols.setdefault(p, len(symbols))
+                edges.append((from_node, context_nodes[g[-1]], ilabel, olabel))
+                edge_probs.append(rng.uniform(0.1, 5))
+
+    final_nodes = sorted(context_nodes.values())
+
+    return {
+        "start_node": np.array([start_node], dtype=np.int32),
+        "edges": np.array(edges, dtype=np.int32),
+        "edge_probs": np.array(edge_probs, dtype=np.float32),
+        "final_nodes": np.array(final_nodes, dtype=np.int32),
+        "final_probs": rng.uniform(0, 1, len(final_nodes)).astype(np.float32),
+        "symbols": np.array(
+            [k for k, v in sorted(symbols.items(), key=lambda kv: kv[1])], dtype=object
+        ),
+    }
+
+
+class PhonetisaurusGraphTestCase(unittest.TestCase):
+    """Test cases for PhonetisaurusGraph class"""
+
+    def test_vectorized(self):
+        """Test that vectorized search matches the Python search"""
+        graph = make_graph()
+
+        for max_guesses in [1, 3]:
+            expected = list(
+                PhonetisaurusGraph(graph, preload=True).g2p(
+                    WORDS, max_guesses=max_guesses, beam=500
+                )
+            )
+            actual = list(
+                PhonetisaurusGraph(graph, vectorized=True).g2p(
+                    WORDS, max_guesses=max_guesses, beam=500
+                )
+            )
+
+            self.assertEqual(expected, actual)
+
+        self.assertEqual(expected[0][:2], ("casa", ["c", "a", "s", "a"]))
+        self.assertTrue(expected[0][2])
+
+    def test_preload(self):
+        """Test that preloaded (CSR) and lazily loaded graphs give the same guesses"""
+        graph = make_graph()
+        expected = list(PhonetisaurusGraph(graph).g2p(WORDS, max_guesses=3))
+        actual = list(
+            PhonetisaurusGraph(graph, preload=True).g2p(WORDS, max_guesses=3)
+        )
+
+        self.assertEqual(expected, actual)
+
+    def test_load_mmap(self):
+        """Test loading a graph from memory-mapped .npy files"""
+        graph = make_graph()
+        expected = list(PhonetisaurusGraph(graph).g2p(WORDS, max_guesses=3))
+
+        # Stored CSR offsets are used as-is
+        graph["edge_offsets"] = PhonetisaurusGraph(graph).get_csr().offsets
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for array_name, array in graph.items():
+                if array.dtype == object:
+                    array = array.astype(str)
+
+                np.save(Path(temp_dir) / f"{array_name}.npy", array)
+
+            phon_graph = PhonetisaurusGraph.load(temp_dir, preload=True)
+            self.assertIsInstance(phon_graph.edges, np.memmap)
+            self.assertEqual(
+                expected, list(phon_graph.g2p(WORDS, max_guesses=3)),
+            )
+
+    def test_batch(self):
+        """Test that batches are guessed in input order with duplicates"""
+        graph = make_graph()
+        words = WORDS + list(reversed(WORDS)) + [["l", "l", "o", "c"]]
+
+        phon_graph = PhonetisaurusGraph(graph)
+        expected = [
+            guess
+            for word in words
+            for guess in PhonetisaurusGraph(graph).g2p([word], max_guesses=2)
+        ]
+
+        self.assertEqual(expected, list(phon_graph.g2p(words, max_guesses=2)))
+        self.assertEqual(
+            expected,
+            list(
+                phon_graph.g2p(words, num_workers=2, batch_size=3, max_guesses=2)
+            ),
+        )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
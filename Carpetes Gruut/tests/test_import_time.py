@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tests for import gruut cold-start time"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Maximum seconds for "import gruut" in a fresh interpreter.
+# Was about 1 second when babel, dateparser, num2words, and numpy were imported
+# eagerly, and is about 0.2 seconds without them.
+IMPORT_TIME_BUDGET = 0.75
+
+# Modules that should only be imported when they're first needed
+LAZY_MODULES = ["asyncio", "babel", "dateparser", "num2words", "networkx", "numpy"]
+
+_IMPORT_CODE = """
+import json, sys, time
+start_time = time.perf_counter()
+import gruut
+print(json.dumps({
+    "seconds": time.perf_counter() - start_time,
+    "modules": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (
+    LAZY_MODULES,
+)
+
+
+def import_gruut() -> dict:
+    """Import gruut in a fresh interpreter and report time/loaded modules"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+
+    # Run outside of the source directory so the current directory isn't on sys.path
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_CODE],
+        env=env,
+        cwd=tempfile.gettempdir(),
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    """Regression tests for import gruut"""
+
+    def test_lazy_modules(self):
+        """Test that heavy dependencies aren't imported with gruut"""
+        self.assertEqual(import_gruut()["modules"], [])
+
+    def test_import_time(self):
+        """Test that import gruut is within budget"""
+        # Best of a few runs to avoid noise from the rest of the system
+        seconds = min(import_gruut()["seconds"] for _ in range(3))
+        self.assertLess(seconds, IMPORT_TIME_BUDGET)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
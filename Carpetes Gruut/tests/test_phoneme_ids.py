@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Tests for integer phoneme ids"""
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from gruut.const import Sentence, Word
+from gruut.phoneme_ids import (
+    BOS,
+    EOS,
+    WORD_BREAK,
+    PhonemeIdCorpus,
+    PhonemeIdCorpusWriter,
+    PhonemeInventory,
+    read_lang_phonemes,
+)
+from gruut.utils import find_lang_dir
+
+
+def make_sentence() -> Sentence:
+    """Sentence for "un gos, gat." """
+    return Sentence(
+        idx=0,
+        text="un gos, gat.",
+        text_with_ws="un gos, gat.",
+        text_spoken="un gos gat",
+        words=[
+            Word(idx=0, text="un", text_with_ws="un ", phonemes=["ˈu", "n"]),
+            Word(idx=1, text="gos", text_with_ws="gos", phonemes=["g", "o", "s"]),
+            Word(idx=2, text=",", text_with_ws=", ", phonemes=["|"], is_break=True),
+            Word(idx=3, text="gat", text_with_ws="gat", phonemes=["g", "a", "t"]),
+            Word(idx=4, text=".", text_with_ws=".", phonemes=["‖"], is_break=True),
+        ],
+    )
+
+
+class PhonemeIdsTestCase(unittest.TestCase):
+    """Test cases for phoneme ids"""
+
+    def test_sentence_ids(self):
+        """Test ids with stress, word breaks, and breaks"""
+        inventory = PhonemeInventory.from_language("ca")
+        ids = inventory.sentence_ids(make_sentence())
+
+        symbols = inventory.symbols
+        self.assertEqual(
+            [symbols[i] for i in ids],
+            [BOS, "ˈ", "u", "n", WORD_BREAK, "g", "o", "s", "|"]
+            + ["g", "a", "t", "‖", EOS],
+        )
+
+        # No breaks or word breaks
+        ids = inventory.sentence_ids(
+            make_sentence(), word_breaks=False, breaks=False, bos_eos=False
+        )
+        self.assertEqual(
+            [symbols[i] for i in ids], ["ˈ", "u", "n", "g", "o", "s", "g", "a", "t"]
+        )
+
+    def test_lang_dir(self):
+        """Test that lexicon phonemes are in the inventory before any input"""
+        lang_dir = find_lang_dir("ca")
+        lang_phonemes = read_lang_phonemes(lang_dir)
+        for phoneme in ["ə", "ʃ", "ʒ", "w"]:
+            self.assertIn(phoneme, lang_phonemes)
+
+        # Stress has its own id
+        self.assertFalse(any(p.startswith("ˌ") for p in lang_phonemes))
+
+        inventory = PhonemeInventory.from_language("ca", lang_dir=lang_dir)
+        self.assertEqual(
+            inventory.phoneme_ids,
+            PhonemeInventory.from_language("ca", lang_dir=lang_dir).phoneme_ids,
+        )
+
+        num_ids = inventory.num_ids
+        self.assertEqual(len(inventory.ids("ˈə")), 2)
+        self.assertEqual(inventory.ids("ʘ"), ())
+        self.assertEqual(inventory.num_ids, num_ids)
+        self.assertEqual(inventory.unknown_counts, {"ʘ": 1})
+
+    def test_table(self):
+        """Test user-supplied table with missing phonemes"""
+        table = "^ 1\n$ 2\n# 3\nu 4\nn 5\ng 6\no 7\ns 8\n"
+        inventory = PhonemeInventory.from_text(io.StringIO(table))
+        ids = inventory.sentence_ids(make_sentence(), breaks=False)
+
+        self.assertEqual(list(ids), [1, 4, 5, 3, 6, 7, 8, 3, 6, 2])
+        self.assertEqual(inventory.unknown_counts, {"a": 1, "t": 1})
+
+    def test_corpus(self):
+        """Test writing and loading a packed corpus"""
+        inventory = PhonemeInventory.from_language("ca")
+        expected_ids = list(inventory.sentence_ids(make_sentence()))
+
+        writer = PhonemeIdCorpusWriter(inventory)
+        writer.add_many([make_sentence(), make_sentence()])
+        self.assertEqual(len(writer), 2)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for corpus_name in ["corpus.npz", "corpus"]:
+                corpus_path = Path(temp_dir) / corpus_name
+                writer.save(corpus_path)
+
+                corpus = PhonemeIdCorpus.load(corpus_path)
+                self.assertEqual(len(corpus), 2)
+                self.assertEqual([list(ids) for ids in corpus], [expected_ids] * 2)
+                self.assertEqual(list(corpus.symbols), inventory.symbols)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
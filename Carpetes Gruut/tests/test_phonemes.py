@@ -77,6 +77,48 @@ class PhonemesTestCase(unittest.TestCase):
         phoneme_strs = [p.text for p in pron_phonemes]
         self.assertEqual(phoneme_strs, ["a˨˦", "x", "oj˧˧"])
 
+    def test_split_many(self):
+        """Test Phonemes.split_many with cached and unknown pronunciations"""
+        pron_strs = ["/dʒʌst/", "/kˈaʊ/", "/dʒʌst/", "/ʀ/"]
+
+        lang_phonemes = Phonemes.from_language("en-us")
+        prons_phonemes = lang_phonemes.split_many(pron_strs, keep_stress=True)
+
+        self.assertEqual(
+            [[p.text for p in pron_phonemes] for pron_phonemes in prons_phonemes],
+            [["d͡ʒ", "ʌ", "s", "t"], ["k", "ˈaʊ"], ["d͡ʒ", "ʌ", "s", "t"], ["ʀ"]],
+        )
+        self.assertTrue(prons_phonemes[-1][0].unknown)
+
+        # Cached results are copied, so callers can't change them
+        prons_phonemes[0].clear()
+        self.assertEqual(len(lang_phonemes.split("/dʒʌst/", keep_stress=True)), 4)
+
+    def test_split_reference(self):
+        """Test that Phonemes.split matches the previous linear-scan split"""
+        for lang, pron_str in [
+            ("en-us", "/dʒʌst ə kˈaʊ/"),
+            ("cs-cz", "/neu̯rt͡ʃɪtou̯/"),
+            ("fr-fr", "/ɑɑ̃/"),
+            ("pt", "/ɐ̃pliɐ̃w̃/"),
+            ("vi-n", "/a˨˦xoj˧˧/"),
+        ]:
+            lang_phonemes = Phonemes.from_language(lang)
+            for keep_stress in [True, False]:
+                self.assertEqual(
+                    [
+                        (p.text, p.unknown)
+                        for p in lang_phonemes.split(pron_str, keep_stress=keep_stress)
+                    ],
+                    [
+                        (p.text, p.unknown)
+                        for p in lang_phonemes._split_reference(
+                            pron_str, keep_stress=keep_stress
+                        )
+                    ],
+                    (lang, pron_str, keep_stress),
+                )
+
 
 # -----------------------------------------------------------------------------
 
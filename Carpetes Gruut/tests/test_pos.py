@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 """Tests for PartOfSpeechTagger class"""
 import copy
+import tempfile
 import unittest
+from pathlib import Path
 
+import pycrfsuite
+
+from gruut.lang import DelayedPartOfSpeechTagger
 from gruut.pos import PartOfSpeechTagger
+from gruut.text_processor import TextProcessor, TextProcessorSettings
+
+# (words, tags) for a tiny model
+TRAIN_SENTENCES = [
+    ("the cat sleeps .", "DET NOUN VERB PUNCT"),
+    ("a dog runs .", "DET NOUN VERB PUNCT"),
+    ("the dog sleeps here .", "DET NOUN VERB ADV PUNCT"),
+]
 
 
 class PartOfSpeechTaggerTestCase(unittest.TestCase):
@@ -82,6 +95,49 @@ class PartOfSpeechTaggerTestCase(unittest.TestCase):
 
         self.assertEqual(expected_features, actual_features)
 
+    def test_sent2features_word2features(self):
+        """Test that sentence features match features of each word"""
+        sentence = "the dog sleeps here .".split()
+        self.assertEqual(
+            PartOfSpeechTagger.sent2features(sentence),
+            [
+                PartOfSpeechTagger.word2features(sentence, i)
+                for i in range(len(sentence))
+            ],
+        )
+
+    def test_tag_many(self):
+        """Test batch tagging of sentences (directly and by TextProcessor)"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model_path = Path(temp_dir) / "model.crf"
+            trainer = pycrfsuite.Trainer(verbose=False)
+            for words, tags in TRAIN_SENTENCES:
+                trainer.append(
+                    PartOfSpeechTagger.sent2features(words.split()), tags.split()
+                )
+
+            trainer.train(str(model_path))
+
+            tagger = DelayedPartOfSpeechTagger(model_path)
+            sentences = [words.split() for words, _tags in TRAIN_SENTENCES]
+            self.assertEqual(
+                tagger.tag_many(sentences), [tagger(words) for words in sentences]
+            )
+
+            processor = TextProcessor(
+                default_lang="en_US",
+                settings={
+                    "en_US": TextProcessorSettings(
+                        lang="en_US", get_parts_of_speech=tagger
+                    )
+                },
+            )
+            graph, root = processor("the cat sleeps . a dog runs .", phonemize=False)
+            self.assertEqual(
+                [w.pos for w in processor.words(graph, root)],
+                "DET NOUN VERB PUNCT DET NOUN VERB PUNCT".split(),
+            )
+
 
 # -----------------------------------------------------------------------------
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Tests for the shared model registry"""
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import gruut
+from gruut import get_text_processor, sentences
+from gruut.registry import MODEL_REGISTRY, ModelRegistry
+
+
+class ModelRegistryTestCase(unittest.TestCase):
+    """Test cases for ModelRegistry"""
+
+    def test_sqlite_pool(self):
+        """Test that pooled connections are shared and read-only"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "lexicon with spaces.db"
+            with sqlite3.connect(str(db_path)) as db_conn:
+                db_conn.execute("CREATE TABLE word_phonemes (word TEXT)")
+                db_conn.execute("INSERT INTO word_phonemes VALUES ('hola')")
+
+            registry = ModelRegistry()
+            db_pool = registry.get_sqlite_pool(db_path)
+            self.assertIs(registry.get_sqlite_pool(str(db_path)), db_pool)
+
+            rows = []
+
+            def select_word():
+                rows.append(
+                    db_pool.execute("SELECT word FROM word_phonemes").fetchone()
+                )
+
+            threads = [threading.Thread(target=select_word) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(rows, [("hola",)] * len(threads))
+
+            with self.assertRaises(sqlite3.OperationalError):
+                db_pool.execute("INSERT INTO word_phonemes VALUES ('adéu')")
+
+            registry.clear()
+            self.assertEqual(len(registry), 0)
+
+    def test_shared_models(self):
+        """Test that models are loaded once and shared between threads"""
+        text = "Tinc 3 gats i un gos."
+        expected = [
+            (w.text, w.phonemes) for s in sentences(text, lang="ca") for w in s
+        ]
+
+        num_models = len(MODEL_REGISTRY)
+        self.assertGreater(num_models, 0)
+
+        results = []
+
+        def process_text():
+            results.append(
+                [(w.text, w.phonemes) for s in sentences(text, lang="ca") for w in s]
+            )
+
+        threads = [threading.Thread(target=process_text) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [expected] * len(threads))
+        self.assertEqual(len(MODEL_REGISTRY), num_models)
+
+    def test_processor_per_lang(self):
+        """Test that sentences() keeps a processor per language"""
+        ca_processor = get_text_processor("ca")
+        self.assertIs(get_text_processor("ca"), ca_processor)
+        self.assertEqual(ca_processor.default_lang, "ca-ca")
+
+        oc_processor = get_text_processor("oc")
+        self.assertIsNot(oc_processor, ca_processor)
+        self.assertEqual(oc_processor.default_lang, "oc-oc")
+
+    def test_processor_lang_aliases(self):
+        """Test that language aliases share a processor and unknown ones are bounded"""
+        ca_processor = get_text_processor("ca")
+        for lang in ["CA", "ca-ca", "CA_CA"]:
+            self.assertIs(get_text_processor(lang), ca_processor)
+
+        num_processors = len(gruut._PROCESSORS)
+        es_processor = get_text_processor("ca-ES")
+        self.assertIs(get_text_processor("ca_ES"), es_processor)
+        self.assertIsNot(es_processor, ca_processor)
+
+        for lang_idx in range(gruut.OTHER_PROCESSORS_SIZE + 1):
+            get_text_processor(f"xx-{lang_idx}")
+
+        self.assertEqual(len(gruut._PROCESSORS), num_processors)
+        self.assertEqual(len(gruut._OTHER_PROCESSORS), gruut.OTHER_PROCESSORS_SIZE)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests for sentence serialization"""
+import dataclasses
+import io
+import json
+import unittest
+
+from gruut import sentences
+from gruut.serialize import JsonLinesWriter, SentenceEncoder
+
+
+class SerializeTestCase(unittest.TestCase):
+    """Test cases for SentenceEncoder and JsonLinesWriter"""
+
+    def test_encoder(self):
+        """Test that encoded sentences match dataclasses.asdict"""
+        encoder = SentenceEncoder()
+        for sentence in sentences("Tinc 3 gats, i un gos.", lang="ca"):
+            self.assertEqual(encoder.to_dict(sentence), dataclasses.asdict(sentence))
+            self.assertEqual(
+                json.loads(encoder.encode(sentence, {"phoneme_ids": [1, 2]})),
+                {**dataclasses.asdict(sentence), "phoneme_ids": [1, 2]},
+            )
+
+    def test_fields(self):
+        """Test selecting sentence and word fields"""
+        encoder = SentenceEncoder(["text", "phonemes"])
+        sentence = next(iter(sentences("Un gos.", lang="ca")))
+
+        self.assertEqual(
+            json.loads(encoder.encode(sentence)),
+            {
+                "text": "Un gos.",
+                "words": [
+                    {"text": "Un", "phonemes": ["u", "n"]},
+                    {"text": "gos", "phonemes": ["g", "o", "s"]},
+                    {"text": ".", "phonemes": ["‖"]},
+                ],
+            },
+        )
+
+        with self.assertRaises(ValueError):
+            SentenceEncoder(["text", "bogus"])
+
+    def test_writer(self):
+        """Test that lines are written in batches"""
+        out_file = io.StringIO()
+        writer = JsonLinesWriter(out_file, flush_every=2)
+
+        writer.write({"a": 1})
+        self.assertEqual(out_file.getvalue(), "")
+
+        writer.write({"b": 2})
+        writer.write({"c": 3})
+        self.assertEqual(len(out_file.getvalue().splitlines()), 2)
+
+        writer.close()
+        self.assertEqual(
+            [json.loads(line) for line in out_file.getvalue().splitlines()],
+            [{"a": 1}, {"b": 2}, {"c": 3}],
+        )
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
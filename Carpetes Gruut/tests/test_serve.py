@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Tests for gruut server"""
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from gruut import sentences
+from gruut.serve import GruutServer, LatencyHistogram
+
+
+class GruutServerTestCase(unittest.TestCase):
+    """Test cases for GruutServer"""
+
+    def test_histogram(self):
+        """Test latency histogram buckets"""
+        histogram = LatencyHistogram(bucket_bounds_ms=(1, 10))
+        for latency_ms in [0.5, 1, 5, 50]:
+            histogram.add(latency_ms)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.to_dict()["count"], 4)
+        self.assertEqual(histogram.to_dict()["max_ms"], 50)
+
+    def test_pipelined_requests(self):
+        """Test that pipelined requests are answered in order"""
+        texts = ["Hola món.", "Tinc 3 gats.", "Adéu."]
+
+        async def run_client(socket_path):
+            reader, writer = await asyncio.open_unix_connection(str(socket_path))
+            for request_id, text in enumerate(texts):
+                writer.write(
+                    (json.dumps({"id": request_id, "text": text}) + "\n").encode()
+                )
+
+            writer.write(b"not json\n")
+            writer.write(b'{"id": "s", "stats": true}\n')
+            await writer.drain()
+
+            responses = [
+                json.loads(await reader.readline()) for _ in range(len(texts) + 2)
+            ]
+            writer.close()
+
+            return responses
+
+        async def run_test(socket_path):
+            server = GruutServer(["ca"])
+            await server.preload()
+
+            async_server = await asyncio.start_unix_server(
+                server.handle_client, path=str(socket_path)
+            )
+            async with async_server:
+                return await asyncio.gather(
+                    run_client(socket_path), run_client(socket_path)
+                )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            all_responses = asyncio.run(run_test(Path(temp_dir) / "gruut.sock"))
+
+        for responses in all_responses:
+            self.assertEqual([r["id"] for r in responses[: len(texts)]], [0, 1, 2])
+            self.assertEqual(
+                [s["text"] for s in responses[1]["sentences"]],
+                [s.text for s in sentences(texts[1], lang="ca")],
+            )
+
+            self.assertIn("error", responses[len(texts)])
+            self.assertEqual(responses[-1]["id"], "s")
+            self.assertGreaterEqual(
+                responses[-1]["stats"]["latency"]["count"], len(texts) + 1
+            )
+
+    def test_request_too_long(self):
+        """Test that an over-long request gets an error before disconnecting"""
+
+        async def run_test(socket_path):
+            server = GruutServer(["ca"])
+            async_server = await asyncio.start_unix_server(
+                server.handle_client, path=str(socket_path), limit=1024
+            )
+            async with async_server:
+                reader, writer = await asyncio.open_unix_connection(str(socket_path))
+                writer.write(b'{"id": 0, "text": "Hola."}\n')
+                writer.write(b"x" * 4096 + b"\n")
+                await writer.drain()
+
+                response_lines = (await reader.read()).splitlines()
+                responses = [json.loads(line) for line in response_lines]
+                writer.close()
+
+                return responses
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            responses = asyncio.run(run_test(Path(temp_dir) / "gruut.sock"))
+
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(responses[0]["id"], 0)
+        self.assertIsNone(responses[1]["id"])
+        self.assertIn("too long", responses[1]["error"])
+
+    def test_client_gone_with_pending_requests(self):
+        """Test that a client with more than max_pending requests can disconnect"""
+
+        class DisconnectedWriter:
+            """Stream writer of a client that has gone away"""
+
+            def __init__(self):
+                self.closed = False
+
+            def write(self, data):
+                pass
+
+            async def drain(self):
+                raise ConnectionResetError()
+
+            def close(self):
+                self.closed = True
+
+        async def run_test():
+            server = GruutServer(["ca"], max_pending=2)
+            reader = asyncio.StreamReader()
+            for request_id in range(10):
+                reader.feed_data(
+                    (json.dumps({"id": request_id, "text": "Hola."}) + "\n").encode()
+                )
+
+            # Client never sends EOF
+            writer = DisconnectedWriter()
+            await asyncio.wait_for(server.handle_client(reader, writer), timeout=10)
+
+            return server, writer
+
+        server, writer = asyncio.run(run_test())
+        self.assertTrue(writer.closed)
+        self.assertEqual(server.num_clients, 0)
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 """Tests for phonemization"""
+import sqlite3
+import tempfile
 import unittest
+from pathlib import Path
 
 from gruut import sentences
+from gruut.lexicon2db import LEXICON_SCHEMA_VERSION, load_lexicons, upgrade_database
+from gruut.lexicon2mmap import write_mmap_lexicon
+from gruut.phonemize import (
+    MmapPhonemizer,
+    SqlitePhonemizer,
+    get_schema_version,
+    is_lexicon_indexed,
+)
+from gruut.utils import remove_non_word_chars
 
 # Translation from https://omniglot.com for:
 # My hovercraft is full of eels.
@@ -269,6 +281,178 @@ class PhonemizerTestCase(unittest.TestCase):
         )
 
 
+class SqlitePhonemizerTestCase(unittest.TestCase):
+    """Test cases for SqlitePhonemizer"""
+
+    def setUp(self):
+        self.db_conn = sqlite3.connect(":memory:")
+        self.db_conn.execute(
+            "CREATE TABLE word_phonemes "
+            + "(id INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT, pron_order INTEGER, phonemes TEXT, role TEXT);"
+        )
+        self.db_conn.executemany(
+            "INSERT INTO word_phonemes (word, pron_order, phonemes, role) VALUES (?, ?, ?, ?)",
+            [
+                ("casa", 0, "k a z ə", ""),
+                ("dona", 0, "d ɔ n ə", "gruut:NOUN"),
+                ("dona", 1, "d o n ə", "gruut:VERB"),
+                ("l'home", 0, "l ɔ m ə", ""),
+            ],
+        )
+
+    def make_phonemizer(self, **kwargs):
+        """Create phonemizer with the same transforms as get_settings"""
+        return SqlitePhonemizer(
+            self.db_conn,
+            word_transform_funcs=[
+                str.lower,
+                remove_non_word_chars,
+                lambda s: remove_non_word_chars(s.lower()),
+            ],
+            **kwargs,
+        )
+
+    def test_lookup_many(self):
+        """Test that batched lookup matches word-by-word lookup"""
+        words = ["casa", "Casa", "dona", "dona", "L'home", "lhome", "gat", "casa!"]
+        roles = [None, None, "gruut:VERB", None, None, None, None, None]
+
+        expected = [
+            self.make_phonemizer()(word, role=role) for word, role in zip(words, roles)
+        ]
+        actual = self.make_phonemizer().lookup_many(words, roles)
+
+        self.assertEqual(expected, actual)
+        self.assertEqual(actual[1], ["k", "a", "z", "ə"])
+        self.assertEqual(actual[2], ["d", "o", "n", "ə"])
+        self.assertIsNone(actual[6])
+
+    def test_lookup_many_no_transforms(self):
+        """Test batched lookup without word transforms"""
+        phonemizer = self.make_phonemizer()
+        self.assertEqual(
+            phonemizer.lookup_many(["casa", "Casa"], do_transforms=False),
+            [["k", "a", "z", "ə"], None],
+        )
+
+    def test_lookup_prons(self):
+        """Test getting all pronunciations of a word by role"""
+        phonemizer = self.make_phonemizer()
+        dona_prons = {
+            "gruut:NOUN": ["d", "ɔ", "n", "ə"],
+            "gruut:VERB": ["d", "o", "n", "ə"],
+        }
+
+        self.assertIsNone(phonemizer.lookup_prons("Dona", do_transforms=False))
+        self.assertEqual(phonemizer.lookup_prons("Dona"), dona_prons)
+        self.assertIsNone(phonemizer.lookup_prons("gat"))
+        self.assertEqual(
+            phonemizer.lookup_prons_many(["dona", "gat", "Casa"]),
+            [dona_prons, None, {"": ["k", "a", "z", "ə"]}],
+        )
+
+    def test_cache_size(self):
+        """Test that the lexicon cache is bounded"""
+        phonemizer = self.make_phonemizer(cache_size=2)
+        for word in ["casa", "dona", "l'home", "casa"]:
+            self.assertIsNotNone(phonemizer(word))
+
+        self.assertLessEqual(len(phonemizer.lexicon), 2)
+        self.assertGreater(phonemizer.cache_stats.evictions, 0)
+
+    def test_cache_misses(self):
+        """Test that words missing from the lexicon are cached"""
+        phonemizer = self.make_phonemizer()
+
+        # Only exact word is checked
+        self.assertIsNone(phonemizer("Casa", do_transforms=False))
+        self.assertEqual(phonemizer("Casa"), ["k", "a", "z", "ə"])
+
+        self.assertIsNone(phonemizer("gat"))
+        hits = phonemizer.cache_stats.hits
+        self.assertIsNone(phonemizer("gat"))
+        self.assertEqual(phonemizer.cache_stats.hits, hits + 1)
+
+    def test_mmap_lexicon(self):
+        """Test that a compiled lexicon matches the database"""
+        rows = self.db_conn.execute(
+            "SELECT word, pron_order, phonemes, role FROM word_phonemes"
+        )
+
+        with tempfile.NamedTemporaryFile(suffix=".mmap") as lexicon_file:
+            write_mmap_lexicon(rows, lexicon_file)
+            lexicon_file.flush()
+
+            mmap_phonemizer = MmapPhonemizer(
+                lexicon_file.name,
+                word_transform_funcs=self.make_phonemizer().word_transform_funcs,
+            )
+
+            words = ["casa", "Casa", "dona", "dona", "L'home", "gat", "zzz", "a"]
+            roles = [None, None, "gruut:VERB", None, None, None, None, None]
+
+            self.assertEqual(
+                mmap_phonemizer.lookup_many(words, roles),
+                self.make_phonemizer().lookup_many(words, roles),
+            )
+            self.assertIsNone(mmap_phonemizer("Casa", do_transforms=False))
+
+            mmap_phonemizer.lexicon.close()
+
+    def test_upgrade_database(self):
+        """Test migrating an unindexed database to the current schema"""
+        words = ["casa", "Casa", "dona", "dona", "L'home", "gat"]
+        roles = [None, None, "gruut:VERB", None, None, None]
+
+        with self.assertLogs("gruut.phonemize", level="WARNING"):
+            expected = self.make_phonemizer().lookup_many(words, roles)
+
+        self.assertFalse(is_lexicon_indexed(self.db_conn))
+        self.assertTrue(upgrade_database(self.db_conn))
+        self.assertFalse(upgrade_database(self.db_conn))
+
+        self.assertTrue(is_lexicon_indexed(self.db_conn))
+        self.assertEqual(get_schema_version(self.db_conn), LEXICON_SCHEMA_VERSION)
+        self.assertEqual(self.make_phonemizer().lookup_many(words, roles), expected)
+
+    def test_load_lexicons(self):
+        """Test loading several text lexicons in bulk mode"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lexicon_paths = [Path(temp_dir) / "a.txt", Path(temp_dir) / "b.txt"]
+            lexicon_paths[0].write_text("casa k a z ə\nDona d ɔ n ə\n", "utf-8")
+            lexicon_paths[1].write_text("dona d o n ə\ngat ɡ a t\n", "utf-8")
+
+            rows = []
+            for bulk in [False, True]:
+                db_conn = sqlite3.connect(":memory:")
+                num_rows = load_lexicons(
+                    db_conn,
+                    lexicon_paths,
+                    word_casing=str.lower,
+                    bulk=bulk,
+                    chunk_size=1,
+                )
+
+                self.assertEqual(num_rows, 4)
+                self.assertTrue(is_lexicon_indexed(db_conn))
+                rows.append(
+                    db_conn.execute(
+                        "SELECT word, pron_order, phonemes FROM word_phonemes"
+                    ).fetchall()
+                )
+
+        self.assertEqual(rows[0], rows[1])
+        self.assertEqual(
+            rows[0],
+            [
+                ("casa", 0, "k a z ə"),
+                ("dona", 0, "d ɔ n ə"),
+                ("dona", 1, "d o n ə"),
+                ("gat", 0, "ɡ a t"),
+            ],
+        )
+
+
 def get_phonemes(text, lang):
     """Return (text, phonemes) for each word"""
     sentence = next(sentences(text, lang=lang))
@@ -5,6 +5,7 @@ import unittest
 
 from gruut import sentences
 from gruut.resources import _DIR
+from gruut.text_processor import TextProcessor
 from gruut.utils import print_graph
 
 
@@ -355,6 +356,58 @@ class SSMLTestCase(unittest.TestCase):
             ],
         )
 
+    def test_stream_sentences(self):
+        """Test processing SSML in windows"""
+        text = """<speak xml:lang="en-US">
+  <lexicon xml:id="test" alphabet="ipa">
+    <lexeme>
+      <grapheme>tomato</grapheme>
+      <phoneme>t ə m ˈɑ t oʊ</phoneme>
+    </lexeme>
+  </lexicon>
+  <break time="1s" />
+  <voice name="David">
+    <p><s>This is a test.</s> <s>Another <lookup ref="test">tomato</lookup>.</s></p>
+    <mark name="middle" />
+    <p><s xml:lang="es-MX">Para español.</s></p>
+  </voice>
+  <break time="2s" />
+</speak>"""
+
+        processor = TextProcessor()
+        results = [
+            (
+                sent.par_idx,
+                sent.idx,
+                sent.voice,
+                sent.pause_before_ms,
+                sent.pause_after_ms,
+                sent.marks_before,
+                [(w.lang, w.text, w.phonemes) for w in sent],
+            )
+            for sent in processor.stream_sentences(text, ssml=True, pos=False)
+        ]
+
+        self.assertEqual(
+            [r[:-1] for r in results],
+            [
+                (0, 0, "David", 1000, 0, None),
+                (0, 1, "David", 0, 0, None),
+                (1, 0, "David", 0, 2000, ["middle"]),
+            ],
+        )
+
+        # Same words as without windows
+        graph, root = processor(text, ssml=True, pos=False)
+        self.assertEqual(
+            [r[-1] for r in results],
+            [
+                [(w.lang, w.text, w.phonemes) for w in sent]
+                for sent in processor.sentences(graph, root)
+            ],
+        )
+        self.assertEqual(results[1][-1][1][-1], ["t", "ə", "m", "ˈɑ", "t", "oʊ"])
+
     def test_lexicon_external(self):
         """Test <lexicon> from URI"""
         lexicon_path = (_DIR.parent / "etc" / "sample_lexicon.xml").absolute()
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 """Tests for TextProcessor"""
+import asyncio
 import sys
 import unittest
+import unittest.mock
+from datetime import datetime
 
+from gruut.const import DATA_PROP, has_digit
+from gruut.lang import CA_PARSE_DATE, is_maybe_dmy_date
 from gruut.text_processor import Sentence, TextProcessor, TextProcessorSettings, Word
-from gruut.utils import print_graph
+from gruut.utils import DocumentTree, print_graph
 
 WORDS_KWARGS = {"explicit_lang": False, "phonemes": False, "pos": False}
 
@@ -734,6 +739,32 @@ class TextProcessorTestCase(unittest.TestCase):
             ],
         )
 
+    def test_date_fast_path(self):
+        """Test that fast date parsing matches dateparser"""
+        self.assertEqual(CA_PARSE_DATE("12/maig/2021"), datetime(2021, 5, 12))
+        self.assertEqual(CA_PARSE_DATE("1.1.99"), datetime(1999, 1, 1))
+        self.assertIsNone(CA_PARSE_DATE("31/02/2021"))
+        self.assertIsNone(CA_PARSE_DATE("2021/05/12"))
+
+        self.assertFalse(is_maybe_dmy_date("12/05"))
+        self.assertTrue(is_maybe_dmy_date("1620000000"))
+        self.assertTrue(is_maybe_dmy_date("2a"))
+
+        text = "El 12/05/2021 i el 3.1.99, no el 31/02/2021 ni l'1/2."
+        fast_processor = TextProcessor(default_lang="ca")
+        slow_processor = TextProcessor(
+            default_lang="ca", is_maybe_date=has_digit, parse_date=None
+        )
+
+        fast_words = list(
+            fast_processor.words(*fast_processor(text, pos=False), **WORDS_KWARGS)
+        )
+        slow_words = list(
+            slow_processor.words(*slow_processor(text, pos=False), **WORDS_KWARGS)
+        )
+
+        self.assertEqual(fast_words, slow_words)
+
     def test_part_of_speech_tagging(self):
         """Test part-of-speech tagging"""
 
@@ -1032,6 +1063,236 @@ class TextProcessorTestCase(unittest.TestCase):
             ],
         )
 
+    def test_pass_stats(self):
+        """Test that later passes only touch changed nodes"""
+        processor = TextProcessor()
+        pass_stats = []
+        graph, root = processor("ABCD-10 " + ("word " * 100), pass_stats=pass_stats)
+        words = list(processor.words(graph, root, **WORDS_KWARGS))
+
+        self.assertEqual([w.text for w in words[:5]], ["A", "B", "C", "D", "ten"])
+        self.assertEqual(len(words), 105)
+
+        # First pass touches every word, later ones only the split pieces
+        self.assertGreater(len(pass_stats), 1)
+        self.assertGreater(pass_stats[0], 100)
+        self.assertTrue(all(num_touched < 100 for num_touched in pass_stats[1:]))
+
+        # Later passes do the same work for a longer document
+        long_pass_stats = []
+        processor("ABCD-10 " + ("word " * 1000), pass_stats=long_pass_stats)
+        self.assertGreater(long_pass_stats[0], 1000)
+        self.assertEqual(long_pass_stats[1:], pass_stats[1:])
+
+    def test_verbalize_cache(self):
+        """Test that repeated numbers come from the cache"""
+        processor = TextProcessor()
+        self.assertGreater(processor.warm_verbalize_cache(["3 and $4"]), 0)
+        stats = processor.verbalize_cache_stats["en_US"]
+        num_misses = stats.misses
+
+        graph, root = processor("3 and $4")
+        words = list(processor.words(graph, root, **WORDS_KWARGS))
+        self.assertEqual(
+            [w.text for w in words], ["three", "and", "four", "dollars"],
+        )
+
+        # Everything was seen while warming
+        self.assertGreater(stats.hits, 0)
+        self.assertEqual(stats.misses, num_misses)
+
+        # No cache
+        uncached_processor = TextProcessor(verbalize_cache_size=0)
+        graph, root = uncached_processor("3 and $4")
+        self.assertEqual(
+            list(uncached_processor.words(graph, root, **WORDS_KWARGS)), words
+        )
+        self.assertEqual(uncached_processor.verbalize_cache_stats, {})
+
+    def test_stream_sentences(self):
+        """Test processing plain text in windows"""
+        text = "First sentence. Second one.\nThird 3.\n\nFourth.\n"
+        processor = TextProcessor()
+
+        # Windows split after sentences, blank lines start a paragraph
+        sentences = list(
+            processor.stream_sentences(
+                iter(text.splitlines(keepends=True)), max_window_chars=10, pos=False,
+            )
+        )
+        self.assertEqual(
+            [(s.par_idx, s.idx, s.text) for s in sentences],
+            [
+                (0, 0, "First sentence."),
+                (0, 1, "Second one."),
+                (0, 2, "Third three."),
+                (1, 0, "Fourth."),
+            ],
+        )
+        self.assertEqual(sentences[2].words[0].sent_idx, 2)
+
+        graph, root = processor(text, pos=False)
+        self.assertEqual(
+            [w.phonemes for s in sentences for w in s],
+            [w.phonemes for w in processor.words(graph, root)],
+        )
+
+    def test_stream_sentences_no_line_breaks(self):
+        """Test that windows aren't split inside a sentence"""
+        text = (
+            "First paragraph.\n\n"
+            + "Second paragraph without a\nperiod at the end of lines. And\n"
+            + "another sentence that continues\nhere.\n"
+        )
+        processor = TextProcessor()
+
+        sentences = list(
+            processor.stream_sentences(
+                iter(text.splitlines(keepends=True)), max_window_chars=20, pos=False,
+            )
+        )
+        self.assertEqual(
+            [(s.par_idx, s.idx, s.text) for s in sentences],
+            [
+                (0, 0, "First paragraph."),
+                (1, 0, "Second paragraph without a period at the end of lines."),
+                (1, 1, "And another sentence that continues here."),
+            ],
+        )
+
+    def test_stream_sentences_abbreviation(self):
+        """Test that windows aren't split after an abbreviation"""
+        text = "We met Dr. Smith yesterday at noon in the park. Then we left.\n"
+        processor = TextProcessor()
+
+        for max_window_chars in [5, 10, 50]:
+            sentences = list(
+                processor.stream_sentences(
+                    text, max_window_chars=max_window_chars, pos=False
+                )
+            )
+            self.assertEqual(
+                [s.text for s in sentences],
+                ["We met Doctor Smith yesterday at noon in the park.", "Then we left."],
+                max_window_chars,
+            )
+
+    def test_stream_sentences_no_pos(self):
+        """Test that the tagger isn't run with pos=False (--stream --no-pos)"""
+        from gruut.__main__ import get_args, process_lines
+
+        tagged_words = []
+
+        def get_parts_of_speech(words, *args, **kwargs):
+            tagged_words.extend(words)
+            return [w.upper() for w in words]
+
+        processor = TextProcessor(get_parts_of_speech=get_parts_of_speech)
+        text = "A test. Another test.\n"
+
+        sentences = list(processor.stream_sentences(text, pos=False))
+        self.assertEqual(len(sentences), 2)
+        self.assertEqual(tagged_words, [])
+
+        with unittest.mock.patch.object(
+            sys, "argv", ["gruut", "--stream", "--no-pos", "--language", "en-us"]
+        ):
+            args = get_args()
+
+        output = []
+        process_lines(
+            [text],
+            args,
+            processor,
+            input_text=None,
+            output_sentences=lambda sentences, writer: output.extend(sentences),
+            writer=None,
+        )
+        self.assertEqual(len(output), 2)
+        self.assertEqual(tagged_words, [])
+
+        # Tags are still output by default
+        sentences = list(processor.stream_sentences(text))
+        self.assertEqual(sentences[0].words[1].pos, "TEST")
+
+        sentences = list(processor.stream_sentences(text, output_pos=False))
+        self.assertIsNone(sentences[0].words[1].pos)
+
+    def test_lexicon_once_per_document(self):
+        """Test that each distinct word is looked up once per document"""
+        lookups = []
+        lexicon = {"this": {"": ["ð", "ɪ", "s"]}, "test": {"": ["t", "ɛ", "s", "t"]}}
+
+        def lookup_phonemes(word, role=None, do_transforms=True):
+            return None
+
+        def lookup_prons(word, do_transforms=True):
+            lookups.append((word, do_transforms))
+            if do_transforms:
+                word = word.lower()
+
+            return lexicon.get(word)
+
+        lookup_phonemes.lookup_prons = lookup_prons  # type: ignore
+
+        processor = TextProcessor(
+            default_lang="en_US",
+            settings={
+                "en_US": TextProcessorSettings(
+                    lang="en_US", lookup_phonemes=lookup_phonemes
+                )
+            },
+        )
+        graph, root = processor("This test this test a test", pos=False)
+        words = list(processor.words(graph, root))
+
+        self.assertEqual(
+            [w.phonemes for w in words if w.text != "a"],
+            [["ð", "ɪ", "s"], ["t", "ɛ", "s", "t"]] * 2 + [["t", "ɛ", "s", "t"]],
+        )
+
+        # Exact word at tokenization, transformed words only for misses
+        self.assertEqual(len(lookups), len(set(lookups)))
+        self.assertNotIn(("test", True), lookups)
+        self.assertIn(("This", True), lookups)
+
+    def test_process_async(self):
+        """Test processing text without blocking the event loop"""
+        text = "First sentence. Second 2."
+        processor = TextProcessor()
+        expected = [s.text for s in processor.sentences(*processor(text, pos=False))]
+
+        async def run_test():
+            # Concurrent requests for the same text share one job
+            results = await asyncio.gather(
+                *(processor.process_async(text, pos=False) for _ in range(3))
+            )
+            self.assertEqual(
+                [[s.text for s in processor.sentences(*result)] for result in results],
+                [expected] * len(results),
+            )
+
+            # ...but each caller gets its own copy
+            self.assertIsNot(results[0][0], results[1][0])
+
+            async def get_sentences():
+                return [s async for s in processor.sentences_async(text, pos=False)]
+
+            all_sentences = await asyncio.gather(get_sentences(), get_sentences())
+            self.assertEqual([s.text for s in all_sentences[0]], expected)
+
+            all_sentences[0][0].words[0].phonemes = ["x"]
+            self.assertNotEqual(all_sentences[1][0].words[0].phonemes, ["x"])
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await processor.process_async(text * 100, timeout=0)
+
+            # Abandoned requests are cancelled and forgotten
+            await asyncio.sleep(0)
+            self.assertEqual(processor.async_requests, {})
+
+        asyncio.run(run_test())
+
     def test_number_nonfinite(self):
         """Test sentence with nan or inf"""
         processor = TextProcessor()
@@ -1087,6 +1348,49 @@ class TextProcessorTestCase(unittest.TestCase):
         )
 
 
+class DocumentTreeTestCase(unittest.TestCase):
+    """Tests for DocumentTree"""
+
+    def test_networkx_order(self):
+        """Test that traversal and edge order match networkx"""
+        import networkx as nx
+
+        graphs = [DocumentTree(), nx.DiGraph()]
+        for graph in graphs:
+            for node in range(6):
+                graph.add_node(node, data=str(node))
+
+            graph.add_edges_from([(0, 1), (0, 2), (1, 3), (2, 4), (0, 1)])
+
+            # Node with two parents
+            graph.add_edge(3, 5)
+            graph.add_edge(4, 5)
+
+            # Move edge to the end
+            graph.remove_edges_from([(0, 1)])
+            graph.add_edge(0, 1)
+
+        tree, nx_graph = graphs
+        self.assertEqual(
+            list(tree.dfs_preorder_nodes(0)), list(nx.dfs_preorder_nodes(nx_graph, 0))
+        )
+        self.assertEqual(list(tree.out_edges(0)), list(nx_graph.out_edges(0)))
+        self.assertEqual(list(tree.predecessors(5)), list(nx_graph.predecessors(5)))
+        self.assertEqual(tree.nodes[5][DATA_PROP], "5")
+        self.assertEqual(len(tree), len(nx_graph))
+
+    def test_networkx_backend(self):
+        """Test that networkx backend gives the same words"""
+        text = "ABCD-10 <s>Test, 1.</s> nan"
+        words = []
+        for use_networkx in [False, True]:
+            processor = TextProcessor(use_networkx=use_networkx)
+            graph, root = processor(text, ssml=True)
+            words.append(list(processor.words(graph, root, **WORDS_KWARGS)))
+
+        self.assertEqual(words[0], words[1])
+
+
 def print_graph_stderr(graph, root):
     """Print graph to stderr"""
     print_graph(graph, root, print_func=lambda *p: print(*p, file=sys.stderr))